@@ -0,0 +1,194 @@
+import json
+import lzma
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from file_manager import _format_todo_line, _parse_todo_line
+from todo_record import Todo
+
+# Compressors an archive can use: name -> (compress, decompress)
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 9), zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress)
+}
+
+# Most todos compressed together. Smaller blocks mean less to decompress
+# when the archive is read in parts, larger ones compress better.
+BLOCK_SIZE = 5000
+
+# Start of a block header line in the archive file
+BLOCK_PREFIX = b'#block|'
+
+class ArchiveStore:
+    """Append-only, compressed file of archived todos with a block index
+    
+    The archive is a sequence of blocks, each a header line followed by
+    the compressed data file lines of up to BLOCK_SIZE todos:
+        
+        #block|<codec>|<length>|<count>|<archived>|<oldest>|<newest>
+    
+    The index file next to it holds the header fields and offset of
+    every block as one JSON object per line, so counting the archived
+    todos or finding a block reads no compressed data. If the index
+    doesn't end where the archive does (a crash between the two writes)
+    it is rebuilt from the block headers. Blocks cut short by a crash
+    are ignored and overwritten by the next append.
+    """
+    
+    def __init__(self, path: str, compression: str = 'zlib'):
+        if compression not in CODECS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        self.path = path
+        self.index_path = path + '.idx'
+        self.compression = compression
+        
+        self._blocks: List[Dict] = []
+        self._signature: Optional[Tuple] = None
+    
+    def _file_signature(self) -> Optional[Tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _end(self) -> int:
+        """Offset where the last complete block ends"""
+        if not self._blocks:
+            return 0
+        return self._blocks[-1]['offset'] + self._blocks[-1]['length']
+    
+    def _ensure_loaded(self):
+        """Read the block index unless the archive is unchanged since the last read"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        self._signature = signature
+        self._blocks = []
+        if signature is None:
+            return
+        
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                self._blocks = [json.loads(line) for line in file if line.endswith('\n')]
+        except (OSError, ValueError):
+            self._blocks = []
+        if self._end() != signature[1]:
+            self._rebuild_index(signature[1])
+    
+    def _rebuild_index(self, size: int):
+        """Index the blocks of the archive from their header lines"""
+        self._blocks = []
+        with open(self.path, 'rb') as file:
+            offset = 0
+            while offset < size:
+                header = file.readline()
+                fields = header.rstrip(b'\n').decode('utf-8', 'replace').split('|')
+                if not header.startswith(BLOCK_PREFIX) or len(fields) != 7:
+                    break
+                try:
+                    block = self._block(offset, len(header), fields)
+                except ValueError:
+                    break
+                if block['offset'] + block['length'] > size:
+                    break  # cut short by a crash
+                self._blocks.append(block)
+                offset = block['offset'] + block['length']
+                file.seek(offset)
+        
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(''.join(json.dumps(block) + '\n' for block in self._blocks))
+        os.replace(temp_path, self.index_path)
+    
+    @staticmethod
+    def _block(offset: int, header_length: int, fields: List[str]) -> Dict:
+        _, codec, length, count, archived, oldest, newest = fields
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive compression: {codec}")
+        return {'offset': offset, 'data': offset + header_length,
+                'length': header_length + int(length), 'codec': codec, 'count': int(count),
+                'archived': archived, 'oldest': oldest, 'newest': newest}
+    
+    def count(self) -> int:
+        """Number of archived todos"""
+        self._ensure_loaded()
+        return sum(block['count'] for block in self._blocks)
+    
+    def blocks(self) -> List[Dict]:
+        """The index entries of the blocks, oldest first
+        
+        Each has 'count', 'archived' (when the block was written) and
+        'oldest' and 'newest' (creation times of its todos).
+        """
+        self._ensure_loaded()
+        return [dict(block) for block in self._blocks]
+    
+    def append(self, todos: Iterable[Todo]) -> int:
+        """Compress todos into new blocks at the end of the archive
+        
+        The blocks are synced to disk before the index is extended, so
+        once this returns the todos can be removed from the data file.
+        Returns how many todos were archived.
+        """
+        self._ensure_loaded()
+        compress = CODECS[self.compression][0]
+        archived = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        todos = list(todos)
+        
+        new_blocks = []
+        with open(self.path, 'ab') as file:
+            # Drop a block a crash left unfinished
+            file.truncate(self._end())
+            offset = self._end()
+            for start in range(0, len(todos), BLOCK_SIZE):
+                chunk = todos[start:start + BLOCK_SIZE]
+                data = compress(''.join(_format_todo_line(todo) for todo in chunk).encode('utf-8'))
+                fields = ['#block', self.compression, str(len(data)), str(len(chunk)), archived,
+                          min(todo.timestamp for todo in chunk), max(todo.timestamp for todo in chunk)]
+                header = ('|'.join(fields) + '\n').encode('utf-8')
+                file.write(header)
+                file.write(data)
+                new_blocks.append(self._block(offset, len(header), fields))
+                offset += len(header) + len(data)
+            file.flush()
+            os.fsync(file.fileno())
+        
+        with open(self.index_path, 'a', encoding='utf-8') as file:
+            file.write(''.join(json.dumps(block) + '\n' for block in new_blocks))
+        self._blocks.extend(new_blocks)
+        self._signature = self._file_signature()
+        return len(todos)
+    
+    def _read_block(self, file, block: Dict) -> Iterator[Todo]:
+        file.seek(block['data'])
+        data = file.read(block['offset'] + block['length'] - block['data'])
+        for line in CODECS[block['codec']][1](data).decode('utf-8').splitlines():
+            todo = _parse_todo_line(line)
+            if todo is not None:
+                yield todo
+    
+    def iter_todos(self) -> Iterator[Todo]:
+        """Yield the archived todos, oldest block first, one block in memory at a time
+        
+        A crash between archiving todos and removing them from the data
+        file can archive them twice; repeats are skipped.
+        """
+        self._ensure_loaded()
+        if not self._blocks:
+            return
+        seen = set()
+        with open(self.path, 'rb') as file:
+            for block in list(self._blocks):
+                for todo in self._read_block(file, block):
+                    if todo.id not in seen:
+                        seen.add(todo.id)
+                        yield todo
+    
+    def search(self, search_term: str) -> List[Todo]:
+        """Archived todos containing every word of the search term"""
+        words = search_term.lower().split()
+        return [todo for todo in self.iter_todos()
+                if all(word in todo.task.lower() for word in words)]
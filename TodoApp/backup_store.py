@@ -0,0 +1,231 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from file_manager import _format_todo_line, _new_id, _parse_todo_line, _replace_file
+from todo_record import Todo
+
+# First line of a backup journal. Files without it are old single-copy backups.
+JOURNAL_HEADER = '#todo-backups 1'
+
+def _record_hash(line: str) -> str:
+    return hashlib.blake2b(line.encode('utf-8'), digest_size=8).hexdigest()
+
+class BackupStore:
+    """Append-only journal of todo list snapshots
+    
+    Every todo line is stored once, keyed by a hash of its content. A
+    snapshot lists which todos changed ('+' lines) or disappeared ('-'
+    lines) since the previous snapshot, so saving a snapshot costs about
+    the size of the change. When 2 * retention snapshots have piled up
+    the journal is rewritten with only the newest `retention` ones.
+    
+    Journal lines:
+        R|<hash>|<todo line>      a todo line
+        S|<created>|full|delta    start of a snapshot
+        -|<id>                    todo removed
+        +|<id>|<hash>             todo added or changed
+        E                         end of the snapshot
+    """
+    
+    def __init__(self, path: str, retention: int = 10):
+        self.path = path
+        self.retention = max(1, retention)
+        
+        self._records: Dict[str, str] = {}
+        self._snapshots: List[Dict] = []
+        # State (todo ID -> record hash) of the newest snapshot
+        self._latest: Optional[Dict[str, str]] = None
+        self._signature: Optional[Tuple] = None
+        self._loaded = False
+        self._needs_rewrite = False
+    
+    def _file_signature(self) -> Optional[Tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _ensure_loaded(self):
+        """Parse the journal unless it is unchanged since the last parse"""
+        signature = self._file_signature()
+        if self._loaded and signature == self._signature:
+            return
+        
+        self._records = {}
+        self._snapshots = []
+        self._latest = None
+        self._needs_rewrite = False
+        self._signature = signature
+        self._loaded = True
+        if signature is None:
+            return
+        
+        with open(self.path, 'r', encoding='utf-8') as file:
+            first_line = file.readline()
+            if first_line.rstrip('\n') != JOURNAL_HEADER:
+                file.seek(0)
+                self._load_plain_backup(file)
+                return
+            
+            snapshot = None
+            for line in file:
+                # A line without newline is a torn write from a crash
+                if not line.endswith('\n'):
+                    break
+                kind, _, rest = line.rstrip('\n').partition('|')
+                if kind == 'R':
+                    record_hash, _, record = rest.partition('|')
+                    self._records[record_hash] = record
+                elif kind == 'S':
+                    created, _, mode = rest.partition('|')
+                    snapshot = {'created': created, 'full': mode == 'full', 'removed': [], 'set': []}
+                elif snapshot is not None and kind == '-':
+                    snapshot['removed'].append(rest)
+                elif snapshot is not None and kind == '+':
+                    snapshot['set'].append(tuple(rest.split('|', 1)))
+                elif snapshot is not None and kind == 'E':
+                    self._snapshots.append(snapshot)
+                    snapshot = None
+        
+        if self._snapshots:
+            self._latest = self._state_at(len(self._snapshots) - 1)
+    
+    def _load_plain_backup(self, file):
+        """Treat an old plain-text backup as a single full snapshot"""
+        state = {}
+        for line in file:
+            todo = _parse_todo_line(line.strip())
+            if todo is None:
+                continue
+            todo.id = todo.id or _new_id()
+            record = _format_todo_line(todo).rstrip('\n')
+            state[todo.id] = _record_hash(record)
+            self._records[state[todo.id]] = record
+        
+        created = datetime.fromtimestamp(os.path.getmtime(self.path)).strftime("%Y-%m-%d %H:%M:%S")
+        self._snapshots = [{'created': created, 'full': True, 'removed': [],
+                            'set': list(state.items())}]
+        self._latest = state
+        self._needs_rewrite = True
+    
+    def _state_at(self, index: int) -> Dict[str, str]:
+        """Rebuild the todo ID -> hash mapping of one snapshot"""
+        start = index
+        while start > 0 and not self._snapshots[start]['full']:
+            start -= 1
+        
+        state = {}
+        for snapshot in self._snapshots[start:index + 1]:
+            if snapshot['full']:
+                state = {}
+            for todo_id in snapshot['removed']:
+                state.pop(todo_id, None)
+            for todo_id, record_hash in snapshot['set']:
+                state[todo_id] = record_hash
+        return state
+    
+    def snapshots(self) -> List[Dict[str, object]]:
+        """List the snapshots, oldest first, with creation time and size"""
+        self._ensure_loaded()
+        result = []
+        for index, snapshot in enumerate(self._snapshots):
+            result.append({'index': index, 'created': snapshot['created'],
+                           'count': len(self._state_at(index))})
+        return result
+    
+    def load(self, index: int = -1) -> List[Todo]:
+        """Return the todos of a snapshot (default: the newest)"""
+        self._ensure_loaded()
+        if not self._snapshots:
+            raise IndexError("no backups available")
+        index = range(len(self._snapshots))[index]
+        state = self._state_at(index)
+        return [_parse_todo_line(self._records[record_hash]) for record_hash in state.values()]
+    
+    def save(self, todos: Iterable[Todo]):
+        """Add a snapshot of todos to the journal"""
+        self._ensure_loaded()
+        
+        current = {}
+        new_records = {}
+        for todo in todos:
+            record = _format_todo_line(todo).rstrip('\n')
+            record_hash = _record_hash(record)
+            current[todo.id] = record_hash
+            if record_hash not in self._records:
+                new_records[record_hash] = record
+        
+        snapshot = self._make_snapshot(current)
+        self._records.update(new_records)
+        self._snapshots.append(snapshot)
+        self._latest = current
+        
+        if self._needs_rewrite or len(self._snapshots) >= 2 * self.retention:
+            self._rewrite()
+            return
+        
+        lines = [f"R|{record_hash}|{record}\n" for record_hash, record in new_records.items()]
+        lines.extend(self._snapshot_lines(snapshot))
+        is_new = not os.path.exists(self.path)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            if is_new:
+                file.write(JOURNAL_HEADER + '\n')
+            file.write(''.join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        self._signature = self._file_signature()
+    
+    def _make_snapshot(self, current: Dict[str, str]) -> Dict:
+        created = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        previous = self._latest
+        if previous is not None:
+            removed = [todo_id for todo_id in previous if todo_id not in current]
+            changed = [(todo_id, record_hash) for todo_id, record_hash in current.items()
+                       if previous.get(todo_id) != record_hash]
+            
+            # A delta can only express removals, in-place changes and
+            # appends; if the order changed otherwise store everything
+            removed_ids = set(removed)
+            expected_order = [todo_id for todo_id in previous if todo_id not in removed_ids]
+            expected_order.extend(todo_id for todo_id, _ in changed if todo_id not in previous)
+            if expected_order == list(current):
+                return {'created': created, 'full': False, 'removed': removed, 'set': changed}
+        
+        return {'created': created, 'full': True, 'removed': [], 'set': list(current.items())}
+    
+    def _snapshot_lines(self, snapshot: Dict) -> List[str]:
+        lines = [f"S|{snapshot['created']}|{'full' if snapshot['full'] else 'delta'}\n"]
+        lines.extend(f"-|{todo_id}\n" for todo_id in snapshot['removed'])
+        lines.extend(f"+|{todo_id}|{record_hash}\n" for todo_id, record_hash in snapshot['set'])
+        lines.append("E\n")
+        return lines
+    
+    def _rewrite(self):
+        """Rewrite the journal with only the newest `retention` snapshots"""
+        first = max(0, len(self._snapshots) - self.retention)
+        kept = self._snapshots[first:]
+        if first > 0 and not kept[0]['full']:
+            kept[0] = {'created': kept[0]['created'], 'full': True, 'removed': [],
+                       'set': list(self._state_at(first).items())}
+        
+        used = {record_hash for snapshot in kept for _, record_hash in snapshot['set']}
+        self._records = {record_hash: record for record_hash, record in self._records.items()
+                         if record_hash in used}
+        
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(JOURNAL_HEADER + '\n')
+            file.write(''.join(f"R|{record_hash}|{record}\n"
+                               for record_hash, record in self._records.items()))
+            for snapshot in kept:
+                file.write(''.join(self._snapshot_lines(snapshot)))
+            file.flush()
+            os.fsync(file.fileno())
+        _replace_file(temp_path, self.path)
+        
+        self._snapshots = kept
+        self._needs_rewrite = False
+        self._signature = self._file_signature()
@@ -4,6 +4,15 @@ APP_CONFIG = {
     'window_size': '600x500',
     'data_file': 'todos.txt',
     'backup_file': 'todos_backup.txt',
+    'backup_retention': 10,  # Number of backup snapshots to keep
+    'storage_mode': 'text',  # 'text' rewrites the file, 'log' appends changes, 'sqlite' uses a database
+    'log_compact_threshold': 1000,
+    'database_file': 'todos.db',
+    'page_size': 100,  # Todos the GUIs fetch at a time
+    'watch_interval': 2000,  # Milliseconds between checks for changes by other windows
+    'search_delay': 250,  # Milliseconds of no typing before the search box searches
+    'archive_after_days': 30,  # Completed todos older than this can be archived
+    'archive_compression': 'zlib',  # 'zlib' (faster) or 'lzma' (smaller)
     'theme': {
         'bg_color': '#f0f0f0',
         'primary_color': '#4CAF50',
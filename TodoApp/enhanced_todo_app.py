@@ -2,7 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 from datetime import datetime
 import os
-from file_manager import TodoFileManager
+from file_manager import create_file_manager
+from export_dialog import ExportProgressDialog
+from io_worker import IOWorker, SaveStatusLabel, is_provisional, provisional_todo
+from search_worker import SearchWorker
+from todo_import import IMPORT_FORMATS
+from sort_index import SORT_CHOICES, insert_position
+from todo_record import Status
 from config import APP_CONFIG
 
 class EnhancedTodoApp:
@@ -12,11 +18,28 @@ class EnhancedTodoApp:
         self.root.geometry(APP_CONFIG['window_size'])
         self.root.configure(bg=APP_CONFIG['theme']['bg_color'])
         
+        # Todos shown in the listbox, one per row. Rows are fetched a page
+        # at a time as the list is scrolled down.
+        self.rows = []
+        self.total_rows = 0
+        # Set while the next page is read behind queued writes
+        self.loading_more = False
+        
         # Initialize file manager
-        self.file_manager = TodoFileManager(
-            APP_CONFIG['data_file'], 
-            APP_CONFIG['backup_file']
-        )
+        self.file_manager = create_file_manager(APP_CONFIG)
+        
+        # Changes are shown at once and saved in the background
+        self.io_worker = IOWorker()
+        # Set when a finished write asked for the rows to be reloaded
+        # while more writes were still queued
+        self.reload_pending = False
+        
+        # The search box searches in the background once typing pauses;
+        # search_term is the term of the rows shown
+        self.search_term = ''
+        self.search_after = None
+        self.search_polling = False
+        self.search_worker = SearchWorker(lambda args: self.file_manager.query(**args))
         
         # Create menu bar
         self.create_menu()
@@ -29,6 +52,9 @@ class EnhancedTodoApp:
         
         # Update statistics
         self.update_statistics()
+        
+        # Pick up changes made by other windows on the same file
+        self.root.after(APP_CONFIG['watch_interval'], self.watch_file)
     
     def create_menu(self):
         menubar = tk.Menu(self.root)
@@ -45,6 +71,11 @@ class EnhancedTodoApp:
         file_menu.add_separator()
         file_menu.add_command(label="Export as TXT", command=lambda: self.export_todos('txt'))
         file_menu.add_command(label="Export as CSV", command=lambda: self.export_todos('csv'))
+        file_menu.add_command(label="Export as JSON", command=lambda: self.export_todos('json'))
+        file_menu.add_command(label="Export as NDJSON", command=lambda: self.export_todos('ndjson'))
+        self.export_archive_var = tk.BooleanVar(value=False)
+        file_menu.add_checkbutton(label="Include Archive in Exports", variable=self.export_archive_var)
+        file_menu.add_command(label="Import...", command=self.import_todos)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         
@@ -52,6 +83,8 @@ class EnhancedTodoApp:
         edit_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Edit", menu=edit_menu)
         edit_menu.add_command(label="Search", command=self.search_todos)
+        edit_menu.add_command(label="Search Archive", command=self.search_archive)
+        edit_menu.add_command(label="Archive Completed", command=self.archive_completed)
         edit_menu.add_command(label="Clear All", command=self.clear_all)
         
         # View menu
@@ -122,6 +155,18 @@ class EnhancedTodoApp:
                                     fg='white', font=("Arial", 8))
         search_clear_btn.pack(side='left')
         
+        # Sort order of the list
+        self.sort_var = tk.StringVar(value="File order")
+        sort_combo = ttk.Combobox(search_frame, textvariable=self.sort_var,
+                                  values=list(SORT_CHOICES),
+                                  state="readonly", width=12)
+        sort_combo.pack(side='right')
+        sort_combo.bind('<<ComboboxSelected>>', lambda event: self.load_todos())
+        
+        tk.Label(search_frame, text="Sort by:", 
+                font=(APP_CONFIG['theme']['font_family'], 10), 
+                bg=APP_CONFIG['theme']['bg_color']).pack(side='right', padx=(0, 5))
+        
         # Statistics frame
         stats_frame = tk.Frame(main_frame, bg=APP_CONFIG['theme']['bg_color'])
         stats_frame.pack(fill='x', pady=(0, 10))
@@ -136,22 +181,22 @@ class EnhancedTodoApp:
         list_frame.pack(fill='both', expand=True, pady=(0, 10))
         
         # Scrollbars
-        v_scrollbar = tk.Scrollbar(list_frame, orient='vertical')
-        v_scrollbar.pack(side='right', fill='y')
+        self.v_scrollbar = tk.Scrollbar(list_frame, orient='vertical')
+        self.v_scrollbar.pack(side='right', fill='y')
         
         h_scrollbar = tk.Scrollbar(list_frame, orient='horizontal')
         h_scrollbar.pack(side='bottom', fill='x')
         
         # Listbox for tasks
         self.task_listbox = tk.Listbox(list_frame, 
-                                      yscrollcommand=v_scrollbar.set,
+                                      yscrollcommand=self.on_list_scroll,
                                       xscrollcommand=h_scrollbar.set,
                                       font=(APP_CONFIG['theme']['font_family'], 10),
                                       selectmode='single',
                                       height=12)
         self.task_listbox.pack(fill='both', expand=True)
         
-        v_scrollbar.config(command=self.task_listbox.yview)
+        self.v_scrollbar.config(command=self.task_listbox.yview)
         h_scrollbar.config(command=self.task_listbox.xview)
         
         # Double click to edit
@@ -199,11 +244,16 @@ class EnhancedTodoApp:
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
-        status_bar = tk.Label(self.root, textvariable=self.status_var,
-                             relief='sunken', anchor='w',
+        status_frame = tk.Frame(self.root, relief='sunken', borderwidth=1, bg='#e0e0e0')
+        status_frame.pack(side='bottom', fill='x')
+        status_bar = tk.Label(status_frame, textvariable=self.status_var,
+                             anchor='w',
                              bg='#e0e0e0', 
                              font=(APP_CONFIG['theme']['font_family'], 8))
-        status_bar.pack(side='bottom', fill='x')
+        status_bar.pack(side='left', fill='x', expand=True)
+        self.save_status = SaveStatusLabel(status_frame, self.io_worker, bg='#e0e0e0',
+                                           font=(APP_CONFIG['theme']['font_family'], 8))
+        self.save_status.pack(side='right', padx=5)
     
     def add_task(self):
         task_text = self.task_entry.get().strip()
@@ -213,30 +263,201 @@ class EnhancedTodoApp:
         
         priority = self.priority_var.get()
         
-        if self.file_manager.add_todo(task_text, priority):
-            self.task_entry.delete(0, tk.END)
-            self.load_todos()
-            self.update_statistics()
-            self.status_var.set(f"Task added: {task_text}")
+        # Show the new row in its place in the sort order right away;
+        # reloading once saved gives it its real ID
+        todo = provisional_todo(task_text, priority)
+        if self.matches_search(todo.task):
+            self.insert_row(todo)
+        self.queue_write("Add task", self.file_manager.add_todo, task_text, priority,
+                         on_done=lambda ok: self.after_write(ok, reload=True))
+        self.task_entry.delete(0, tk.END)
+        self.status_var.set(f"Task added: {task_text}")
+    
+    def queue_write(self, description, function, *args, on_done=None):
+        """Save a change in the background, see IOWorker"""
+        self.io_worker.submit(description, function, *args,
+                              on_done=on_done or self.after_write)
+        self.save_status.track()
+    
+    def queue_bulk_write(self, description, function, *args, on_success, failure):
+        """Queue a change to many tasks behind the writes already queued
+        
+        Once it is saved on_success gets what function returned and the
+        rows are reloaded; if it fails, failure is shown instead.
+        """
+        results = []
+        
+        def run():
+            results.append(function(*args))
+            return results[0]
+        
+        def on_done(ok):
+            if ok:
+                on_success(results[0])
+            else:
+                messagebox.showerror("Error", failure)
+            self.after_write(ok, reload=True)
+        
+        self.queue_write(description, run, on_done=on_done)
+    
+    def when_saved(self, callback):
+        """Call callback once no more writes are queued"""
+        if self.io_worker.pending:
+            self.root.after(SaveStatusLabel.POLL_INTERVAL, lambda: self.when_saved(callback))
         else:
-            messagebox.showerror("Error", "Failed to add task!")
+            callback()
+    
+    def after_write(self, ok, reload=False):
+        """Catch up with the file once a queued write has finished
+        
+        A failed write leaves the file manager with the file's contents,
+        so the rows are reloaded from it. Reads wait for a running
+        write, so they only happen once no more writes are queued.
+        """
+        if not ok:
+            self.status_var.set("Failed to save the last change!")
+        if self.io_worker.pending:
+            self.reload_pending = self.reload_pending or reload or not ok
+            return
+        if reload or not ok or self.reload_pending:
+            self.reload_pending = False
+            self.update_rows(self.fetch_rows(0, max(len(self.rows), APP_CONFIG['page_size'])))
+        self.update_statistics()
+    
+    def query_args(self, offset, limit=None, search_term=None):
+        """Arguments of query() for one page of the current view"""
+        sort, reverse = SORT_CHOICES[self.sort_var.get()]
+        return {'search': self.search_term if search_term is None else search_term,
+                'sort': sort, 'reverse': reverse,
+                'offset': offset, 'limit': limit or APP_CONFIG['page_size']}
+    
+    def fetch_rows(self, offset, limit=None):
+        """Fetch one page of the current view starting at row offset"""
+        todos, self.total_rows = self.file_manager.query(**self.query_args(offset, limit))
+        return todos
     
     def load_todos(self):
+        self.display_todos(self.fetch_rows(0))
+    
+    def load_more(self):
+        if len(self.rows) >= self.total_rows or self.loading_more:
+            return
+        if not self.io_worker.pending:
+            self.append_todos(self.fetch_rows(len(self.rows)))
+            return
+        # Reading now would wait for the queued writes, so read behind them
+        args = self.query_args(len(self.rows))
+        self.loading_more = True
+        self.io_worker.fetch(lambda: self.file_manager.query(**args),
+                             on_result=lambda result: self.more_loaded(args, result))
+        self.save_status.track()
+    
+    def more_loaded(self, args, result):
+        self.loading_more = False
+        # Drop the page if the rows were reloaded or the view changed meanwhile
+        if result is not None and args == self.query_args(len(self.rows)):
+            todos, self.total_rows = result
+            self.append_todos(todos)
+    
+    def on_list_scroll(self, first, last):
+        self.v_scrollbar.set(first, last)
+        # Fetch the next page once the end of the loaded rows comes into view
+        if float(last) >= 0.9:
+            self.load_more()
+    
+    def display_todos(self, todos):
         self.task_listbox.delete(0, tk.END)
-        todos = self.file_manager.read_todos()
-        
-        for todo in todos:
-            if todo['status'] == "Completed":
-                display_text = f"✓ [{todo['priority']}] {todo['task']} ({todo['timestamp']})"
-                self.task_listbox.insert(tk.END, display_text)
-                index = self.task_listbox.size() - 1
-                self.task_listbox.itemconfig(index, {'fg': APP_CONFIG['priority_colors']['Completed']})
-            else:
-                display_text = f"[{todo['priority']}] {todo['task']} ({todo['timestamp']})"
-                self.task_listbox.insert(tk.END, display_text)
-                index = self.task_listbox.size() - 1
-                color = APP_CONFIG['priority_colors'].get(todo['priority'], 'black')
-                self.task_listbox.itemconfig(index, {'fg': color})
+        self.rows = []
+        self.append_todos(todos)
+    
+    def append_todos(self, todos):
+        start = len(self.rows)
+        self.rows.extend(todos)
+        
+        # One insert for all rows and one Tcl script for their colours
+        self.task_listbox.insert(tk.END, *[self.row_text(todo) for todo in todos])
+        self.color_rows(start, [self.row_color(todo) for todo in todos])
+    
+    def color_rows(self, start, colors):
+        """Colour the rows from start on, in a single call into Tcl"""
+        listbox = str(self.task_listbox)
+        self.task_listbox.tk.eval('\n'.join(
+            f"{listbox} itemconfigure {index} -foreground {{{color}}}"
+            for index, color in enumerate(colors, start)))
+    
+    def set_row(self, index, todo):
+        """Redraw one row for todo"""
+        self.rows[index] = todo
+        self.task_listbox.delete(index)
+        self.task_listbox.insert(index, self.row_text(todo))
+        self.task_listbox.itemconfig(index, {'fg': self.row_color(todo)})
+    
+    def insert_row(self, todo):
+        """Show a new todo in its place among the rows
+        
+        It isn't shown if its place is past the rows loaded so far; it
+        turns up with the next page then.
+        """
+        self.total_rows += 1
+        sort, reverse = SORT_CHOICES[self.sort_var.get()]
+        index = insert_position(self.rows, todo, sort, reverse)
+        if index == len(self.rows) and len(self.rows) < self.total_rows - 1:
+            return
+        self.rows.insert(index, todo)
+        self.task_listbox.insert(index, self.row_text(todo))
+        self.task_listbox.itemconfig(index, {'fg': self.row_color(todo)})
+        self.task_listbox.see(index)
+    
+    def remove_row(self, index):
+        self.task_listbox.delete(index)
+        del self.rows[index]
+        self.total_rows -= 1
+    
+    def matches_search(self, task):
+        """Whether a task matches the search of the rows shown"""
+        task = task.lower()
+        return all(word in task for word in self.search_term.lower().split())
+    
+    def still_saving(self, index):
+        """Whether the row is a new task not saved yet, which can't be changed yet"""
+        if is_provisional(self.rows[index].id):
+            self.status_var.set("The task is still being saved, try again in a moment")
+            return True
+        return False
+    
+    def row_text(self, todo):
+        if todo.status == Status.COMPLETED:
+            return f"✓ [{todo.priority.label}] {todo.task} ({todo.timestamp})"
+        return f"[{todo.priority.label}] {todo.task} ({todo.timestamp})"
+    
+    def row_color(self, todo):
+        if todo.status == Status.COMPLETED:
+            return APP_CONFIG['priority_colors']['Completed']
+        return APP_CONFIG['priority_colors'].get(todo.priority.label, 'black')
+    
+    def watch_file(self):
+        # While our own writes are queued the file is about to change
+        # anyway; after_write() catches up once they are done
+        if not self.io_worker.pending and self.file_manager.poll_changes():
+            # Re-query the rows loaded so far, the file manager already
+            # has the changes in its cache and indexes
+            self.update_rows(self.fetch_rows(0, max(len(self.rows), APP_CONFIG['page_size'])))
+            self.update_statistics()
+            self.status_var.set("List updated by another window")
+        self.root.after(APP_CONFIG['watch_interval'], self.watch_file)
+    
+    def update_rows(self, todos):
+        """Show todos in the listbox, redrawing only the rows that differ"""
+        shown = len(self.rows)
+        for index, todo in enumerate(todos[:shown]):
+            if self.rows[index] != todo:
+                self.set_row(index, todo)
+        
+        if len(todos) < shown:
+            self.task_listbox.delete(len(todos), tk.END)
+            del self.rows[len(todos):]
+        else:
+            self.append_todos(todos[shown:])
     
     def complete_task(self):
         selection = self.task_listbox.curselection()
@@ -245,12 +466,17 @@ class EnhancedTodoApp:
             return
         
         index = selection[0]
-        if self.file_manager.update_todo_status(index, "Completed"):
-            self.load_todos()
-            self.update_statistics()
-            self.status_var.set("Task marked as completed!")
-        else:
-            messagebox.showerror("Error", "Failed to update task!")
+        if self.still_saving(index):
+            return
+        todo = self.rows[index].copy()
+        todo.status = Status.COMPLETED
+        # The status decides neither the order nor the search matches,
+        # so only the row itself changes
+        self.set_row(index, todo)
+        self.task_listbox.selection_set(index)
+        self.queue_write("Complete task", self.file_manager.update_todo_status_by_id,
+                         todo.id, Status.COMPLETED)
+        self.status_var.set("Task marked as completed!")
     
     def edit_task(self):
         selection = self.task_listbox.curselection()
@@ -259,25 +485,30 @@ class EnhancedTodoApp:
             return
         
         index = selection[0]
-        todos = self.file_manager.read_todos()
-        
-        if index >= len(todos):
-            return
+        current_todo = self.rows[index]
         
-        current_todo = todos[index]
-        if current_todo['status'] == "Completed":
+        if current_todo.status == Status.COMPLETED:
             messagebox.showwarning("Warning", "Cannot edit completed tasks!")
             return
+        if self.still_saving(index):
+            return
         
         new_task = simpledialog.askstring("Edit Task", 
                                          "Edit task:", 
-                                         initialvalue=current_todo['task'])
+                                         initialvalue=current_todo.task)
         if new_task and new_task.strip():
-            if self.file_manager.update_todo_task(index, new_task.strip()):
-                self.load_todos()
-                self.status_var.set("Task updated!")
+            todo = current_todo.copy()
+            todo.task = new_task.strip()
+            # The order doesn't depend on the text, but the search may
+            # no longer match it
+            if self.matches_search(todo.task):
+                self.set_row(index, todo)
+                self.task_listbox.selection_set(index)
             else:
-                messagebox.showerror("Error", "Failed to update task!")
+                self.remove_row(index)
+            self.queue_write("Edit task", self.file_manager.update_todo_task_by_id,
+                             todo.id, todo.task)
+            self.status_var.set("Task updated!")
     
     def delete_task(self):
         selection = self.task_listbox.curselection()
@@ -285,25 +516,57 @@ class EnhancedTodoApp:
             messagebox.showwarning("Warning", "Please select a task to delete!")
             return
         
+        if self.still_saving(selection[0]):
+            return
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this task?"):
-            index = selection[0]
-            if self.file_manager.delete_todo(index):
-                self.load_todos()
-                self.update_statistics()
-                self.status_var.set("Task deleted!")
-            else:
-                messagebox.showerror("Error", "Failed to delete task!")
+            todo_id = self.rows[selection[0]].id
+            self.remove_row(selection[0])
+            self.queue_write("Delete task", self.file_manager.delete_todo_by_id, todo_id)
+            self.status_var.set("Task deleted!")
     
     def clear_completed(self):
         if messagebox.askyesno("Confirm Clear", "Remove all completed tasks?"):
-            if self.file_manager.clear_completed():
-                self.load_todos()
-                self.update_statistics()
-                self.status_var.set("Completed tasks cleared!")
-            else:
-                messagebox.showerror("Error", "Failed to clear completed tasks!")
+            for index in reversed(range(len(self.rows))):
+                if self.rows[index].status == Status.COMPLETED:
+                    self.remove_row(index)
+            self.queue_write("Clear completed", self.file_manager.clear_completed,
+                             on_done=lambda ok: self.after_write(ok, reload=True))
+            self.status_var.set("Completed tasks cleared!")
+    
+    def archive_completed(self):
+        days = APP_CONFIG['archive_after_days']
+        if not messagebox.askyesno("Archive Completed",
+                                   f"Move completed tasks older than {days} days to the archive?"):
+            return
+        self.queue_bulk_write("Archive completed", self.file_manager.archive_completed, days,
+                              on_success=lambda count: self.status_var.set(f"Archived {count} tasks"),
+                              failure="Failed to archive tasks!")
+        self.status_var.set("Archiving tasks...")
+    
+    def search_archive(self):
+        search_term = simpledialog.askstring("Search Archive", "Enter search term:")
+        if not search_term:
+            return
+        todos = self.file_manager.search_archive(search_term)
+        if not todos:
+            messagebox.showinfo("Search Archive", "No archived tasks found.")
+            return
+        
+        # The archive can be large, so list the matches in a window of their own
+        results_window = tk.Toplevel(self.root)
+        results_window.title(f"Archived tasks matching '{search_term}' ({len(todos)})")
+        results_window.geometry("500x300")
+        scrollbar = tk.Scrollbar(results_window)
+        scrollbar.pack(side='right', fill='y')
+        results_listbox = tk.Listbox(results_window, yscrollcommand=scrollbar.set,
+                                     font=(APP_CONFIG['theme']['font_family'], 10))
+        results_listbox.pack(fill='both', expand=True)
+        scrollbar.config(command=results_listbox.yview)
+        results_listbox.insert(tk.END, *(self.row_text(todo) for todo in todos))
     
     def update_statistics(self):
+        if self.io_worker.pending:
+            return  # after_write() updates them without waiting for the writes
         stats = self.file_manager.get_statistics()
         stats_text = (f"Total: {stats['total']} | "
                      f"Pending: {stats['pending']} | "
@@ -318,33 +581,53 @@ class EnhancedTodoApp:
         if search_term:
             self.search_entry.delete(0, tk.END)
             self.search_entry.insert(0, search_term)
-            self.on_search()
+            self.start_search()
     
     def on_search(self, event=None):
-        search_term = self.search_entry.get().strip()
-        if search_term:
-            results = self.file_manager.search_todos(search_term)
-            self.display_search_results(results)
+        # Search once typing pauses instead of on every key
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(APP_CONFIG['search_delay'], self.start_search)
+    
+    def start_search(self):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+            self.search_after = None
+        self.search_worker.submit(self.query_args(0, search_term=self.search_entry.get().strip()))
+        if not self.search_polling:
+            self.search_polling = True
+            self.root.after(SearchWorker.POLL_INTERVAL, self.poll_search)
+    
+    def poll_search(self):
+        try:
+            result = self.search_worker.take_result()
+        except Exception as e:
+            self.search_polling = False
+            self.status_var.set(f"Search failed: {e}")
+            return
+        if result is None and self.search_worker.pending:
+            self.root.after(SearchWorker.POLL_INTERVAL, self.poll_search)
+            return
+        self.search_polling = False
+        if result is None:
+            return  # cancelled
+        
+        args, (todos, total) = result
+        self.search_term = args['search']
+        if args == self.query_args(0):
+            self.total_rows = total
+            self.display_todos(todos)
         else:
+            # The order changed while the search ran
             self.load_todos()
     
-    def display_search_results(self, results):
-        self.task_listbox.delete(0, tk.END)
-        for todo in results:
-            if todo['status'] == "Completed":
-                display_text = f"✓ [{todo['priority']}] {todo['task']} ({todo['timestamp']})"
-                self.task_listbox.insert(tk.END, display_text)
-                index = self.task_listbox.size() - 1
-                self.task_listbox.itemconfig(index, {'fg': APP_CONFIG['priority_colors']['Completed']})
-            else:
-                display_text = f"[{todo['priority']}] {todo['task']} ({todo['timestamp']})"
-                self.task_listbox.insert(tk.END, display_text)
-                index = self.task_listbox.size() - 1
-                color = APP_CONFIG['priority_colors'].get(todo['priority'], 'black')
-                self.task_listbox.itemconfig(index, {'fg': color})
-    
     def clear_search(self):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+            self.search_after = None
+        self.search_worker.cancel()
         self.search_entry.delete(0, tk.END)
+        self.search_term = ''
         self.load_todos()
     
     def refresh_display(self):
@@ -354,14 +637,15 @@ class EnhancedTodoApp:
     
     def new_file(self):
         if messagebox.askyesno("New File", "This will clear all current todos. Continue?"):
-            try:
-                if os.path.exists(self.file_manager.data_file):
-                    os.remove(self.file_manager.data_file)
-                self.load_todos()
-                self.update_statistics()
-                self.status_var.set("New file created!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to create new file: {str(e)}")
+            self.queue_clear("New file", "New file created!", "Failed to create new file!")
+    
+    def queue_clear(self, description, done_message, failure):
+        """Empty the list at once and queue writing the empty file"""
+        self.display_todos([])
+        self.total_rows = 0
+        self.queue_bulk_write(description, self.file_manager.write_todos, [],
+                              on_success=lambda ok: self.status_var.set(done_message),
+                              failure=failure)
     
     def open_file(self):
         file_path = filedialog.askopenfilename(
@@ -369,27 +653,54 @@ class EnhancedTodoApp:
             filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
         )
         if file_path:
-            self.file_manager.data_file = file_path
-            self.load_todos()
-            self.update_statistics()
-            self.status_var.set(f"Opened file: {os.path.basename(file_path)}")
+            # The queued writes belong to the current file
+            self.status_var.set("Saving changes before opening the file...")
+            self.when_saved(lambda: self.switch_file(file_path))
+    
+    def switch_file(self, file_path):
+        self.file_manager.data_file = file_path
+        self.load_todos()
+        self.update_statistics()
+        self.status_var.set(f"Opened file: {os.path.basename(file_path)}")
     
     def create_backup(self):
-        if self.file_manager.create_backup():
-            messagebox.showinfo("Backup", "Backup created successfully!")
-            self.status_var.set("Backup created!")
-        else:
-            messagebox.showerror("Error", "Failed to create backup!")
+        def on_done(ok):
+            if ok:
+                self.status_var.set("Backup created!")
+            else:
+                messagebox.showerror("Error", "Failed to create backup!")
+            self.after_write(True)  # the backup changed no todos
+        
+        self.queue_write("Backup", self.file_manager.create_backup, on_done=on_done)
+        self.status_var.set("Creating backup...")
+    
+    def choose_backup(self):
+        """Ask which backup snapshot to restore, returns its index or None"""
+        backups = self.file_manager.list_backups()
+        if not backups:
+            messagebox.showinfo("Restore", "No backups available.")
+            return None
+        if len(backups) == 1:
+            return backups[0]['index']
+        
+        choices = "\n".join(f"{number}. {backup['created']} ({backup['count']} tasks)"
+                            for number, backup in enumerate(backups, 1))
+        number = simpledialog.askinteger("Restore Backup", f"Restore which backup?\n\n{choices}",
+                                         initialvalue=len(backups), minvalue=1, maxvalue=len(backups))
+        return backups[number - 1]['index'] if number else None
     
     def restore_backup(self):
+        index = self.choose_backup()
+        if index is None:
+            return
         if messagebox.askyesno("Restore Backup", "This will replace current data. Continue?"):
-            if self.file_manager.restore_backup():
-                self.load_todos()
-                self.update_statistics()
+            def on_success(ok):
                 messagebox.showinfo("Restore", "Backup restored successfully!")
                 self.status_var.set("Backup restored!")
-            else:
-                messagebox.showerror("Error", "Failed to restore backup!")
+            
+            self.queue_bulk_write("Restore backup", self.file_manager.restore_backup, index,
+                                  on_success=on_success, failure="Failed to restore backup!")
+            self.status_var.set("Restoring backup...")
     
     def export_todos(self, format_type):
         file_extension = format_type.lower()
@@ -399,24 +710,51 @@ class EnhancedTodoApp:
             filetypes=[(f"{format_type.upper()} files", f"*.{file_extension}"), ("All files", "*.*")]
         )
         if file_path:
-            if self.file_manager.export_todos(file_path, format_type):
-                messagebox.showinfo("Export", f"Exported successfully to {file_path}")
-                self.status_var.set(f"Exported to {os.path.basename(file_path)}")
-            else:
-                messagebox.showerror("Error", "Export failed!")
+            def on_done(success):
+                if success:
+                    messagebox.showinfo("Export", f"Exported successfully to {file_path}")
+                    self.status_var.set(f"Exported to {os.path.basename(file_path)}")
+                else:
+                    messagebox.showerror("Error", "Export failed!")
+            
+            self.status_var.set(f"Exporting to {os.path.basename(file_path)}...")
+            ExportProgressDialog(self.root, self.file_manager, file_path, format_type, on_done,
+                                 self.export_archive_var.get(), self.io_worker)
+    
+    def import_todos(self):
+        file_path = filedialog.askopenfilename(
+            title="Import Tasks",
+            filetypes=[("Todo files", " ".join(f"*.{name}" for name in IMPORT_FORMATS)),
+                       ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        # Anything that isn't CSV or JSON is read as text
+        extension = os.path.splitext(file_path)[1].lstrip('.').lower()
+        format_type = extension if extension in IMPORT_FORMATS else 'txt'
+        
+        def on_success(report):
+            messagebox.showinfo("Import", f"Imported {report['added']} tasks\n"
+                                          f"Skipped {report['duplicates']} duplicates and "
+                                          f"{report['invalid']} invalid rows")
+            self.status_var.set(f"Imported {report['added']} tasks")
+        
+        self.queue_bulk_write("Import", self.file_manager.import_todos, file_path, format_type,
+                              on_success=on_success, failure="Import failed!")
+        self.status_var.set(f"Importing {os.path.basename(file_path)}...")
     
     def clear_all(self):
         if messagebox.askyesno("Clear All", "This will delete ALL todos. This cannot be undone. Continue?"):
-            if self.new_file():
-                self.status_var.set("All todos cleared!")
+            self.queue_clear("Clear all", "All todos cleared!", "Failed to clear todos!")
     
     def show_statistics(self):
-        stats = self.file_manager.get_statistics()
+        stats = self.file_manager.get_statistics(include_archive=True)
         stats_text = f"""Todo Statistics:
         
 Total Tasks: {stats['total']}
 Pending Tasks: {stats['pending']}
-Completed Tasks: {stats['completed']}
+Completed Tasks: {stats['completed']} ({stats['archived']} archived)
 
 Priority Breakdown (Pending):
 High Priority: {stats['high_priority']}
@@ -437,7 +775,7 @@ Features:
 • Priority levels (High, Medium, Low)
 • Task completion tracking
 • Search functionality
-• Export capabilities (TXT, CSV)
+• Export capabilities (TXT, CSV, JSON, NDJSON)
 • Backup and restore
 • Statistics and analytics
 
@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+class ExportProgressDialog(tk.Toplevel):
+    """Small window with a progress bar that runs an export in the background
+    
+    The export runs in a worker thread, so the Tk main loop keeps
+    redrawing. The worker only puts progress reports into a queue, the
+    dialog polls it from the main loop. on_done is called with True or
+    False once the export has finished. With include_archive the
+    archived todos are exported too. Given the GUI's IOWorker, the export
+    starts once the changes queued on it are saved, so the file holds
+    what the window shows.
+    """
+    
+    # Milliseconds between two looks at the progress queue
+    POLL_INTERVAL = 100
+    
+    def __init__(self, root, file_manager, export_file, format_type, on_done,
+                 include_archive=False, io_worker=None):
+        super().__init__(root)
+        self.title("Exporting")
+        self.resizable(False, False)
+        self.transient(root)
+        # Closing the window would not stop the export
+        self.protocol('WM_DELETE_WINDOW', lambda: None)
+        
+        self.on_done = on_done
+        self.updates = queue.Queue()
+        
+        tk.Label(self, text=f"Exporting to {os.path.basename(export_file)}...",
+                 font=('Arial', 10)).pack(padx=20, pady=(15, 5))
+        self.progress_bar = ttk.Progressbar(self, length=300, mode='determinate', maximum=100)
+        self.progress_bar.pack(padx=20, pady=5)
+        self.count_var = tk.StringVar(value="Starting...")
+        tk.Label(self, textvariable=self.count_var, font=('Arial', 9)).pack(padx=20, pady=(0, 15))
+        
+        self.io_worker = io_worker
+        self.export_args = (file_manager, export_file, format_type, include_archive)
+        self.start_when_saved()
+    
+    def start_when_saved(self):
+        if self.io_worker is not None and self.io_worker.pending:
+            self.count_var.set("Waiting for changes to be saved...")
+            self.after(self.POLL_INTERVAL, self.start_when_saved)
+            return
+        self.count_var.set("Starting...")
+        worker = threading.Thread(target=self.run_export, args=self.export_args, daemon=True)
+        worker.start()
+        self.after(self.POLL_INTERVAL, self.poll)
+    
+    def run_export(self, file_manager, export_file, format_type, include_archive):
+        # Runs in the worker thread: no Tk calls here
+        success = file_manager.export_todos(export_file, format_type,
+                                            lambda done, total: self.updates.put((done, total)),
+                                            include_archive)
+        self.updates.put(success)
+    
+    def poll(self):
+        report = None
+        result = None
+        while True:
+            try:
+                item = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, bool):
+                result = item
+            else:
+                report = item
+        
+        if report is not None:
+            done, total = report
+            if total:
+                self.progress_bar['value'] = 100 * done / total
+                self.count_var.set(f"{done} of {total} tasks")
+            else:
+                # Total unknown: keep the bar moving
+                self.progress_bar.step(5)
+                self.count_var.set(f"{done} tasks")
+        
+        if result is None:
+            self.after(self.POLL_INTERVAL, self.poll)
+        else:
+            self.destroy()
+            self.on_done(result)
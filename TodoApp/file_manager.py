@@ -1,206 +1,1522 @@
+import heapq
 import os
-import shutil
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from search_index import SearchIndex
+from sort_index import SORT_KEYS, SortIndex, sort_key
+from todo_export import write_export
+from todo_record import (STATUS_LABELS, Priority, Status, Todo,
+                         parse_timestamp)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Suffix of the operation log kept next to the data file in 'log' storage mode
+LOG_SUFFIX = '.log'
+
+# Sidecar index files kept next to the data file, see index_files.py
+INDEX_SUFFIX = '.idx'
+SEARCH_SUFFIX = '.search'
+
+# Compressed archive of old completed todos kept next to the data file,
+# see archive_store.py
+ARCHIVE_SUFFIX = '.archive'
+
+# Lock file next to the data file, held by whichever process is changing it
+LOCK_SUFFIX = '.lock'
+
+# Trailer line of rewritten files: CRC32 of all bytes before it. Readers
+# that don't know it skip it like any other malformed line.
+CHECKSUM_PREFIX = '#crc32 '
+
+def _new_id() -> str:
+    """Generate a short unique ID for a todo"""
+    return uuid.uuid4().hex[:12]
+
+def _looks_like_timestamp(value: str) -> bool:
+    """Cheap check for the YYYY-MM-DD HH:MM:SS layout"""
+    return len(value) == 19 and value[4:5] == '-'
+
+def _split_todo_line(line: str) -> Optional[List[Optional[str]]]:
+    """Split a data file line into [id, timestamp, priority, status, task].
+    
+    Lines are ID|TIMESTAMP|PRIORITY|STATUS|TASK. Lines written before IDs
+    existed (TIMESTAMP|PRIORITY|STATUS|TASK) get None as ID. Returns None
+    if the line has too few fields.
+    """
+    parts = line.split('|', 4)
+    if len(parts) == 5 and _looks_like_timestamp(parts[1]):
+        return parts
+    
+    parts = line.split('|', 3)
+    if len(parts) == 4:
+        return [None] + parts
+    return None
+
+def _todo_from_fields(fields: List[Optional[str]]) -> Optional[Todo]:
+    """Build a record from split line fields, or return None if a field is invalid"""
+    try:
+        return Todo(fields[0], parse_timestamp(fields[1]), Priority.parse(fields[2]),
+                    Status.parse(fields[3]), fields[4])
+    except ValueError:
+        return None
+
+def _parse_todo_line(line: str) -> Optional[Todo]:
+    """Parse one line of the data file, or return None if it is malformed.
+    
+    Lines written before IDs existed are returned with id None.
+    """
+    fields = _split_todo_line(line)
+    return _todo_from_fields(fields) if fields is not None else None
+
+def _format_todo_line(todo: Todo) -> str:
+    """Format a todo as a data file line"""
+    return f"{todo.id}|{todo.timestamp}|{todo.priority.label}|{todo.status.label}|{todo.task}\n"
+
+# Statistics key counting pending todos of each priority
+PRIORITY_STAT_KEYS = {
+    Priority.HIGH: 'high_priority',
+    Priority.MEDIUM: 'medium_priority',
+    Priority.LOW: 'low_priority'
+}
+
+def _count_todo(stats: Dict[str, int], todo: Todo, delta: int):
+    """Add (delta=1) or remove (delta=-1) one todo from statistics counters"""
+    stats['total'] += delta
+    if todo.status == Status.PENDING:
+        stats['pending'] += delta
+        stats[PRIORITY_STAT_KEYS[todo.priority]] += delta
+    else:
+        stats['completed'] += delta
+
+def _tally(todos: Iterable[Todo]) -> Dict[str, int]:
+    """Compute statistics counters in a single pass"""
+    stats = dict.fromkeys(['total', 'pending', 'completed'], 0)
+    stats.update(dict.fromkeys(PRIORITY_STAT_KEYS.values(), 0))
+    for todo in todos:
+        _count_todo(stats, todo, 1)
+    return stats
+
+def _fsync_directory(path: str):
+    """Make a rename inside path's directory durable (POSIX only)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Some file systems don't support syncing directories
+    finally:
+        os.close(fd)
+
+def _temp_path(path: str) -> str:
+    """Name for a temp file next to path that no other writer uses
+    
+    Open it with mode 'x' so a clash fails instead of sharing the file.
+    """
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+def _replace_file(temp_path: str, path: str):
+    """Atomically move an already synced temp file over path"""
+    os.replace(temp_path, path)
+    _fsync_directory(path)
+
+def _remove_completed(todos: Dict[str, Todo]) -> List[str]:
+    """Drop completed todos from a dictionary of todos by ID, returns their IDs"""
+    removed = [todo_id for todo_id, todo in todos.items() if todo.status == Status.COMPLETED]
+    for todo_id in removed:
+        del todos[todo_id]
+    return removed
+
+class _LogChanges:
+    """The entries of an operation log, grouped by todo
+    
+    Lets records streamed from the data file have the log applied one at
+    a time, so memory use depends on the length of the log rather than
+    on the size of the data file. With start only the entries from that
+    byte offset on are read, e.g. the ones another process appended.
+    """
+    
+    def __init__(self, log_file: str, start: int = 0):
+        self.entries = 0
+        # (entry number, 'S'/'T'/'D', value) for each todo the log changes
+        self.changes: Dict[str, List[Tuple[int, str, str]]] = {}
+        # Entry numbers of the clear-completed entries
+        self.clears: List[int] = []
+        # Todos added by the log with their entry number, in log order
+        self.added: Dict[str, Tuple[int, Todo]] = {}
+        
+        if os.path.exists(log_file):
+            self._read(log_file, start)
+    
+    def _read(self, log_file: str, start: int):
+        with open(log_file, 'r', encoding='utf-8') as file:
+            file.seek(start)
+            for line in file:
+                # A line without newline is a torn write from a crash
+                if not line.endswith('\n'):
+                    break
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                
+                self.entries += 1
+                op, _, rest = line.partition('|')
+                if op == 'A':
+                    todo = _parse_todo_line(rest)
+                    if todo is not None and todo.id is not None and todo.id not in self.added:
+                        self.added[todo.id] = (self.entries, todo)
+                elif op in ('S', 'T'):
+                    todo_id, _, value = rest.partition('|')
+                    if op == 'T' or value in STATUS_LABELS:
+                        self.changes.setdefault(todo_id, []).append((self.entries, op, value))
+                elif op == 'D':
+                    self.changes.setdefault(rest, []).append((self.entries, op, ''))
+                elif op == 'X':
+                    self.clears.append(self.entries)
+    
+    def apply(self, todo: Todo, since: int = 0) -> bool:
+        """Apply the entries after entry number since to todo
+        
+        Returns False if the todo was deleted by them.
+        """
+        if not self.clears and todo.id not in self.changes:
+            return True
+        
+        changes = [change for change in self.changes.get(todo.id, ()) if change[0] > since]
+        changes.extend((entry, 'X', '') for entry in self.clears if entry > since)
+        for _, op, value in sorted(changes):
+            if op == 'S':
+                todo.status = Status.parse(value)
+            elif op == 'T':
+                todo.task = value
+            elif op == 'D' or todo.status == Status.COMPLETED:
+                return False
+        return True
+    
+    def added_todos(self) -> Iterator[Todo]:
+        """Yield the todos added by the log that still exist at its end"""
+        for entry, todo in self.added.values():
+            if self.apply(todo, entry):
+                yield todo
 
 class TodoFileManager:
-    """Handles all file operations for the Todo app"""
+    """Handles all file operations for the Todo app
+    
+    In 'text' storage mode every change rewrites the data file. In 'log'
+    mode changes are appended to an operation log next to the data file
+    and folded back into it once the log reaches compact_threshold entries.
+    
+    Records are kept in a dictionary keyed by todo ID (in file order), so
+    the *_by_id methods find a todo in constant time. The index based
+    methods are kept for callers that still address todos by position.
     
-    def __init__(self, data_file: str = "todos.txt", backup_file: str = "todos_backup.txt"):
+    Several processes (e.g. two app windows) can use the same data file:
+    changes are made under an advisory lock on a lock file next to it,
+    and records another process appended are read without re-parsing
+    the whole file. poll_changes() tells a GUI when to refresh.
+    """
+    
+    def __init__(self, data_file: str = "todos.txt", backup_file: str = "todos_backup.txt",
+                 storage_mode: str = "text", compact_threshold: int = 1000,
+                 backup_retention: int = 10, archive_compression: str = 'zlib'):
         self.data_file = data_file
         self.backup_file = backup_file
+        self.storage_mode = storage_mode
+        self.compact_threshold = compact_threshold
+        self.backup_retention = backup_retention
+        self.archive_compression = archive_compression
+        
+        # Snapshot journal in the backup file, opened on first use
+        self._backup_store = None
+        # Archive of old completed todos, opened on first use
+        self._archive_store = None
+        
+        # Parsed records by ID, valid while the data file keeps the same signature
+        self._cache: Optional[Dict[str, Todo]] = None
+        self._cache_signature: Optional[Tuple] = None
+        
+        # Statistics counters for the cached records, updated on every change
+        self._stats: Dict[str, int] = _tally([])
+        
+        # Search index over the task texts, built on the first search
+        self._search_index: Optional[SearchIndex] = None
+        
+        # Sorted views of the cached records by sort order, built on first use
+        self._sort_indexes: Dict[str, SortIndex] = {}
+        
+        # Byte offset of each record's line in the data file. Records that
+        # only exist in the operation log have no entry.
+        self._offsets: Dict[str, int] = {}
+        
+        # Number of entries in the operation log that are not compacted yet
+        self._log_ops = 0
+        # Bumped whenever the data file is rewritten, so a running
+        # compaction knows its snapshot is stale
+        self._generation = 0
+        self._lock = threading.RLock()
+        # Nesting depth of _exclusive(); the lock file is held while > 0
+        self._lock_depth = 0
+        
+        # Data file and log the cache was read from, kept open (see _pin_files())
+        self._pinned = []
+        # Set when a reload picked up changes made by another process
+        self._external_change = False
+        # Data file signature at the last poll_changes() while nothing is
+        # cached. It starts as the signature at construction, so the first
+        # poll reports changes made after reads that filled no cache.
+        self._poll_signature: Optional[Tuple] = self._file_signature()
+        
+        # Operations collected by batch(), persisted together when it ends
+        self._batch_depth = 0
+        self._pending_ops: List[str] = []
+        self._compactor: Optional[threading.Thread] = None
+        
+        # Memory map of the data file used by read_page(), opened on first use
+        self._mapped = None
+        self._mapped_signature: Optional[Tuple] = None
+        
+        # Sidecar index files, loaded on first use when nothing is cached
+        self._line_index = None
+        self._search_postings = None
+    
+    @property
+    def log_file(self) -> str:
+        """Path of the operation log belonging to the data file"""
+        return self.data_file + LOG_SUFFIX
+    
+    def _file_signature(self) -> Optional[Tuple]:
+        """Return path, and inode, mtime and size of the data file and its log"""
+        signature = [self.data_file]
+        for path in (self.data_file, self.log_file):
+            try:
+                stat = os.stat(path)
+                signature.extend([stat.st_ino, stat.st_mtime_ns, stat.st_size])
+            except OSError:
+                signature.extend([None, None, None])
+        return tuple(signature)
+    
+    def _pin_files(self) -> Tuple:
+        """Keep the data file and log open and return their signature for the cache
+        
+        Files are only appended to or replaced by renaming a new file
+        over them. While a file is open its inode can't be reused, so a
+        file that still has the cached inode is the one the cache was
+        read from, maybe with lines appended.
+        """
+        if os.name == 'nt':
+            return self._file_signature()  # Open files can't be replaced there
+        handles = []
+        signature = [self.data_file]
+        for path in (self.data_file, self.log_file):
+            try:
+                handle = open(path, 'rb')
+            except OSError:
+                signature.extend([None, None, None])
+                continue
+            handles.append(handle)
+            stat = os.fstat(handle.fileno())
+            signature.extend([stat.st_ino, stat.st_mtime_ns, stat.st_size])
+        self._unpin_files()
+        self._pinned = handles
+        return tuple(signature)
+    
+    def _unpin_files(self):
+        for handle in self._pinned:
+            handle.close()
+        self._pinned = []
+    
+    @contextmanager
+    def _exclusive(self):
+        """Hold the thread lock and an exclusive lock on the data file's lock file
+        
+        Every read-modify-write of the data file or log runs inside, so
+        another process changing the same file waits for us instead of
+        overwriting our change, and we re-read its change before making
+        ours. Nested uses take the lock file only once. Without fcntl
+        (Windows) only the thread lock is taken.
+        """
+        with self._lock:
+            lock_file = None
+            if fcntl is not None and not self._lock_depth:
+                try:
+                    lock_file = open(self.data_file + LOCK_SUFFIX, 'a')
+                except OSError:
+                    pass  # Read-only directory: nothing can be written anyway
+                else:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if lock_file is not None:
+                    lock_file.close()  # releases the lock
+    
+    def _cache_is_current(self) -> bool:
+        return self._cache is not None and self._cache_signature == self._file_signature()
+    
+    def _load(self) -> Dict[str, Todo]:
+        """Return the cached records, re-parsing only if the file changed"""
+        with self._lock:
+            if self._cache is not None and self._cache_signature == self._file_signature():
+                return self._cache
+            
+            with self._exclusive():
+                signature = self._pin_files()
+                missing_ids = self._cache is not None and self._reload(signature)
+                if self._cache is None:
+                    todos, missing_ids = self._parse_file()
+                    self._cache = todos
+                    self._cache_signature = signature
+                    self._stats = _tally(todos.values())
+                    self._search_index = None
+                    self._sort_indexes = {}
+                    # Reads before the cache was filled saw the files as
+                    # they were at the last poll; report what changed since
+                    if signature != self._poll_signature:
+                        self._external_change = True
+                    self._poll_signature = signature
+                
+                # Give old-format lines a persistent ID, and fold a leftover
+                # log into the data file when we are not in log mode
+                if missing_ids or (self._log_ops and self.storage_mode != 'log'):
+                    self.write_todos(self._cache.values())
+            return self._cache
+    
+    def _reload(self, signature: Tuple) -> bool:
+        """Bring the cache up to date with changes another process made
+        
+        Data file and log are only ever appended to or replaced by a
+        rename, so if both keep their inode and only grew, just the new
+        lines are read. Otherwise the files are parsed again and compared
+        with the cache. The statistics and indexes are updated for the
+        todos that changed rather than rebuilt. Returns True if the
+        files had lines without ID, which still have to be written back.
+        """
+        todos = self._cache
+        appended = self._read_appended(signature)
+        if appended is not None:
+            removed, changed, added = appended
+            in_order = True
+        else:
+            todos, missing_ids = self._parse_file()
+            if missing_ids:
+                self._cache = todos
+                self._cache_signature = signature
+                self._stats = _tally(todos.values())
+                self._search_index = None
+                self._sort_indexes = {}
+                self._external_change = True
+                return True
+            old = self._cache
+            removed = [todo for todo_id, todo in old.items() if todo_id not in todos]
+            changed = [(old[todo_id], todo) for todo_id, todo in todos.items()
+                       if todo_id in old and old[todo_id] != todo]
+            added = [todo for todo_id, todo in todos.items() if todo_id not in old]
+            # The file order index only appends; old todos must keep their order
+            in_order = list(todos) == [todo_id for todo_id in old if todo_id in todos] + \
+                [todo.id for todo in added]
+        
+        self._cache = todos
+        self._cache_signature = signature
+        if not (removed or changed or added):
+            return False
+        self._external_change = True
+        
+        for todo in removed:
+            _count_todo(self._stats, todo, -1)
+        for old_todo, todo in changed:
+            _count_todo(self._stats, old_todo, -1)
+            _count_todo(self._stats, todo, 1)
+        for todo in added:
+            _count_todo(self._stats, todo, 1)
+        
+        # Many inserts cost more than rebuilding on next use
+        if not in_order or len(removed) + len(changed) + len(added) > len(todos) // 2:
+            self._search_index = None
+            self._sort_indexes = {}
+            return False
+        if self._search_index is not None:
+            for todo in removed:
+                self._search_index.remove(todo.id)
+            for todo in [todo for _, todo in changed] + added:
+                self._search_index.add(todo.id, todo.task)
+        for index in self._sort_indexes.values():
+            for todo in removed:
+                index.remove(todo.id)
+            for todo in [todo for _, todo in changed] + added:
+                index.add(todo)
+        return False
+    
+    def _read_appended(self, signature: Tuple
+                       ) -> Optional[Tuple[List[Todo], List[Tuple[Todo, Todo]], List[Todo]]]:
+        """Apply the lines appended to the data file or log since the cache was read
+        
+        Returns the removed todos, (old, new) pairs of changed todos and
+        the added todos, or None if the files were replaced, shrank or
+        have new lines without ID; then the cache is left untouched.
+        """
+        old = self._cache_signature
+        if old is None or old[0] != signature[0]:
+            return None
+        _, old_inode, old_mtime, old_size, old_log_inode, old_log_mtime, old_log_size = old
+        _, inode, mtime, size, log_inode, log_mtime, log_size = signature
+        
+        def grew(old_inode, old_mtime, old_size, inode, mtime, size) -> bool:
+            if (mtime, size) == (old_mtime, old_size):
+                return False
+            if inode is None or inode != old_inode or size <= old_size:
+                raise ValueError("replaced")
+            return True
+        
+        try:
+            data_grew = grew(old_inode, old_mtime, old_size, inode, mtime, size)
+            if old_log_inode is None:
+                log_start = 0
+                log_grew = log_inode is not None
+            else:
+                log_start = old_log_size
+                log_grew = grew(old_log_inode, old_log_mtime, old_log_size,
+                                log_inode, log_mtime, log_size)
+            # Log entries are replayed over the data file, not over lines
+            # added to it later
+            if data_grew and (log_grew or log_inode is not None):
+                return None
+            if data_grew:
+                new_lines = list(self._scan_data_file(start=old_size))
+            elif log_grew:
+                changes = _LogChanges(self.log_file, log_start)
+        except (OSError, ValueError, UnicodeDecodeError):
+            return None
+        
+        todos = self._cache
+        removed, changed, added = [], [], []
+        if data_grew:
+            if any(todo.id is None for _, todo in new_lines):
+                return None
+            for position, todo in new_lines:
+                if todo.id in todos:
+                    changed.append((todos[todo.id], todo))
+                else:
+                    added.append(todo)
+                todos[todo.id] = todo
+                self._offsets[todo.id] = position
+        elif log_grew:
+            touched = list(todos) if changes.clears else \
+                [todo_id for todo_id in changes.changes if todo_id in todos]
+            for todo_id in touched:
+                old_todo = todos[todo_id].copy()
+                if not changes.apply(todos[todo_id]):
+                    del todos[todo_id]
+                    self._offsets.pop(todo_id, None)
+                    removed.append(old_todo)
+                elif todos[todo_id] != old_todo:
+                    changed.append((old_todo, todos[todo_id]))
+            for todo in changes.added_todos():
+                if todo.id not in todos:
+                    todos[todo.id] = todo
+                    added.append(todo)
+            self._log_ops += changes.entries
+        return removed, changed, added
+    
+    def poll_changes(self) -> bool:
+        """Return True if another process changed the todos since the last call
+        
+        Costs one stat of the data file and its log when nothing changed.
+        Otherwise the cached records, statistics and indexes are brought
+        up to date (see _reload()), so the caller can simply query its
+        view again. The GUIs call this on a timer to pick up changes made
+        in other windows.
+        """
+        with self._lock:
+            if self._cache is None:
+                # Nothing cached to compare with, just watch the signature
+                signature = self._file_signature()
+                changed = signature != self._poll_signature
+                self._poll_signature = signature
+                return changed
+            self._load()
+            changed, self._external_change = self._external_change, False
+            return changed
+    
+    def _todo_at(self, index: int) -> Optional[Todo]:
+        """Return the cached record at a list position"""
+        todos = self._load()
+        if 0 <= index < len(todos):
+            return next(islice(todos.values(), index, None))
+        return None
+    
+    def _save(self, todos: Dict[str, Todo]) -> bool:
+        """Write records to disk and keep them as the new cache"""
+        # The indexes were already updated for this change, keep them
+        search_index, sort_indexes = self._search_index, self._sort_indexes
+        if not self.write_todos(todos.values()):
+            self.invalidate_cache()
+            return False
+        self._search_index, self._sort_indexes = search_index, sort_indexes
+        return True
+    
+    def _commit(self, todos: Dict[str, Todo], *operations: str) -> bool:
+        """Persist a change that was already applied to the cached records"""
+        if self._batch_depth:
+            self._pending_ops.extend(operations)
+            return True
+        if self.storage_mode == 'log':
+            return self._append_ops(list(operations))
+        return self._save(todos)
+    
+    def invalidate_cache(self):
+        """Force the next read to re-parse the data file"""
+        self._cache = None
+        self._cache_signature = None
+        self._unpin_files()
+        self._search_index = None
+        self._sort_indexes = {}
+    
+    def _write_records(self, path: str, todos: Iterable[Todo]) -> Dict[str, int]:
+        """Atomically write todos to path and return the byte offset of every line
+        
+        The lines go to a temp file in the same directory, followed by a
+        checksum trailer. The temp file is fsynced and renamed over path,
+        so a crash leaves either the old or the new file, never a mix.
+        """
+        offsets = {}
+        position = 0
+        checksum = 0
+        temp_path = _temp_path(path)
+        try:
+            with open(temp_path, 'xb') as file:
+                for todo in todos:
+                    line = _format_todo_line(todo).encode('utf-8')
+                    file.write(line)
+                    checksum = zlib.crc32(line, checksum)
+                    offsets[todo.id] = position
+                    position += len(line)
+                file.write(f"{CHECKSUM_PREFIX}{checksum:08x}\n".encode('ascii'))
+                file.flush()
+                os.fsync(file.fileno())
+            _replace_file(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return offsets
+    
+    def _backups(self):
+        """The snapshot journal kept in the backup file"""
+        if self._backup_store is None:
+            from backup_store import BackupStore
+            self._backup_store = BackupStore(self.backup_file, self.backup_retention)
+        return self._backup_store
     
     def create_backup(self) -> bool:
-        """Create a backup of the current todo file"""
+        """Add a snapshot of the current todos to the backup file
+        
+        Only the todos that changed since the previous snapshot are
+        written; the newest backup_retention snapshots are kept.
+        """
         try:
-            if os.path.exists(self.data_file):
-                shutil.copy2(self.data_file, self.backup_file)
-                return True
+            with self._exclusive():
+                self._backups().save(self._load().values())
+            return True
         except Exception as e:
             print(f"Backup failed: {e}")
-        return False
+            return False
     
-    def restore_backup(self) -> bool:
-        """Restore from backup file"""
+    def list_backups(self) -> List[Dict[str, object]]:
+        """List the backup snapshots, oldest first
+        
+        Each entry has 'index' (for restore_backup), 'created' and 'count'.
+        """
+        try:
+            return self._backups().snapshots()
+        except Exception as e:
+            print(f"Error reading backups: {e}")
+            return []
+    
+    def restore_backup(self, index: int = -1) -> bool:
+        """Restore the todos of a backup snapshot (default: the newest)"""
         try:
             if os.path.exists(self.backup_file):
-                shutil.copy2(self.backup_file, self.data_file)
-                return True
+                todos = self._backups().load(index)
+                return self.write_todos(todos)
         except Exception as e:
             print(f"Restore failed: {e}")
         return False
     
-    def read_todos(self) -> List[Dict[str, str]]:
-        """Read all todos from file and return as list of dictionaries"""
-        todos = []
+    def read_todos(self) -> List[Todo]:
+        """Read all todos from file and return them as a list of records"""
+        # Hand out copies so callers can't modify the cache behind our back
+        return [todo.copy() for todo in self._load().values()]
+    
+    def get_todo(self, todo_id: str) -> Optional[Todo]:
+        """Return a copy of the todo with the given ID, or None"""
+        todo = self._load().get(todo_id)
+        return todo.copy() if todo is not None else None
+    
+    def _mapped_file(self):
+        """Memory map of the data file, re-opened if the file changed"""
+        signature = self._file_signature()
+        if self._mapped is None or self._mapped_signature != signature:
+            from mapped_file import MappedTodoFile
+            self._close_mapped()
+            index = self._line_index_file()
+            self._mapped = MappedTodoFile(self.data_file, index.offsets if index is not None else None)
+            self._mapped_signature = signature
+        return self._mapped
+    
+    def _index_file(self, attribute: str, index_class):
+        """Load or refresh a sidecar index of the data file
+        
+        None if there is no data file or an operation log is pending,
+        since the index files only describe the data file.
+        """
+        if not os.path.exists(self.data_file) or os.path.exists(self.log_file):
+            return None
+        index = getattr(self, attribute)
+        try:
+            if index is None or index.data_file != self.data_file:
+                index = index_class.open(self.data_file)
+                setattr(self, attribute, index)
+            else:
+                index.refresh()
+            return index
+        except (OSError, ValueError) as e:
+            print(f"Error reading todo index: {e}")
+            return None
+    
+    def _line_index_file(self):
+        from index_files import LineIndex
+        return self._index_file('_line_index', LineIndex)
+    
+    def _search_postings_file(self):
+        from index_files import SearchPostings
+        return self._index_file('_search_postings', SearchPostings)
+    
+    def _close_mapped(self):
+        # Windows can't replace a file that is still mapped
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+            self._mapped_signature = None
+    
+    def read_page(self, start: int, count: int) -> List[Todo]:
+        """Return up to count todos starting at list position start
+        
+        If the records are not cached, the data file is memory-mapped and
+        only the lines of the page are decoded, so the first page of a
+        huge file shows up without parsing the rest of it. The line index
+        tells which lines those are when malformed lines come before them.
+        """
+        with self._lock:
+            if not self._cache_is_current():
+                try:
+                    index = self._line_index_file()
+                    if index is not None:
+                        mapped = self._mapped_file()
+                        page = [mapped[number] for number in index.record_lines(start, count)]
+                        # Old lines without IDs are migrated by a full load
+                        if all(todo is not None and todo.id is not None for todo in page):
+                            return page
+                except (OSError, ValueError) as e:
+                    print(f"Error mapping todo file: {e}")
+            return [todo.copy() for todo in islice(self._load().values(), start, start + count)]
+    
+    def get_offset(self, todo_id: str) -> Optional[int]:
+        """Return the byte offset of a todo's line in the data file.
+        
+        None if the todo is unknown or so far only exists in the log.
+        """
+        with self._lock:
+            self._load()
+            return self._offsets.get(todo_id)
+    
+    def _scan_data_file(self, keep: Optional[Callable[[List[Optional[str]]], bool]] = None,
+                        start: int = 0) -> Iterator[Tuple[int, Todo]]:
+        """Yield (byte offset, todo) for each record line of the data file
+        
+        keep gets the split fields of a line and can skip it before it is
+        parsed. Lines without an ID yield a todo whose id is None. Warns
+        if the checksum trailer does not match the lines before it. With
+        start, scanning begins at that line start and checksums are not
+        checked.
+        """
         if not os.path.exists(self.data_file):
-            return todos
+            return
+        
+        position = start
+        checksum = 0
+        with open(self.data_file, 'rb') as file:
+            file.seek(start)
+            for raw_line in file:
+                line = raw_line.decode('utf-8').strip()
+                if line.startswith(CHECKSUM_PREFIX):
+                    if not start and line[len(CHECKSUM_PREFIX):] != f"{checksum:08x}":
+                        print(f"Warning: checksum mismatch in {self.data_file}, "
+                              f"the file may be damaged")
+                elif line:
+                    fields = _split_todo_line(line)
+                    if fields is not None and (keep is None or keep(fields)):
+                        todo = _todo_from_fields(fields)
+                        if todo is not None:
+                            yield position, todo
+                checksum = zlib.crc32(raw_line, checksum)
+                position += len(raw_line)
+    
+    def _parse_file(self) -> Tuple[Dict[str, Todo], bool]:
+        """Parse the data file and replay the operation log over it.
+        
+        Returns the todos by ID and whether any line had no ID yet.
+        """
+        todos = {}
+        self._offsets = {}
+        missing_ids = False
         
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as file:
-                for line in file:
-                    line = line.strip()
-                    if line:
-                        parts = line.split('|', 3)
-                        if len(parts) == 4:
-                            todos.append({
-                                'timestamp': parts[0],
-                                'priority': parts[1],
-                                'status': parts[2],
-                                'task': parts[3]
-                            })
+            changes = _LogChanges(self.log_file)
+            for position, todo in self._scan_data_file():
+                if todo.id is None:
+                    todo.id = _new_id()
+                    missing_ids = True
+                else:
+                    changes.added.pop(todo.id, None)
+                if changes.apply(todo):
+                    todos[todo.id] = todo
+                    self._offsets[todo.id] = position
+            
+            for todo in changes.added_todos():
+                todos[todo.id] = todo
+            self._log_ops = changes.entries
         except Exception as e:
             print(f"Error reading todos: {e}")
         
-        return todos
+        return todos, missing_ids
+    
+    def iter_todos(self, filter: Optional[Callable[[Todo], bool]] = None,
+                   status: Optional[Union[Status, str]] = None,
+                   priority: Optional[Union[Priority, str]] = None) -> Iterator[Todo]:
+        """Yield the todos matching status, priority and filter one at a time
+        
+        filter is a function taking a Todo. If the records are not cached
+        they are streamed from the data file without being kept, and the
+        status and priority are compared on the raw line before it is
+        parsed, so memory use stays flat however large the file is.
+        """
+        status = Status.parse(status) if status is not None else None
+        priority = Priority.parse(priority) if priority is not None else None
+        
+        def matches(todo: Todo) -> bool:
+            return ((status is None or todo.status == status) and
+                    (priority is None or todo.priority == priority) and
+                    (filter is None or filter(todo)))
+        
+        with self._lock:
+            cached = list(self._cache.values()) if self._cache_is_current() else None
+        if cached is not None:
+            for todo in cached:
+                if matches(todo):
+                    yield todo.copy()
+            return
+        
+        changes = _LogChanges(self.log_file)
+        # Records read so far that a full load keeps, in list order
+        kept = 0
+        
+        def keep(fields: List[Optional[str]]) -> bool:
+            nonlocal kept
+            # The raw labels are only final if the log doesn't touch the todo
+            if fields[0] in changes.changes or fields[0] in changes.added:
+                return True
+            if ((status is None or fields[3] == status.label) and
+                    (priority is None or fields[2] == priority.label)):
+                return True
+            kept += 1
+            return False
+        
+        for _, todo in self._scan_data_file(keep):
+            if todo.id is None:
+                # An old line without an ID: a full load gives it the ID it
+                # keeps from now on, then carry on past the records yielded
+                with self._lock:
+                    rest = [todo.copy() for todo in islice(self._load().values(), kept, None)]
+                for todo in rest:
+                    if matches(todo):
+                        yield todo
+                return
+            changes.added.pop(todo.id, None)
+            if changes.apply(todo):
+                kept += 1
+                if matches(todo):
+                    yield todo
+        for todo in changes.added_todos():
+            if matches(todo):
+                yield todo
+    
+    def _append_ops(self, operations: List[str]) -> bool:
+        """Append records to the operation log with a single write"""
+        with self._exclusive():
+            try:
+                with open(self.log_file, 'a', encoding='utf-8') as file:
+                    file.write(''.join(operation + '\n' for operation in operations))
+                    file.flush()
+                    os.fsync(file.fileno())
+            except Exception as e:
+                print(f"Error writing todo log: {e}")
+                self.invalidate_cache()
+                return False
+            
+            self._log_ops += len(operations)
+            self._cache_signature = self._pin_files()
+            
+            if self._log_ops >= self.compact_threshold:
+                self._start_compaction()
+            return True
+    
+    def _start_compaction(self):
+        """Run compact() in a background thread unless one is running"""
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(target=self.compact, daemon=True)
+            self._compactor.start()
     
-    def write_todos(self, todos: List[Dict[str, str]]) -> bool:
-        """Write todos to file"""
+    def compact(self) -> bool:
+        """Fold the operation log back into the data file"""
+        with self._exclusive():
+            if not self._log_ops:
+                return True
+            todos = [todo.copy() for todo in self._load().values()]
+            generation = self._generation
+            data_file = self.data_file
+            log_file = self.log_file
+            signature = self._cache_signature
+            log_size = signature[6] or 0
+        
+        # Write the snapshot without holding the lock so edits can continue.
+        # Its name is unique, so processes compacting at once don't collide
+        temp_file = _temp_path(data_file)
         try:
-            # Create backup before writing
-            self.create_backup()
+            offsets = self._write_records(temp_file, todos)
             
-            with open(self.data_file, 'w', encoding='utf-8') as file:
-                for todo in todos:
-                    line = f"{todo['timestamp']}|{todo['priority']}|{todo['status']}|{todo['task']}\n"
-                    file.write(line)
+            with self._exclusive():
+                # Give up if this or another process rewrote the files meanwhile
+                current = self._file_signature()
+                if (self._generation != generation or self.data_file != data_file or
+                        current[1:4] != signature[1:4] or current[4] != signature[4]):
+                    return False
+                # Pick up entries other processes appended, they stay in the log
+                self._load()
+                
+                # Entries appended while we were writing stay in the log
+                with open(log_file, 'r', encoding='utf-8') as file:
+                    file.seek(log_size)
+                    tail = file.read()
+                
+                self._close_mapped()
+                _replace_file(temp_file, data_file)
+                if tail:
+                    with open(temp_file, 'x', encoding='utf-8') as file:
+                        file.write(tail)
+                        file.flush()
+                        os.fsync(file.fileno())
+                    _replace_file(temp_file, log_file)
+                else:
+                    os.remove(log_file)
+                
+                self._offsets = offsets
+                if not tail:
+                    self._update_line_index(todos)
+                self._log_ops = tail.count('\n')
+                self._generation += 1
+                self._cache_signature = self._pin_files()
             return True
         except Exception as e:
-            print(f"Error writing todos: {e}")
+            print(f"Compaction failed: {e}")
             return False
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    
+    def write_todos(self, todos: Iterable[Union[Todo, Dict[str, str]]]) -> bool:
+        """Write todos (records or dictionaries of data file fields) to file"""
+        with self._exclusive():
+            try:
+                records = {}
+                for todo in todos:
+                    todo = Todo.from_dict(todo)
+                    if todo.id is None:
+                        todo.id = _new_id()
+                    records[todo.id] = todo
+                self._close_mapped()
+                self._offsets = self._write_records(self.data_file, records.values())
+                self._update_line_index(records.values())
+                
+                # The data file now holds everything the log described
+                if os.path.exists(self.log_file):
+                    os.remove(self.log_file)
+                self._log_ops = 0
+                self._generation += 1
+                
+                self._cache = records
+                self._cache_signature = self._pin_files()
+                self._stats = _tally(records.values())
+                self._search_index = None
+                self._sort_indexes = {}
+                return True
+            except Exception as e:
+                print(f"Error writing todos: {e}")
+                return False
     
-    def add_todo(self, task: str, priority: str = "Medium") -> bool:
+    def _update_line_index(self, todos: Iterable[Todo]):
+        """Rewrite the line index after the data file was rewritten from todos
+        
+        Only done when the index file is in use, it is cheap to build from
+        records that are already in memory.
+        """
+        if os.path.exists(self.data_file + INDEX_SUFFIX):
+            from index_files import LineIndex
+            try:
+                self._line_index = LineIndex.from_records(self.data_file, todos, self._offsets)
+            except OSError as e:
+                print(f"Error saving todo index: {e}")
+                self._line_index = None
+    
+    def add_todo(self, task: str, priority: Union[Priority, str] = "Medium") -> bool:
         """Add a new todo to the file"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        todo_line = f"{timestamp}|{priority}|Pending|{task}\n"
+        try:
+            priority = Priority.parse(priority)
+        except ValueError as e:
+            print(f"Error adding todo: {e}")
+            return False
+        todo = Todo(_new_id(), datetime.now().replace(microsecond=0), priority, Status.PENDING, task)
         
+        with self._exclusive():
+            if not self._append_records([todo]):
+                return False
+            if self._search_index is not None:
+                self._search_index.add(todo.id, task)
+            for index in self._sort_indexes.values():
+                index.add(todo)
+            return True
+    
+    def _append_records(self, new: List[Todo]) -> bool:
+        """Persist new todos with a single append and add them to the cache
+        
+        In text mode the lines go to the end of the data file, otherwise
+        to the operation log (or the open batch). The caller updates the
+        search and sort indexes.
+        """
+        todos = self._load()
+        lines = [_format_todo_line(todo) for todo in new]
+        if self._batch_depth or self.storage_mode == 'log':
+            operations = ['A|' + line.rstrip('\n') for line in lines]
+            if self._batch_depth:
+                self._pending_ops.extend(operations)
+            elif not self._append_ops(operations):
+                return False
+        else:
+            try:
+                offset = os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
+                with open(self.data_file, 'a', encoding='utf-8', newline='\n') as file:
+                    file.write(''.join(lines))
+                    file.flush()
+                    os.fsync(file.fileno())
+            except Exception as e:
+                print(f"Error adding todo: {e}")
+                self.invalidate_cache()
+                return False
+            for todo, line in zip(new, lines):
+                self._offsets[todo.id] = offset
+                offset += len(line.encode('utf-8'))
+            self._cache_signature = self._pin_files()
+        
+        for todo in new:
+            todos[todo.id] = todo
+            _count_todo(self._stats, todo, 1)
+        return True
+    
+    def _import_keys(self) -> Tuple[Set[str], Set[Tuple[datetime, str]]]:
+        """IDs and (created, task) pairs of the existing todos, for deduplication"""
+        todos = self._load()
+        return set(todos), {(todo.created, todo.task) for todo in todos.values()}
+    
+    def import_todos(self, import_file: str, format_type: str = "txt") -> Optional[Dict[str, int]]:
+        """Add the todos of a 'txt', 'csv', 'ndjson' or 'json' file in one write
+        
+        txt files hold data file lines or one task per line; the other
+        formats are read like export_todos() writes them. Rows are parsed
+        and validated in batches. Rows with an ID or a creation time and
+        task that is already in the list (or earlier in the file) are
+        skipped as duplicates. Returns the number of todos 'added' and
+        rows skipped as 'duplicates' or 'invalid', or None if the import
+        failed, in which case nothing was added.
+        """
+        from todo_import import read_import
+        report = {'added': 0, 'duplicates': 0, 'invalid': 0}
+        new = []
+        with self._exclusive():
+            try:
+                ids, keys = self._import_keys()
+                for todos, invalid in read_import(import_file, format_type):
+                    report['invalid'] += invalid
+                    for todo in todos:
+                        key = (todo.created, todo.task)
+                        if todo.id in ids or key in keys:
+                            report['duplicates'] += 1
+                            continue
+                        if todo.id is None:
+                            todo.id = _new_id()
+                        ids.add(todo.id)
+                        keys.add(key)
+                        new.append(todo)
+            except Exception as e:
+                print(f"Import failed: {e}")
+                return None
+            
+            if new:
+                if not self._append_records(new):
+                    return None
+                # Cheaper to rebuild on next use than to insert many todos one by one
+                self._search_index = None
+                self._sort_indexes = {}
+            report['added'] = len(new)
+            return report
+    
+    @contextmanager
+    def batch(self):
+        """Group changes into one durable write
+        
+        Inside the with block changes only update the cached records. When
+        the outermost block ends they are written with one file rewrite
+        (or one log append). If the block raises, the changes
+        are dropped. Raises IOError if the final write fails.
+        """
+        with self._exclusive():
+            self._load()
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._pending_ops = []
+                    self.invalidate_cache()
+                raise
+            
+            self._batch_depth -= 1
+            if not self._batch_depth and not self._flush_batch():
+                raise IOError("Failed to save the batch of changes")
+    
+    def _flush_batch(self) -> bool:
+        operations, self._pending_ops = self._pending_ops, []
+        if not operations:
+            return True
+        if self.storage_mode == 'log':
+            return self._append_ops(operations)
+        return self._save(self._load())
+    
+    def apply_batch(self, operations: Iterable[Tuple]) -> bool:
+        """Apply many changes with a single write
+        
+        Each operation is a tuple: ('add', task, priority),
+        ('status', todo_id, status), ('task', todo_id, task),
+        ('delete', todo_id) or ('clear_completed',).
+        """
+        handlers = {
+            'add': self.add_todo,
+            'status': self.update_todo_status_by_id,
+            'task': self.update_todo_task_by_id,
+            'delete': self.delete_todo_by_id,
+            'clear_completed': self.clear_completed
+        }
         try:
-            with open(self.data_file, 'a', encoding='utf-8') as file:
-                file.write(todo_line)
+            with self.batch():
+                for name, *args in operations:
+                    handlers[name](*args)
             return True
         except Exception as e:
-            print(f"Error adding todo: {e}")
+            print(f"Batch failed: {e}")
+            return False
+    
+    def update_todo_status_by_id(self, todo_id: str, new_status: Union[Status, str]) -> bool:
+        """Update the status of the todo with the given ID"""
+        try:
+            new_status = Status.parse(new_status)
+        except ValueError as e:
+            print(f"Error updating todo: {e}")
+            return False
+        with self._exclusive():
+            todos = self._load()
+            if todo_id in todos:
+                _count_todo(self._stats, todos[todo_id], -1)
+                todos[todo_id].status = new_status
+                _count_todo(self._stats, todos[todo_id], 1)
+                for index in self._sort_indexes.values():
+                    index.add(todos[todo_id])
+                return self._commit(todos, f"S|{todo_id}|{new_status.label}")
+            return False
+    
+    def update_todo_task_by_id(self, todo_id: str, new_task: str) -> bool:
+        """Update the task text of the todo with the given ID"""
+        with self._exclusive():
+            todos = self._load()
+            if todo_id in todos:
+                todos[todo_id].task = new_task
+                if self._search_index is not None:
+                    self._search_index.add(todo_id, new_task)
+                return self._commit(todos, f"T|{todo_id}|{new_task}")
             return False
     
-    def update_todo_status(self, index: int, new_status: str) -> bool:
+    def delete_todo_by_id(self, todo_id: str) -> bool:
+        """Delete the todo with the given ID"""
+        with self._exclusive():
+            todos = self._load()
+            if todo_id in todos:
+                _count_todo(self._stats, todos.pop(todo_id), -1)
+                self._offsets.pop(todo_id, None)
+                if self._search_index is not None:
+                    self._search_index.remove(todo_id)
+                for index in self._sort_indexes.values():
+                    index.remove(todo_id)
+                return self._commit(todos, f"D|{todo_id}")
+            return False
+    
+    def update_todo_status(self, index: int, new_status: Union[Status, str]) -> bool:
         """Update the status of a specific todo"""
-        todos = self.read_todos()
-        if 0 <= index < len(todos):
-            todos[index]['status'] = new_status
-            return self.write_todos(todos)
-        return False
+        with self._exclusive():
+            todo = self._todo_at(index)
+            return todo is not None and self.update_todo_status_by_id(todo.id, new_status)
     
     def update_todo_task(self, index: int, new_task: str) -> bool:
         """Update the task text of a specific todo"""
-        todos = self.read_todos()
-        if 0 <= index < len(todos):
-            todos[index]['task'] = new_task
-            return self.write_todos(todos)
-        return False
+        with self._exclusive():
+            todo = self._todo_at(index)
+            return todo is not None and self.update_todo_task_by_id(todo.id, new_task)
     
     def delete_todo(self, index: int) -> bool:
         """Delete a specific todo"""
-        todos = self.read_todos()
-        if 0 <= index < len(todos):
-            todos.pop(index)
-            return self.write_todos(todos)
-        return False
+        with self._exclusive():
+            todo = self._todo_at(index)
+            return todo is not None and self.delete_todo_by_id(todo.id)
     
     def clear_completed(self) -> bool:
         """Remove all completed todos"""
-        todos = self.read_todos()
-        todos = [todo for todo in todos if todo['status'] != 'Completed']
-        return self.write_todos(todos)
-    
-    def get_statistics(self) -> Dict[str, int]:
-        """Get statistics about todos"""
-        todos = self.read_todos()
-        stats = {
-            'total': len(todos),
-            'pending': len([t for t in todos if t['status'] == 'Pending']),
-            'completed': len([t for t in todos if t['status'] == 'Completed']),
-            'high_priority': len([t for t in todos if t['priority'] == 'High' and t['status'] == 'Pending']),
-            'medium_priority': len([t for t in todos if t['priority'] == 'Medium' and t['status'] == 'Pending']),
-            'low_priority': len([t for t in todos if t['priority'] == 'Low' and t['status'] == 'Pending'])
-        }
-        return stats
+        with self._exclusive():
+            todos = self._load()
+            for todo_id in _remove_completed(todos):
+                if self._search_index is not None:
+                    self._search_index.remove(todo_id)
+            for index in self._sort_indexes.values():
+                index.remove_status(Status.COMPLETED)
+            self._stats['total'] -= self._stats['completed']
+            self._stats['completed'] = 0
+            return self._commit(todos, "X")
     
-    def search_todos(self, search_term: str) -> List[Dict[str, str]]:
-        """Search for todos containing the search term"""
-        todos = self.read_todos()
-        return [todo for todo in todos if search_term.lower() in todo['task'].lower()]
+    def _archive(self):
+        """The archive of old completed todos kept next to the data file"""
+        path = self.data_file + ARCHIVE_SUFFIX
+        if self._archive_store is None or self._archive_store.path != path:
+            from archive_store import ArchiveStore
+            self._archive_store = ArchiveStore(path, self.archive_compression)
+        return self._archive_store
     
-    def export_todos(self, export_file: str, format_type: str = "txt") -> bool:
-        """Export todos to different formats"""
-        todos = self.read_todos()
+    def archive_completed(self, older_than_days: int = 30) -> Optional[int]:
+        """Move completed todos created more than older_than_days ago to the archive
         
+        Unlike clear_completed() the todos are kept, compressed, in an
+        append-only archive file next to the data file, so the data file
+        stays small while search_archive() and the include_archive
+        options of get_statistics() and export_todos() can still reach
+        them. Returns the number of todos archived, or None on failure.
+        """
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        with self._exclusive():
+            try:
+                # Select from the loaded records: loading gives old-format
+                # lines the IDs they are removed by below
+                self._load()
+                old = list(self.iter_todos(lambda todo: todo.created < cutoff, Status.COMPLETED))
+                if not old:
+                    return 0
+                # Archived first: a crash in between can only archive todos twice
+                self._archive().append(old)
+            except Exception as e:
+                print(f"Archiving failed: {e}")
+                return None
+            if not self._remove_todos([todo.id for todo in old]):
+                return None
+            return len(old)
+    
+    def _remove_todos(self, todo_ids: List[str]) -> bool:
+        """Delete many todos with one write"""
+        todos = self._load()
+        for todo_id in todo_ids:
+            if todo_id in todos:
+                _count_todo(self._stats, todos.pop(todo_id), -1)
+                self._offsets.pop(todo_id, None)
+        # Cheaper to rebuild on next use than to remove many todos one by one
+        self._search_index = None
+        self._sort_indexes = {}
+        return self._commit(todos, *(f"D|{todo_id}" for todo_id in todo_ids))
+    
+    def search_archive(self, search_term: str) -> List[Todo]:
+        """Search the archived todos for every word of the search term
+        
+        The archive is decompressed one block at a time, so this is
+        slower than search_todos() and meant to be run on demand.
+        """
         try:
-            if format_type.lower() == "txt":
-                with open(export_file, 'w', encoding='utf-8') as file:
-                    file.write("=== TODO LIST EXPORT ===\n")
-                    file.write(f"Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                    
-                    pending = [t for t in todos if t['status'] == 'Pending']
-                    completed = [t for t in todos if t['status'] == 'Completed']
-                    
-                    if pending:
-                        file.write("PENDING TASKS:\n")
-                        file.write("-" * 50 + "\n")
-                        for i, todo in enumerate(pending, 1):
-                            file.write(f"{i}. [{todo['priority']}] {todo['task']} (Created: {todo['timestamp']})\n")
-                    
-                    if completed:
-                        file.write("\nCOMPLETED TASKS:\n")
-                        file.write("-" * 50 + "\n")
-                        for i, todo in enumerate(completed, 1):
-                            file.write(f"{i}. [{todo['priority']}] {todo['task']} (Created: {todo['timestamp']})\n")
-            
-            elif format_type.lower() == "csv":
-                import csv
-                with open(export_file, 'w', newline='', encoding='utf-8') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(['Timestamp', 'Priority', 'Status', 'Task'])
-                    for todo in todos:
-                        writer.writerow([todo['timestamp'], todo['priority'], todo['status'], todo['task']])
+            with self._lock:
+                archive = self._archive()
+            return archive.search(search_term)
+        except Exception as e:
+            print(f"Error reading archive: {e}")
+            return []
+    
+    def _add_archived(self, stats: Dict[str, int]):
+        """Count the archived todos, which are all completed, into statistics counters"""
+        try:
+            archived = self._archive().count()
+        except Exception as e:
+            print(f"Error reading archive: {e}")
+            archived = 0
+        stats['archived'] = archived
+        stats['total'] += archived
+        stats['completed'] += archived
+    
+    def get_statistics(self, include_archive: bool = False) -> Dict[str, int]:
+        """Get statistics about todos
+        
+        With include_archive the archived todos are counted as well, and
+        'archived' holds how many there are.
+        """
+        with self._lock:
+            if self._cache_is_current():
+                stats = dict(self._stats)
+            else:
+                index = self._line_index_file()
+                stats = index.statistics() if index is not None else None
+        if stats is None:
+            stats = _tally(self.iter_todos())
+        if include_archive:
+            self._add_archived(stats)
+        return stats
+    
+    def verify_statistics(self) -> bool:
+        """Recount the statistics in one pass and compare with get_statistics()
+        
+        Returns False (and resets the counters) if they had drifted.
+        """
+        with self._lock:
+            expected = _tally(self._load().values())
+            actual = self.get_statistics()
+            if actual != expected:
+                print(f"Statistics drifted: {actual} != {expected}")
+                self._stats = expected
+                return False
+            return True
+    
+    def search_todos(self, search_term: str) -> List[Todo]:
+        """Search for todos containing every word of the search term"""
+        with self._lock:
+            if not self._cache_is_current():
+                # Answer from the postings file instead of loading the list
+                postings = self._search_postings_file()
+                if postings is not None:
+                    mapped = self._mapped_file()
+                    todos = [mapped[number] for number in
+                             postings.search(search_term, lambda number: mapped.fields(number)[4])]
+                    todos = [todo for todo in todos if todo is not None]
+                    if all(todo.id is not None for todo in todos):
+                        return todos
+                
+                words = search_term.lower().split()
+                return list(self.iter_todos(lambda todo: all(word in todo.task.lower() for word in words)))
+            todos = self._load()
+            return [todos[todo_id].copy() for todo_id in self._search_ids(search_term)]
+    
+    def _search_ids(self, search_term: str) -> List[str]:
+        """IDs of the cached todos matching search_term, in list order"""
+        todos = self._load()
+        if self._search_index is None:
+            self._search_index = SearchIndex(
+                (todo_id, todo.task) for todo_id, todo in todos.items()
+            )
+        return self._search_index.search(search_term)
+    
+    def _sort_index(self, sort: str) -> SortIndex:
+        index = self._sort_indexes.get(sort)
+        if index is None:
+            index = self._sort_indexes[sort] = SortIndex(sort, self._load().values())
+        return index
+    
+    def sorted_todos(self, sort: str = 'priority', status: Optional[Union[Status, str]] = None,
+                     priority: Optional[Union[Priority, str]] = None,
+                     limit: Optional[int] = None, reverse: bool = False) -> List[Todo]:
+        """Return the todos in a sort order, or only the first limit of them
+        
+        sort is 'file' (the list order), 'priority' (most urgent, then
+        oldest first) or 'created' (oldest first). The orders are indexes
+        kept up to date on every change, so a call doesn't sort;
+        sorted_todos('created', 'Pending', 'High', limit=10) returns the
+        ten oldest high priority pending todos.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        status = Status.parse(status) if status is not None else None
+        priority = Priority.parse(priority) if priority is not None else None
+        
+        with self._lock:
+            if self._cache_is_current() or limit is None:
+                todos = self._load()
+                ids = self._sort_index(sort).page(status, priority, 0, limit, reverse)
+                return [todos[todo_id].copy() for todo_id in ids]
+        
+        # Top k without loading the list: one streaming pass through a heap
+        # of k. The list position breaks ties like the index sequence does.
+        key = sort_key(sort)
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        top = select(limit, enumerate(self.iter_todos(status=status, priority=priority)),
+                     key=lambda item: (key(item[1]), item[0]))
+        return [todo for _, todo in top]
+    
+    def query(self, search: str = '', status: Optional[Union[Status, str]] = None,
+              priority: Optional[Union[Priority, str]] = None, sort: str = 'file',
+              offset: int = 0, limit: Optional[int] = None,
+              reverse: bool = False) -> Tuple[List[Todo], int]:
+        """Return one page of the matching todos and the number of matches
+        
+        Todos match if they contain every word of search and have the
+        given status and priority. The page is limit todos starting at
+        offset in the sort order (see sorted_todos()). Pages and counts
+        are slices and lengths of the sort index, so the cost depends on
+        the page size (plus the number of matches when searching), not on
+        the size of the list. If nothing is cached, pages in file order
+        are read through the line index file instead of loading the list.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        status = Status.parse(status) if status is not None else None
+        priority = Priority.parse(priority) if priority is not None else None
+        
+        with self._lock:
+            if not self._cache_is_current() and not search.strip() and sort == 'file' and not reverse:
+                result = self._query_line_index(status, priority, offset, limit)
+                if result is not None:
+                    return result
             
+            todos = self._load()
+            index = self._sort_index(sort)
+            if search.strip():
+                ids = [todo_id for todo_id in self._search_ids(search)
+                       if (status is None or todos[todo_id].status == status) and
+                       (priority is None or todos[todo_id].priority == priority)]
+                total = len(ids)
+                ids = index.order(ids, reverse)[offset:None if limit is None else offset + limit]
+            else:
+                total = index.count(status, priority)
+                ids = index.page(status, priority, offset, limit, reverse)
+            return [todos[todo_id].copy() for todo_id in ids], total
+    
+    def _query_line_index(self, status: Optional[Status], priority: Optional[Priority],
+                          offset: int, limit: Optional[int]) -> Optional[Tuple[List[Todo], int]]:
+        """query() in file order answered from the line index and the mapped file
+        
+        None if there is no usable index file.
+        """
+        index = self._line_index_file()
+        if index is None:
+            return None
+        try:
+            mapped = self._mapped_file()
+            end = None if limit is None else offset + limit
+            page = [mapped[number] for number in islice(index.matching_lines(status, priority), offset, end)]
+        except (OSError, ValueError) as e:
+            print(f"Error mapping todo file: {e}")
+            return None
+        # Old lines without IDs are migrated by a full load
+        if not all(todo is not None and todo.id is not None for todo in page):
+            return None
+        return page, index.count(status, priority)
+    
+    def export_todos(self, export_file: str, format_type: str = "txt",
+                     progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                     include_archive: bool = False) -> bool:
+        """Export todos as 'txt', 'csv', 'ndjson' or 'json'
+        
+        The todos are streamed in one pass and written in large chunks, so
+        memory use doesn't grow with the list. progress, if given, is
+        called with (todos written, total) as the export goes on; it runs
+        in the exporting thread. With include_archive the archived todos
+        follow the current ones.
+        """
+        # Total for the progress reports, if it is known without a pass of its own
+        with self._lock:
+            if self._cache_is_current():
+                total = len(self._cache)
+            else:
+                index = self._line_index_file()
+                total = index.count() if index is not None else None
+        try:
+            todos = self.iter_todos()
+            if include_archive:
+                archive = self._archive()
+                todos = chain(todos, archive.iter_todos())
+                total = total + archive.count() if total is not None else None
+            write_export(todos, export_file, format_type, total, progress)
             return True
         except Exception as e:
             print(f"Export failed: {e}")
             return False
 
-def validate_todo_file(file_path: str) -> bool:
-    """Validate the structure of a todo file"""
+def create_file_manager(settings: Dict) -> TodoFileManager:
+    """Create the file manager selected by settings['storage_mode']
+    
+    settings is normally APP_CONFIG. 'sqlite' stores the todos in
+    settings['database_file'] and imports the text data file the first
+    time the database is created.
+    """
+    storage_mode = settings.get('storage_mode', 'text')
+    if storage_mode == 'sqlite':
+        from sqlite_manager import SQLiteTodoManager
+        return SQLiteTodoManager(
+            settings.get('database_file', 'todos.db'),
+            settings['backup_file'],
+            migrate_from=settings['data_file'],
+            backup_retention=settings.get('backup_retention', 10),
+            archive_compression=settings.get('archive_compression', 'zlib')
+        )
+    return TodoFileManager(
+        settings['data_file'],
+        settings['backup_file'],
+        storage_mode,
+        settings.get('log_compact_threshold', 1000),
+        settings.get('backup_retention', 10),
+        settings.get('archive_compression', 'zlib')
+    )
+
+def validate_todo_file(file_path: str, processes: Optional[int] = None) -> bool:
+    """Validate the structure of a todo file, printing every problem found
+    
+    See todo_validation.find_invalid_lines() for the checks; large files
+    are validated by several processes.
+    """
     if not os.path.exists(file_path):
         return True  # Empty file is valid
     
+    from todo_validation import find_invalid_lines
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line_num, line in enumerate(file, 1):
-                line = line.strip()
-                if line:
-                    parts = line.split('|', 3)
-                    if len(parts) != 4:
-                        print(f"Invalid format at line {line_num}: {line}")
-                        return False
-                    
-                    # Validate timestamp format
-                    try:
-                        datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S")
-                    except ValueError:
-                        print(f"Invalid timestamp at line {line_num}: {parts[0]}")
-                        return False
-                    
-                    # Validate priority
-                    if parts[1] not in ['High', 'Medium', 'Low']:
-                        print(f"Invalid priority at line {line_num}: {parts[1]}")
-                        return False
-                    
-                    # Validate status
-                    if parts[2] not in ['Pending', 'Completed']:
-                        print(f"Invalid status at line {line_num}: {parts[2]}")
-                        return False
-        
-        return True
+        errors = find_invalid_lines(file_path, processes)
     except Exception as e:
         print(f"File validation error: {e}")
-        return False
\ No newline at end of file
+        return False
+    
+    for line_num, problem, text in errors:
+        print(f"Invalid {problem} at line {line_num}: {text}")
+    return not errors
@@ -0,0 +1,323 @@
+import json
+import os
+import sys
+from array import array
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from file_manager import (INDEX_SUFFIX, PRIORITY_STAT_KEYS, SEARCH_SUFFIX,
+                          _split_todo_line, _todo_from_fields)
+from search_index import MAX_GRAM, _grams
+from todo_record import Priority, Status, Todo
+
+# Last bytes of the indexed part of the data file, kept in the header to
+# check that a data file that grew was only appended to
+TAIL_SIZE = 64
+
+# First bytes of lines that are not records (blank lines, checksum trailer)
+SKIPPED_LINE_STARTS = (b'', b'\n', b'\r', b'#')
+
+def _set_bit(bitmap: bytearray, number: int):
+    byte = number >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(byte + 1 - len(bitmap)))
+    bitmap[byte] |= 1 << (number & 7)
+
+def _bitmap_int(bitmap: bytearray) -> int:
+    return int.from_bytes(bitmap, 'little')
+
+def _set_bits(value: int) -> Iterator[int]:
+    """Positions of the set bits of value, lowest first"""
+    for byte_number, byte in enumerate(value.to_bytes((value.bit_length() + 7) // 8, 'little')):
+        if byte:
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield byte_number * 8 + bit
+
+class _IndexFile:
+    """Base for index files kept next to a data file
+    
+    Record lines are numbered like MappedTodoFile numbers them. The header
+    stores the size, mtime and last bytes of the data file that were
+    indexed. The index is current while size and mtime match. If the data
+    file grew and its old tail is unchanged just the new lines are
+    indexed, otherwise the index is rebuilt: a file of the same size with
+    a new mtime may have been edited in place.
+    """
+    
+    SUFFIX = ''
+    VERSION = 1
+    
+    def __init__(self, data_file: str):
+        self.data_file = data_file
+        self.path = data_file + self.SUFFIX
+        self._reset()
+    
+    def _reset(self):
+        self.lines = 0
+        self.size = 0
+        self.mtime_ns = None
+        self.tail = b''
+    
+    @classmethod
+    def open(cls, data_file: str):
+        """Load the index of data_file, updating and saving it if it is stale"""
+        index = cls(data_file)
+        try:
+            index._load()
+        except (OSError, ValueError, KeyError):
+            index._reset()
+        index.refresh()
+        return index
+    
+    def refresh(self) -> bool:
+        """Bring the index up to date with the data file, returns True if it changed"""
+        stat = os.stat(self.data_file)
+        if stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+            return False
+        
+        if not self._only_appended(stat.st_size):
+            self._reset()
+        self._scan(self.size)
+        self.mtime_ns = stat.st_mtime_ns
+        try:
+            self.save()
+        except OSError as e:
+            print(f"Error saving {self.path}: {e}")
+        return True
+    
+    def _only_appended(self, size: int) -> bool:
+        if self.size == 0:
+            return True
+        if size <= self.size:
+            return False
+        with open(self.data_file, 'rb') as file:
+            file.seek(self.size - len(self.tail))
+            return file.read(len(self.tail)) == self.tail
+    
+    def _scan(self, position: int):
+        """Index the record lines from byte position to the end of the data file"""
+        with open(self.data_file, 'rb') as file:
+            file.seek(position)
+            for raw_line in file:
+                if raw_line[:1] not in SKIPPED_LINE_STARTS:
+                    fields = _split_todo_line(raw_line.decode('utf-8').strip())
+                    todo = _todo_from_fields(fields) if fields is not None else None
+                    self._add_line(self.lines, position, todo)
+                    self.lines += 1
+                position += len(raw_line)
+            self._set_end(file, position)
+    
+    def _set_end(self, file, size: int):
+        file.seek(max(0, size - TAIL_SIZE))
+        self.tail = file.read(min(size, TAIL_SIZE))
+        self.size = size
+    
+    def _add_line(self, number: int, position: int, todo: Optional[Todo]):
+        raise NotImplementedError
+    
+    def _sections(self) -> Dict[str, bytes]:
+        raise NotImplementedError
+    
+    def _restore(self, header: Dict, sections: Dict[str, bytes]):
+        raise NotImplementedError
+    
+    def _header(self) -> Dict:
+        return {}
+    
+    def save(self):
+        """Write the index file (a cache, so no fsync)"""
+        sections = self._sections()
+        header = dict(self._header(), version=self.VERSION, byteorder=sys.byteorder,
+                      lines=self.lines, size=self.size, mtime_ns=self.mtime_ns,
+                      tail=self.tail.hex(),
+                      sections=[[name, len(data)] for name, data in sections.items()])
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(json.dumps(header).encode('utf-8') + b'\n')
+            for data in sections.values():
+                file.write(data)
+        os.replace(temp_path, self.path)
+    
+    def _load(self):
+        with open(self.path, 'rb') as file:
+            header = json.loads(file.readline())
+            if header['version'] != self.VERSION or header['byteorder'] != sys.byteorder:
+                raise ValueError("index written by another version")
+            sections = {}
+            for name, length in header['sections']:
+                sections[name] = file.read(length)
+                if len(sections[name]) != length:
+                    raise ValueError("truncated index file")
+        
+        self._restore(header, sections)
+        self.lines = header['lines']
+        self.size = header['size']
+        self.mtime_ns = header['mtime_ns']
+        self.tail = bytes.fromhex(header['tail'])
+
+class LineIndex(_IndexFile):
+    """Line offsets and status/priority bitmaps of a data file
+    
+    Bit n of each bitmap describes record line n, so statistics are a few
+    popcounts and lines with a given status or priority can be found
+    without reading the data file.
+    """
+    
+    SUFFIX = INDEX_SUFFIX
+    
+    def _reset(self):
+        super()._reset()
+        self.offsets = array('q')
+        # Lines that parse as a todo, and of those the completed ones
+        self.valid = bytearray()
+        self.completed = bytearray()
+        self.priorities = {priority: bytearray() for priority in Priority}
+    
+    @classmethod
+    def from_records(cls, data_file: str, todos: Iterable[Todo], offsets: Dict[str, int]):
+        """Build and save the index of a data file that was just written from todos"""
+        index = cls(data_file)
+        for number, todo in enumerate(todos):
+            index._add_line(number, offsets[todo.id], todo)
+            index.lines += 1
+        with open(data_file, 'rb') as file:
+            index._set_end(file, os.fstat(file.fileno()).st_size)
+        index.mtime_ns = os.stat(data_file).st_mtime_ns
+        index.save()
+        return index
+    
+    def _add_line(self, number: int, position: int, todo: Optional[Todo]):
+        self.offsets.append(position)
+        if todo is not None:
+            _set_bit(self.valid, number)
+            _set_bit(self.priorities[todo.priority], number)
+            if todo.status == Status.COMPLETED:
+                _set_bit(self.completed, number)
+    
+    def _sections(self) -> Dict[str, bytes]:
+        sections = {'offsets': self.offsets.tobytes(), 'valid': bytes(self.valid),
+                    'completed': bytes(self.completed)}
+        for priority, bitmap in self.priorities.items():
+            sections[priority.name] = bytes(bitmap)
+        return sections
+    
+    def _restore(self, header: Dict, sections: Dict[str, bytes]):
+        self._reset()
+        self.offsets.frombytes(sections['offsets'])
+        self.valid = bytearray(sections['valid'])
+        self.completed = bytearray(sections['completed'])
+        self.priorities = {priority: bytearray(sections[priority.name]) for priority in Priority}
+        if len(self.offsets) != header['lines']:
+            raise ValueError("offsets don't match the line count")
+    
+    def _mask(self, status: Optional[Status], priority: Optional[Priority]) -> int:
+        mask = _bitmap_int(self.valid)
+        if status == Status.COMPLETED:
+            mask &= _bitmap_int(self.completed)
+        elif status == Status.PENDING:
+            mask &= ~_bitmap_int(self.completed)
+        if priority is not None:
+            mask &= _bitmap_int(self.priorities[priority])
+        return mask
+    
+    def count(self, status: Optional[Status] = None, priority: Optional[Priority] = None) -> int:
+        """Number of todos with the given status and priority"""
+        return bin(self._mask(status, priority)).count('1')
+    
+    def matching_lines(self, status: Optional[Status] = None,
+                       priority: Optional[Priority] = None) -> Iterator[int]:
+        """Numbers of the record lines with the given status and priority"""
+        return _set_bits(self._mask(status, priority))
+    
+    def record_lines(self, start: int, count: int) -> List[int]:
+        """Numbers of the lines of the todos at list positions start to start + count
+        
+        Malformed lines hold no todo, so they take no list position.
+        """
+        if self.count() == self.lines:
+            return list(range(start, min(start + count, self.lines)))
+        return list(islice(self.matching_lines(), start, start + count))
+    
+    def statistics(self) -> Dict[str, int]:
+        """The counters get_statistics() returns"""
+        stats = {
+            'total': self.count(),
+            'pending': self.count(Status.PENDING),
+            'completed': self.count(Status.COMPLETED)
+        }
+        for priority, key in PRIORITY_STAT_KEYS.items():
+            stats[key] = self.count(Status.PENDING, priority)
+        return stats
+
+class SearchPostings(_IndexFile):
+    """N-gram postings of the task texts of a data file, by line number
+    
+    The same 1 to MAX_GRAM character n-grams as SearchIndex, mapped to
+    the numbers of the record lines containing them.
+    """
+    
+    SUFFIX = SEARCH_SUFFIX
+    
+    def _reset(self):
+        super()._reset()
+        self.postings: Dict[str, array] = {}
+    
+    def _add_line(self, number: int, position: int, todo: Optional[Todo]):
+        if todo is not None:
+            for gram in _grams(todo.task.lower()):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('I')
+                posting.append(number)
+    
+    def _header(self) -> Dict:
+        return {'grams': {gram: len(posting) for gram, posting in self.postings.items()}}
+    
+    def _sections(self) -> Dict[str, bytes]:
+        return {'postings': b''.join(posting.tobytes() for posting in self.postings.values())}
+    
+    def _restore(self, header: Dict, sections: Dict[str, bytes]):
+        self._reset()
+        numbers = array('I')
+        numbers.frombytes(sections['postings'])
+        start = 0
+        for gram, count in header['grams'].items():
+            self.postings[gram] = numbers[start:start + count]
+            start += count
+        if start != len(numbers):
+            raise ValueError("postings don't match the gram counts")
+    
+    def _match_word(self, word: str, task_at: Callable[[int], str]) -> Set[int]:
+        if len(word) <= MAX_GRAM:
+            return set(self.postings.get(word, ()))
+        
+        posting_lists = []
+        for start in range(len(word) - MAX_GRAM + 1):
+            posting = self.postings.get(word[start:start + MAX_GRAM])
+            if not posting:
+                return set()
+            posting_lists.append(posting)
+        posting_lists.sort(key=len)
+        
+        candidates = set(posting_lists[0])
+        for posting in posting_lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return {number for number in candidates if word in task_at(number).lower()}
+    
+    def search(self, query: str, task_at: Callable[[int], str]) -> List[int]:
+        """Line numbers of the todos containing every word of query, in file order
+        
+        task_at returns the task text of a line, used to check words
+        longer than MAX_GRAM.
+        """
+        words = query.lower().split()
+        matches = None
+        for word in sorted(words, key=lambda w: len(self.postings.get(w[:MAX_GRAM], ()))):
+            numbers = self._match_word(word, task_at)
+            matches = numbers if matches is None else matches & numbers
+            if not matches:
+                return []
+        return sorted(matches) if matches is not None else list(range(self.lines))
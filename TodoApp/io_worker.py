@@ -0,0 +1,176 @@
+import queue
+import threading
+import tkinter as tk
+from datetime import datetime
+from itertools import count
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from todo_record import Priority, Status, Todo
+
+# Prefix of the IDs of new todos shown before add_todo() has saved them
+PROVISIONAL_PREFIX = 'unsaved-'
+_provisional_numbers = count(1)
+
+def provisional_todo(task: str, priority: Union[Priority, str]) -> Todo:
+    """A new todo to show right away, until add_todo() has saved it
+    
+    It has an ID of its own that the file never sees: the saved todo gets
+    its real ID from add_todo(), and the GUIs swap the two once no more
+    writes are queued.
+    """
+    return Todo(f"{PROVISIONAL_PREFIX}{next(_provisional_numbers)}",
+                datetime.now().replace(microsecond=0), Priority.parse(priority),
+                Status.PENDING, task)
+
+def is_provisional(todo_id: str) -> bool:
+    """Whether todo_id belongs to a todo from provisional_todo()"""
+    return todo_id.startswith(PROVISIONAL_PREFIX)
+
+class IOWorker:
+    """Runs file manager calls one after another in a background thread
+    
+    GUIs change their own view of the list right away, queue the call
+    that makes the change durable with submit() and carry on; the calls
+    run in the order they were queued, so later changes see earlier
+    ones. A call fails if it raises or returns False or None, which is
+    how the file manager reports errors. The thread makes no Tk calls:
+    take_finished() is called from the Tk main loop (SaveStatusLabel
+    does this) and runs the on_done callbacks there.
+    
+    While writes are queued, the GUIs queue their reads with fetch()
+    too: run on the Tk thread, a read would wait for the file manager's
+    lock, which a running write holds until the file is synced.
+    """
+    
+    def __init__(self):
+        self._commands = queue.Queue()
+        self._finished = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._reads = 0
+        
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+    
+    def submit(self, description: str, function: Callable, *args,
+               on_done: Optional[Callable[[bool], None]] = None):
+        """Queue function(*args); on_done gets whether it succeeded"""
+        with self._lock:
+            self._pending += 1
+        self._commands.put((description, function, args, on_done))
+    
+    def fetch(self, function: Callable, *args, on_result: Callable[[Any], None]):
+        """Queue the read function(*args) behind the writes queued so far
+        
+        on_result gets its result, or None if it raised. Reads don't
+        count as pending.
+        """
+        with self._lock:
+            self._reads += 1
+        self._commands.put((None, function, args, on_result))
+    
+    @property
+    def pending(self) -> int:
+        """Number of queued or running calls not yet reported by take_finished()"""
+        with self._lock:
+            return self._pending
+    
+    @property
+    def busy(self) -> bool:
+        """Whether any queued write or read is not yet reported by take_finished()"""
+        with self._lock:
+            return bool(self._pending or self._reads)
+    
+    def take_finished(self) -> List[Tuple[str, bool]]:
+        """Return (description, succeeded) of the calls finished since the last time
+        
+        Their on_done callbacks are run first, in the calling thread, as
+        are the on_result callbacks of finished reads. A callback that
+        raises is reported and doesn't stop the others.
+        """
+        finished = []
+        while True:
+            try:
+                description, outcome, callback = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            if description is None:
+                # A read: outcome is its result
+                with self._lock:
+                    self._reads -= 1
+                self._call(callback, outcome, "Showing a read")
+                continue
+            with self._lock:
+                self._pending -= 1
+            if callback is not None:
+                self._call(callback, outcome, f"Finishing '{description}'")
+            finished.append((description, outcome))
+        return finished
+    
+    @staticmethod
+    def _call(callback: Callable[[Any], None], value: Any, action: str):
+        try:
+            callback(value)
+        except Exception as e:
+            print(f"{action} failed: {e}")
+    
+    def _run(self):
+        while True:
+            description, function, args, callback = self._commands.get()
+            if description is None:
+                try:
+                    result = function(*args)
+                except Exception as e:
+                    print(f"Reading failed: {e}")
+                    result = None
+                self._finished.put((None, result, callback))
+                continue
+            try:
+                result = function(*args)
+                ok = result is not None and result is not False
+            except Exception as e:
+                print(f"{description} failed: {e}")
+                ok = False
+            self._finished.put((description, ok, callback))
+
+
+class SaveStatusLabel(tk.Label):
+    """Status bar label showing whether the writes queued on an IOWorker are saved
+    
+    Call track() after submitting or fetching; the label then polls the
+    worker from the main loop until it is no longer busy.
+    """
+    
+    # Milliseconds between two looks at the worker
+    POLL_INTERVAL = 100
+    
+    def __init__(self, parent, io_worker: IOWorker, **options):
+        super().__init__(parent, **options)
+        self.io_worker = io_worker
+        self.polling = False
+        self.failed: Optional[str] = None
+        self.default_fg = self.cget('fg')
+    
+    def track(self):
+        self.show_status()
+        if not self.polling:
+            self.polling = True
+            self.after(self.POLL_INTERVAL, self.poll)
+    
+    def poll(self):
+        for description, ok in self.io_worker.take_finished():
+            self.failed = None if ok else description
+        self.show_status()
+        if self.io_worker.busy:
+            self.after(self.POLL_INTERVAL, self.poll)
+        else:
+            self.polling = False
+    
+    def show_status(self):
+        pending = self.io_worker.pending
+        if pending:
+            self.config(text=f"💾 Saving ({pending})...", fg=self.default_fg)
+        elif self.failed:
+            self.config(text=f"⚠ Not saved: {self.failed}", fg='#D32F2F')
+        else:
+            self.config(text="✔ Saved", fg=self.default_fg)
@@ -0,0 +1,71 @@
+import mmap
+import os
+from array import array
+from typing import List, Optional, Union
+
+from file_manager import CHECKSUM_PREFIX, _split_todo_line, _todo_from_fields
+
+class MappedTodoFile:
+    """Read-only memory map of a data file with a line offset index
+    
+    Opening the file is a single scan for line breaks that records where
+    each record line starts. Lines are only decoded and parsed when they
+    are asked for, so the first page of a very large file can be shown
+    without touching the rest of it. Blank lines and the checksum trailer
+    are not indexed; malformed lines are, and read as None.
+    """
+    
+    def __init__(self, path: str, starts: Optional[array] = None):
+        self.path = path
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = b''  # mmap can't map an empty file
+        # starts can come from a LineIndex so the file needn't be scanned
+        self._starts = starts if starts is not None else self._index_lines()
+    
+    def _index_lines(self) -> array:
+        starts = array('q')
+        data = self._map
+        size = len(data)
+        skip = (ord('\n'), ord('\r'), ord(CHECKSUM_PREFIX[0]))
+        position = 0
+        while position < size:
+            end = data.find(b'\n', position)
+            if end == -1:
+                end = size
+            if data[position] not in skip:
+                starts.append(position)
+            position = end + 1
+        return starts
+    
+    def __len__(self) -> int:
+        return len(self._starts)
+    
+    def offset(self, index: int) -> int:
+        """Byte offset of a record line"""
+        return self._starts[index]
+    
+    def line(self, index: int) -> str:
+        """The decoded text of a record line"""
+        start = self._starts[index]
+        end = self._map.find(b'\n', start)
+        if end == -1:
+            end = len(self._map)
+        return self._map[start:end].decode('utf-8').strip()
+    
+    def fields(self, index: int) -> Optional[List[Optional[str]]]:
+        """The split fields of a record line, without parsing them"""
+        return _split_todo_line(self.line(index))
+    
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        fields = self.fields(index)
+        return _todo_from_fields(fields) if fields is not None else None
+    
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
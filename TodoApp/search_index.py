@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Longest n-gram kept in the index. Query words up to this length are
+# answered straight from one posting set; longer words intersect the
+# postings of their n-grams and are then checked against the text.
+MAX_GRAM = 3
+
+def _grams(text: str) -> Set[str]:
+    """All substrings of text with length 1 to MAX_GRAM"""
+    grams = set()
+    for size in range(1, MAX_GRAM + 1):
+        for start in range(len(text) - size + 1):
+            grams.add(text[start:start + size])
+    return grams
+
+class SearchIndex:
+    """Inverted n-gram index for case-insensitive substring search
+    
+    Maps every 1 to MAX_GRAM character substring of the lowercased task
+    text to the IDs of the todos containing it. A query is split into
+    words and a todo matches if it contains every word, so the cost
+    depends on the size of the posting sets rather than on the number
+    of todos.
+    """
+    
+    def __init__(self, todos: Iterable[Tuple[str, str]] = ()):
+        self._postings: Dict[str, Set[str]] = {}
+        self._texts: Dict[str, str] = {}
+        # Insertion order, used to return matches in list order
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        
+        for todo_id, text in todos:
+            self.add(todo_id, text)
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+    
+    def add(self, todo_id: str, text: str):
+        """Index a todo, keeping its position if it was indexed before"""
+        if todo_id in self._texts:
+            self._unindex(todo_id)
+        else:
+            self._order[todo_id] = self._next_order
+            self._next_order += 1
+        
+        text = text.lower()
+        self._texts[todo_id] = text
+        for gram in _grams(text):
+            self._postings.setdefault(gram, set()).add(todo_id)
+    
+    def remove(self, todo_id: str):
+        """Remove a todo from the index"""
+        if todo_id in self._texts:
+            self._unindex(todo_id)
+            del self._texts[todo_id]
+            del self._order[todo_id]
+    
+    def _unindex(self, todo_id: str):
+        for gram in _grams(self._texts[todo_id]):
+            ids = self._postings[gram]
+            ids.discard(todo_id)
+            if not ids:
+                del self._postings[gram]
+    
+    def _match_word(self, word: str) -> Set[str]:
+        if len(word) <= MAX_GRAM:
+            return set(self._postings.get(word, ()))
+        
+        posting_sets = []
+        for start in range(len(word) - MAX_GRAM + 1):
+            ids = self._postings.get(word[start:start + MAX_GRAM])
+            if not ids:
+                return set()
+            posting_sets.append(ids)
+        posting_sets.sort(key=len)
+        
+        candidates = set(posting_sets[0])
+        for ids in posting_sets[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return {todo_id for todo_id in candidates if word in self._texts[todo_id]}
+    
+    def search(self, query: str) -> List[str]:
+        """Return IDs of todos containing every word of query, in list order"""
+        words = query.lower().split()
+        if not words:
+            return sorted(self._texts, key=self._order.__getitem__)
+        
+        # Start with the rarest word so the intersection stays small
+        matches = None
+        for word in sorted(words, key=lambda w: len(self._postings.get(w[:MAX_GRAM], ()))):
+            ids = self._match_word(word)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        return sorted(matches, key=self._order.__getitem__)
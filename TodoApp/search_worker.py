@@ -0,0 +1,82 @@
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+class SearchWorker:
+    """Runs searches in a background thread, newest request first
+    
+    submit() hands a request to the worker thread. A request that is
+    still waiting when the next one arrives is dropped, so the thread is
+    never more than one search behind the keyboard, and the result of a
+    search overtaken while it ran is thrown away. The thread makes no Tk
+    calls: the GUI collects the result of the newest request with
+    take_result() from its main loop.
+    """
+    
+    # Milliseconds between two looks for a result from the main loop
+    POLL_INTERVAL = 20
+    
+    def __init__(self, search: Callable[[Any], Any]):
+        self._search = search
+        self._condition = threading.Condition()
+        self._submitted = 0
+        # Number of the request whose result is wanted, None if none is
+        self._wanted: Optional[int] = None
+        self._waiting: Optional[Tuple[int, Any]] = None
+        self._done: Optional[Tuple[Any, Any, Optional[Exception]]] = None
+        
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+    
+    def submit(self, request: Any):
+        """Search for request, replacing any request not yet taken up"""
+        with self._condition:
+            self._submitted += 1
+            self._wanted = self._submitted
+            self._waiting = (self._submitted, request)
+            self._done = None
+            self._condition.notify()
+    
+    def cancel(self):
+        """Drop the waiting request and the result of the running one"""
+        with self._condition:
+            self._wanted = None
+            self._waiting = None
+            self._done = None
+    
+    @property
+    def pending(self) -> bool:
+        """Whether the result of the newest request is still to be taken"""
+        with self._condition:
+            return self._wanted is not None
+    
+    def take_result(self) -> Optional[Tuple[Any, Any]]:
+        """Return (request, result) of the newest request once, or None if not ready
+        
+        An exception raised by the search is raised here instead.
+        """
+        with self._condition:
+            if self._done is None:
+                return None
+            request, result, error = self._done
+            self._done = None
+            self._wanted = None
+        if error is not None:
+            raise error
+        return request, result
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._waiting is None:
+                    self._condition.wait()
+                number, request = self._waiting
+                self._waiting = None
+            
+            try:
+                result, error = self._search(request), None
+            except Exception as e:
+                result, error = None, e
+            
+            with self._condition:
+                if number == self._wanted:
+                    self._done = (request, result, error)
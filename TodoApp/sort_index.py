@@ -0,0 +1,137 @@
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from todo_record import Priority, Status, Todo
+
+# Todo attributes compared by the indexed orders. 'file' is the list
+# order; 'priority' is most urgent first, then oldest first; 'created' is
+# oldest first, with equal times in priority order.
+SORT_KEYS = {
+    'file': (),
+    'priority': ('priority', 'created'),
+    'created': ('created', 'priority')
+}
+
+# Sort choices offered by the GUIs: label -> (sort, reverse)
+SORT_CHOICES = {
+    'File order': ('file', False),
+    'Priority': ('priority', False),
+    'Oldest first': ('created', False),
+    'Newest first': ('created', True)
+}
+
+def sort_key(sort: str) -> Callable[[Todo], Tuple]:
+    """Function returning the sort key of a todo in the given order"""
+    names = SORT_KEYS[sort]
+    return lambda todo: tuple(getattr(todo, name) for name in names)
+
+def insert_position(todos: List[Todo], todo: Todo, sort: str, reverse: bool = False) -> int:
+    """Index at which a new todo goes into todos, a list in the given order
+    
+    A new todo comes after the todos with an equal key, or before them
+    in reverse order, like the newest entry of a SortIndex.
+    """
+    key = sort_key(sort)
+    new_key = key(todo)
+    for index, other in enumerate(todos):
+        if (key(other) <= new_key) if reverse else (key(other) > new_key):
+            return index
+    return len(todos)
+
+# Keys of the filtered views: (status, priority), None meaning any
+VIEWS = [(status, priority) for status in (None, *Status) for priority in (None, *Priority)]
+
+class SortIndex:
+    """Todo IDs kept in one sort order, as a sorted list per filtered view
+    
+    There is one list for every combination of status and priority
+    (either can be None for any), so each todo is in four lists. Entries
+    are (key..., sequence, todo_id) tuples: bisect finds the place of a
+    todo, and todos with equal keys keep the order they were indexed in.
+    New todos get the next sequence number, so the 'file' order is just
+    the sequence. Adding, removing or changing
+    a todo is a few binary searches and list inserts instead of a full
+    re-sort, and any page of any view is a slice of its list.
+    """
+    
+    def __init__(self, sort: str, todos: Iterable[Todo] = ()):
+        self.sort = sort
+        self._key = sort_key(sort)
+        # Entry, status and priority of every indexed todo
+        self._entries: Dict[str, Tuple[Tuple, Status, Priority]] = {}
+        self._views: Dict[Tuple, List[Tuple]] = {view: [] for view in VIEWS}
+        self._next_sequence = 0
+        
+        # Build with one sort per list rather than one insort per todo
+        for todo in todos:
+            entry = self._entry(todo, self._next_sequence)
+            self._next_sequence += 1
+            self._entries[todo.id] = (entry, todo.status, todo.priority)
+            for view in self._views_of(todo.status, todo.priority):
+                self._views[view].append(entry)
+        for entries in self._views.values():
+            entries.sort()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _entry(self, todo: Todo, sequence: int) -> Tuple:
+        return self._key(todo) + (sequence, todo.id)
+    
+    @staticmethod
+    def _views_of(status: Status, priority: Priority) -> List[Tuple]:
+        return [(None, None), (status, None), (None, priority), (status, priority)]
+    
+    def add(self, todo: Todo):
+        """Index a todo, or move it if its status or key changed"""
+        old = self._entries.get(todo.id)
+        if old is None:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+        else:
+            sequence = old[0][-2]
+            self._unindex(*old)
+        entry = self._entry(todo, sequence)
+        self._entries[todo.id] = (entry, todo.status, todo.priority)
+        for view in self._views_of(todo.status, todo.priority):
+            insort(self._views[view], entry)
+    
+    def remove(self, todo_id: str):
+        """Remove a todo from the index"""
+        old = self._entries.pop(todo_id, None)
+        if old is not None:
+            self._unindex(*old)
+    
+    def remove_status(self, status: Status):
+        """Remove every todo with the given status"""
+        for entry in self._views[(status, None)]:
+            del self._entries[entry[-1]]
+        for view, entries in self._views.items():
+            if view[0] == status:
+                self._views[view] = []
+            elif view[0] is None:
+                self._views[view] = [entry for entry in entries if entry[-1] in self._entries]
+    
+    def _unindex(self, entry: Tuple, status: Status, priority: Priority):
+        for view in self._views_of(status, priority):
+            entries = self._views[view]
+            del entries[bisect_left(entries, entry)]
+    
+    def count(self, status: Optional[Status] = None, priority: Optional[Priority] = None) -> int:
+        """Number of todos with the given status and priority"""
+        return len(self._views[(status, priority)])
+    
+    def page(self, status: Optional[Status] = None, priority: Optional[Priority] = None,
+             offset: int = 0, limit: Optional[int] = None, reverse: bool = False) -> List[str]:
+        """IDs of one page of the todos with the given status and priority, in sort order"""
+        entries = self._views[(status, priority)]
+        end = len(entries) if limit is None else offset + limit
+        if reverse:
+            entries = entries[max(0, len(entries) - end):max(0, len(entries) - offset)][::-1]
+        else:
+            entries = entries[offset:end]
+        return [entry[-1] for entry in entries]
+    
+    def order(self, todo_ids: Iterable[str], reverse: bool = False) -> List[str]:
+        """Sort some indexed IDs (like search matches) into this order"""
+        return sorted(todo_ids, key=lambda todo_id: self._entries[todo_id][0], reverse=reverse)
@@ -0,0 +1,347 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from file_manager import PRIORITY_STAT_KEYS, TodoFileManager, _new_id
+from todo_record import Priority, Status, Todo, parse_timestamp
+
+# Columns are selected in data file order everywhere below
+SELECT_TODOS = "SELECT id, timestamp, priority, status, task FROM todos"
+INSERT_TODO = ("INSERT OR REPLACE INTO todos (id, timestamp, priority, status, task) "
+               "VALUES (:id, :timestamp, :priority, :status, :task)")
+
+# Rows fetched at a time by iter_todos()
+FETCH_SIZE = 500
+
+# Priority labels ranked most urgent first, for ORDER BY
+PRIORITY_RANK = "(CASE priority WHEN 'High' THEN 0 WHEN 'Medium' THEN 1 ELSE 2 END)"
+
+# ORDER BY clauses of the sorted_todos() orders, ascending
+SORT_ORDERS = {
+    'file': ["seq"],
+    'priority': [PRIORITY_RANK, "timestamp", "seq"],
+    'created': ["timestamp", PRIORITY_RANK, "seq"]
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    status TEXT NOT NULL,
+    task TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_todos_status_priority ON todos (status, priority);
+CREATE INDEX IF NOT EXISTS idx_todos_priority ON todos (priority);
+CREATE INDEX IF NOT EXISTS idx_todos_timestamp ON todos (timestamp);
+CREATE INDEX IF NOT EXISTS idx_todos_priority_rank ON todos (""" + PRIORITY_RANK + """, timestamp);
+"""
+
+class SQLiteTodoManager(TodoFileManager):
+    """TodoFileManager that keeps the todos in a SQLite database
+    
+    Offers the same methods as TodoFileManager. Rows are ordered by an
+    autoincrement column so the list keeps insertion order. Backups use
+    the same snapshot journal as the text storage modes.
+    """
+    
+    def __init__(self, database_file: str = "todos.db", backup_file: str = "todos_backup.txt",
+                 migrate_from: Optional[str] = None, backup_retention: int = 10,
+                 archive_compression: str = 'zlib'):
+        super().__init__(database_file, backup_file, storage_mode='sqlite',
+                         backup_retention=backup_retention,
+                         archive_compression=archive_compression)
+        self.database_file = database_file
+        # data_version at the last poll_changes()
+        self._data_version: Optional[int] = None
+        
+        self._conn = sqlite3.connect(database_file, check_same_thread=False)
+        # SQLite's lower() and LIKE only fold ASCII; search folds case like
+        # the text storage modes do
+        self._conn.create_function("py_lower", 1, str.lower)
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+        
+        # user_version 0 means the database was just created
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            if migrate_from:
+                self.migrate_from_text(migrate_from)
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA user_version = 1")
+    
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+    
+    @contextmanager
+    def _exclusive(self):
+        # SQLite locks the database file itself
+        with self._lock:
+            yield
+    
+    def poll_changes(self) -> bool:
+        """Return True if another connection changed the database since the last call
+        
+        PRAGMA data_version only changes when another connection
+        commits, so our own changes are not reported.
+        """
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            changed = self._data_version is not None and version != self._data_version
+            self._data_version = version
+            return changed
+    
+    def migrate_from_text(self, text_file: str) -> int:
+        """Import todos from a text data file, returns how many were added"""
+        if not os.path.exists(text_file):
+            return 0
+        
+        # Parse through a text manager so an operation log is applied as
+        # well, without writing anything back to the text file
+        todos, _ = TodoFileManager(text_file, self.backup_file)._parse_file()
+        todos = [todo.to_dict() for todo in todos.values()]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(INSERT_TODO, todos)
+            return len(todos)
+        except sqlite3.Error as e:
+            print(f"Migration failed: {e}")
+            return 0
+    
+    def _rows_to_todos(self, rows) -> List[Todo]:
+        return [Todo(todo_id, parse_timestamp(timestamp), Priority.parse(priority),
+                     Status.parse(status), task)
+                for todo_id, timestamp, priority, status, task in rows]
+    
+    def _query(self, sql: str, params=()) -> List[Todo]:
+        with self._lock:
+            return self._rows_to_todos(self._conn.execute(sql, params).fetchall())
+    
+    def _execute(self, sql: str, params=()) -> int:
+        """Run one statement in its own transaction.
+        
+        Returns the number of changed rows, or -1 if the statement failed.
+        """
+        try:
+            with self._lock:
+                if self._batch_depth:
+                    # batch() commits or rolls back the whole transaction
+                    return self._conn.execute(sql, params).rowcount
+                with self._conn:
+                    return self._conn.execute(sql, params).rowcount
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return -1
+    
+    @contextmanager
+    def batch(self):
+        """Group changes into one database transaction"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._conn.rollback()
+                raise
+            
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                try:
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    raise IOError(f"Failed to save the batch of changes: {e}")
+    
+    def _load(self) -> Dict[str, Todo]:
+        return {todo.id: todo for todo in self.read_todos()}
+    
+    def _todo_at(self, index: int) -> Optional[Todo]:
+        if index < 0:
+            return None
+        rows = self._query(SELECT_TODOS + " ORDER BY seq LIMIT 1 OFFSET ?", (index,))
+        return rows[0] if rows else None
+    
+    def read_todos(self) -> List[Todo]:
+        return self._query(SELECT_TODOS + " ORDER BY seq")
+    
+    def _where(self, status: Optional[Union[Status, str]],
+               priority: Optional[Union[Priority, str]], search: str = '') -> Tuple[str, List[str]]:
+        # One substring test per search word on the lowercased task
+        conditions = []
+        params = []
+        for word in search.lower().split():
+            conditions.append("instr(py_lower(task), ?) > 0")
+            params.append(word)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(Status.parse(status).label)
+        if priority is not None:
+            conditions.append("priority = ?")
+            params.append(Priority.parse(priority).label)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+    
+    def iter_todos(self, filter: Optional[Callable[[Todo], bool]] = None,
+                   status: Optional[Union[Status, str]] = None,
+                   priority: Optional[Union[Priority, str]] = None) -> Iterator[Todo]:
+        """Yield matching todos, filtering status and priority in SQL"""
+        where, params = self._where(status, priority)
+        with self._lock:
+            cursor = self._conn.execute(SELECT_TODOS + where + " ORDER BY seq", params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                return
+            for todo in self._rows_to_todos(rows):
+                if filter is None or filter(todo):
+                    yield todo
+    
+    def _sorted_query(self, where: str, params: List[str], sort: str, offset: int,
+                      limit: Optional[int], reverse: bool) -> List[Todo]:
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        direction = " DESC" if reverse else ""
+        order = ", ".join(column + direction for column in SORT_ORDERS[sort])
+        # LIMIT -1 means no limit
+        return self._query(SELECT_TODOS + where + " ORDER BY " + order + " LIMIT ? OFFSET ?",
+                           params + [-1 if limit is None else limit, offset])
+    
+    def sorted_todos(self, sort: str = 'priority', status: Optional[Union[Status, str]] = None,
+                     priority: Optional[Union[Priority, str]] = None,
+                     limit: Optional[int] = None, reverse: bool = False) -> List[Todo]:
+        """Return the todos in a sort order, sorted and limited in SQL"""
+        where, params = self._where(status, priority)
+        return self._sorted_query(where, params, sort, 0, limit, reverse)
+    
+    def query(self, search: str = '', status: Optional[Union[Status, str]] = None,
+              priority: Optional[Union[Priority, str]] = None, sort: str = 'file',
+              offset: int = 0, limit: Optional[int] = None,
+              reverse: bool = False) -> Tuple[List[Todo], int]:
+        """Return one page of the matching todos and the number of matches, in SQL"""
+        where, params = self._where(status, priority, search)
+        page = self._sorted_query(where, params, sort, offset, limit, reverse)
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM todos" + where, params).fetchone()[0]
+        return page, total
+    
+    def read_page(self, start: int, count: int) -> List[Todo]:
+        return self._query(SELECT_TODOS + " ORDER BY seq LIMIT ? OFFSET ?", (count, start))
+    
+    def get_todo(self, todo_id: str) -> Optional[Todo]:
+        rows = self._query(SELECT_TODOS + " WHERE id = ?", (todo_id,))
+        return rows[0] if rows else None
+    
+    def get_offset(self, todo_id: str) -> Optional[int]:
+        return None  # Rows have no position in a text file
+    
+    def _line_index_file(self):
+        return None  # The database is not a text file to index
+    
+    def write_todos(self, todos: Iterable[Union[Todo, Dict[str, str]]]) -> bool:
+        """Replace all todos in one transaction"""
+        try:
+            records = []
+            for todo in todos:
+                record = Todo.from_dict(todo).to_dict()
+                record['id'] = record['id'] or _new_id()
+                records.append(record)
+            
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM todos")
+                self._conn.executemany(INSERT_TODO, records)
+            return True
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            print(f"Error writing todos: {e}")
+            return False
+    
+    def add_todo(self, task: str, priority: Union[Priority, str] = "Medium") -> bool:
+        try:
+            priority = Priority.parse(priority)
+        except ValueError as e:
+            print(f"Error adding todo: {e}")
+            return False
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return self._execute(
+            "INSERT INTO todos (id, timestamp, priority, status, task) VALUES (?, ?, ?, 'Pending', ?)",
+            (_new_id(), timestamp, priority.label, task)
+        ) > 0
+    
+    def _import_keys(self) -> Tuple[Set[str], Set[Tuple[datetime, str]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, timestamp, task FROM todos").fetchall()
+        return {row[0] for row in rows}, {(parse_timestamp(timestamp), task) for _, timestamp, task in rows}
+    
+    def _append_records(self, new: List[Todo]) -> bool:
+        """Insert new todos in one transaction"""
+        records = [todo.to_dict() for todo in new]
+        try:
+            with self._lock:
+                if self._batch_depth:
+                    self._conn.executemany(INSERT_TODO, records)
+                else:
+                    with self._conn:
+                        self._conn.executemany(INSERT_TODO, records)
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
+    
+    def update_todo_status_by_id(self, todo_id: str, new_status: Union[Status, str]) -> bool:
+        try:
+            new_status = Status.parse(new_status)
+        except ValueError as e:
+            print(f"Error updating todo: {e}")
+            return False
+        return self._execute("UPDATE todos SET status = ? WHERE id = ?", (new_status.label, todo_id)) > 0
+    
+    def update_todo_task_by_id(self, todo_id: str, new_task: str) -> bool:
+        return self._execute("UPDATE todos SET task = ? WHERE id = ?", (new_task, todo_id)) > 0
+    
+    def delete_todo_by_id(self, todo_id: str) -> bool:
+        return self._execute("DELETE FROM todos WHERE id = ?", (todo_id,)) > 0
+    
+    def clear_completed(self) -> bool:
+        return self._execute("DELETE FROM todos WHERE status = 'Completed'") >= 0
+    
+    def _remove_todos(self, todo_ids: List[str]) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM todos WHERE id = ?",
+                                       [(todo_id,) for todo_id in todo_ids])
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
+    
+    def get_statistics(self, include_archive: bool = False) -> Dict[str, int]:
+        stats = {
+            'total': 0,
+            'pending': 0,
+            'completed': 0,
+            'high_priority': 0,
+            'medium_priority': 0,
+            'low_priority': 0
+        }
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, priority, COUNT(*) FROM todos GROUP BY status, priority"
+            ).fetchall()
+        
+        for status, priority, count in rows:
+            stats['total'] += count
+            if Status.parse(status) == Status.PENDING:
+                stats['pending'] += count
+                stats[PRIORITY_STAT_KEYS[Priority.parse(priority)]] += count
+            else:
+                stats['completed'] += count
+        if include_archive:
+            self._add_archived(stats)
+        return stats
+    
+    def search_todos(self, search_term: str) -> List[Todo]:
+        where, params = self._where(None, None, search_term)
+        return self._query(SELECT_TODOS + where + " ORDER BY seq", params)
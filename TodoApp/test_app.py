@@ -128,12 +128,1751 @@ def test_file_manager():
         return False
     finally:
         # Clean up test files
-        for file in [temp_file, backup_file, export_file]:
+        for file in [temp_file, temp_file + ".lock", backup_file, export_file]:
             if os.path.exists(file):
                 os.remove(file)
                 
     return True
 
+def test_read_cache():
+    """Test that reads are served from the cache until the file changes"""
+    print("\n🧪 Testing read cache...")
+    
+    temp_file = "test_cache_todos.txt"
+    backup_file = "test_cache_todos_backup.txt"
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.add_todo("Cached task", "High")
+        fm.add_todo("Another task", "Low")
+        
+        # Count how often the file is actually parsed
+        parse_count = [0]
+        original_parse = fm._parse_file
+        def counting_parse():
+            parse_count[0] += 1
+            return original_parse()
+        fm._parse_file = counting_parse
+        
+        fm.invalidate_cache()
+        fm.read_todos()
+        fm.get_statistics()
+        fm.search_todos("task")
+        assert parse_count[0] == 1, f"Expected 1 parse, got {parse_count[0]}"
+        print("✅ Repeated reads reuse the cache")
+        
+        # Writes keep the cache up to date without re-parsing
+        assert fm.update_todo_status(0, "Completed") == True
+        fm.add_todo("Third task", "Medium")
+        todos = fm.read_todos()
+        assert parse_count[0] == 1
+        assert len(todos) == 3
+        assert todos[0]['status'] == "Completed"
+        print("✅ Writes update the cache in place")
+        
+        # Changing a returned dict must not leak into the cache
+        todos[0]['task'] = "Changed outside"
+        assert fm.read_todos()[0]['task'] == "Cached task"
+        print("✅ Returned todos are copies")
+        
+        # An external change to the file is picked up
+        with open(temp_file, 'a', encoding='utf-8') as f:
+            f.write("2024-10-24 10:30:15|Low|Pending|Written by someone else\n")
+        todos = fm.read_todos()
+        assert len(todos) == 4
+        assert parse_count[0] == 2
+        print("✅ External changes invalidate the cache")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_log_storage():
+    """Test the append-only log storage mode and compaction"""
+    print("\n🧪 Testing log storage mode...")
+    
+    temp_file = "test_log_todos.txt"
+    backup_file = "test_log_todos_backup.txt"
+    log_file = temp_file + ".log"
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file, storage_mode="log", compact_threshold=100)
+        fm.add_todo("First task", "High")
+        fm.add_todo("Second task", "Medium")
+        fm.add_todo("Third task", "Low")
+        assert fm.update_todo_status(0, "Completed") == True
+        assert fm.update_todo_task(1, "Second task | edited") == True
+        assert fm.delete_todo(2) == True
+        
+        # Every change is one appended line, the data file is untouched
+        with open(log_file, 'r', encoding='utf-8') as f:
+            assert len(f.readlines()) == 6
+        assert not os.path.exists(temp_file)
+        print("✅ Changes are appended to the log")
+        
+        # A fresh manager rebuilds the same state from the log
+        fresh = TodoFileManager(temp_file, backup_file, storage_mode="log")
+        todos = fresh.read_todos()
+        assert len(todos) == 2
+        assert todos[0]['status'] == "Completed"
+        assert todos[1]['task'] == "Second task | edited"
+        assert todos == fm.read_todos()
+        print("✅ State is rebuilt from the log")
+        
+        # Compaction folds the log into the data file
+        assert fm.compact() == True
+        assert not os.path.exists(log_file)
+        assert validate_todo_file(temp_file) == True
+        assert TodoFileManager(temp_file).read_todos() == todos
+        print("✅ Compaction writes a snapshot")
+        
+        # Passing the threshold compacts in the background
+        fm.compact_threshold = 5
+        for i in range(5):
+            fm.add_todo(f"Background {i}", "Low")
+        if fm._compactor is not None:
+            fm._compactor.join(5)
+        assert not os.path.exists(log_file)
+        assert len(TodoFileManager(temp_file).read_todos()) == 7
+        print("✅ Background compaction triggered by threshold")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file, log_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_record_ids():
+    """Test ID based access and the ID to offset index"""
+    print("\n🧪 Testing record IDs...")
+    
+    temp_file = "test_id_todos.txt"
+    backup_file = "test_id_todos_backup.txt"
+    
+    try:
+        # Old-format lines get a persistent ID on first load
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write("2024-10-24 10:30:15|High|Pending|Same task\n")
+            f.write("2024-10-24 10:30:15|High|Pending|Same task\n")
+            f.write("2024-10-24 11:45:22|Low|Pending|Other task\n")
+        
+        fm = TodoFileManager(temp_file, backup_file)
+        todos = fm.read_todos()
+        ids = [todo['id'] for todo in todos]
+        assert len(set(ids)) == 3, "IDs must be unique"
+        assert [todo['id'] for todo in TodoFileManager(temp_file).read_todos()] == ids
+        print("✅ Old-format lines get persistent IDs")
+        
+        # Duplicate rows are addressed independently
+        assert fm.update_todo_status_by_id(ids[1], "Completed") == True
+        todos = fm.read_todos()
+        assert todos[0]['status'] == "Pending"
+        assert todos[1]['status'] == "Completed"
+        assert fm.get_todo(ids[1])['status'] == "Completed"
+        assert fm.get_todo("missing") is None
+        assert fm.update_todo_task_by_id("missing", "x") == False
+        print("✅ Updates by ID hit the right duplicate")
+        
+        # Offsets point at the start of each record's line
+        fm.add_todo("Appended task", "Medium")
+        with open(temp_file, 'rb') as f:
+            for todo in fm.read_todos():
+                f.seek(fm.get_offset(todo['id']))
+                assert f.readline().decode('utf-8').startswith(todo['id'] + "|")
+        print("✅ Offsets index the data file")
+        
+        assert fm.delete_todo_by_id(ids[0]) == True
+        assert [todo['id'] for todo in fm.read_todos()][:2] == ids[1:]
+        assert fm.get_offset(ids[0]) is None
+        print("✅ Delete by ID works")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_sqlite_backend():
+    """Test the SQLite storage backend and the migration from text"""
+    print("\n🧪 Testing SQLite backend...")
+    
+    text_file = "test_sqlite_todos.txt"
+    database_file = "test_sqlite_todos.db"
+    backup_file = "test_sqlite_backup.txt"
+    settings = {
+        'storage_mode': 'sqlite',
+        'data_file': text_file,
+        'backup_file': backup_file,
+        'database_file': database_file
+    }
+    fm = None
+    
+    try:
+        from file_manager import create_file_manager
+        from sqlite_manager import SQLiteTodoManager
+        
+        with open(text_file, 'w', encoding='utf-8') as f:
+            f.write("2024-10-24 10:30:15|High|Pending|Migrated task\n")
+            f.write("2024-10-24 11:45:22|Low|Completed|Done already\n")
+        
+        fm = create_file_manager(settings)
+        assert isinstance(fm, SQLiteTodoManager)
+        todos = fm.read_todos()
+        assert [t['task'] for t in todos] == ["Migrated task", "Done already"]
+        print("✅ Text file migrated on first start")
+        
+        # Same API as the text backend
+        assert fm.add_todo("100% done_soon", "Medium") == True
+        assert fm.update_todo_status(0, "Completed") == True
+        assert fm.update_todo_task_by_id(todos[1]['id'], "Done for real") == True
+        assert fm.get_todo(todos[1]['id'])['task'] == "Done for real"
+        assert fm.delete_todo_by_id("missing") == False
+        assert len(fm.search_todos("100%")) == 1
+        assert len(fm.search_todos("o_n")) == 0
+        assert len(fm.search_todos("DONE")) == 2
+        stats = fm.get_statistics()
+        assert stats == {'total': 3, 'pending': 1, 'completed': 2,
+                         'high_priority': 0, 'medium_priority': 1, 'low_priority': 0}
+        assert len(list(fm.iter_todos(status="Completed"))) == 2
+        # Search folds the case of any letter, like the text backends
+        assert fm.add_todo("Ärger task", "Low") == True
+        assert [t.task for t in fm.search_todos("ärger")] == ["Ärger task"]
+        assert fm.query("ÄRGER")[1] == 1
+        assert fm.delete_todo_by_id(fm.search_todos("ärger")[0].id) == True
+        print("✅ CRUD, search and statistics work")
+        
+        # Backup and restore use the same snapshot journal as text mode
+        assert fm.create_backup() == True
+        assert len(fm.list_backups()) == 1
+        assert fm.clear_completed() == True
+        assert len(fm.read_todos()) == 1
+        assert fm.restore_backup() == True
+        assert len(fm.read_todos()) == 3
+        print("✅ Backup and restore working")
+        
+        # Reopening does not import the text file a second time
+        fm.close()
+        fm = create_file_manager(settings)
+        assert len(fm.read_todos()) == 3
+        print("✅ Migration only runs once")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        if fm is not None:
+            fm.close()
+        for file in [text_file, database_file, backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_statistics_counters():
+    """Test that the running statistics counters never drift"""
+    print("\n🧪 Testing statistics counters...")
+    
+    import random
+    temp_file = "test_stats_todos.txt"
+    backup_file = "test_stats_todos_backup.txt"
+    
+    try:
+        for storage_mode in ["text", "log"]:
+            fm = TodoFileManager(temp_file, backup_file, storage_mode=storage_mode)
+            rng = random.Random(42)
+            
+            for step in range(200):
+                todos = fm.read_todos()
+                action = rng.random()
+                if action < 0.4 or not todos:
+                    fm.add_todo(f"Task {step}", rng.choice(["High", "Medium", "Low"]))
+                elif action < 0.7:
+                    todo = rng.choice(todos)
+                    fm.update_todo_status_by_id(todo['id'], rng.choice(["Pending", "Completed"]))
+                elif action < 0.8:
+                    fm.update_todo_task_by_id(rng.choice(todos)['id'], f"Edited {step}")
+                elif action < 0.95:
+                    fm.delete_todo_by_id(rng.choice(todos)['id'])
+                else:
+                    fm.clear_completed()
+                assert fm.verify_statistics(), f"Counters drifted at step {step} ({storage_mode})"
+            
+            # A fresh manager counts the same from disk
+            assert TodoFileManager(temp_file, storage_mode=storage_mode).get_statistics() == fm.get_statistics()
+            print(f"✅ Counters stay exact in {storage_mode} mode")
+            
+            # Verification notices and repairs drift
+            fm._stats['pending'] += 1
+            assert fm.verify_statistics() == False
+            assert fm.verify_statistics() == True
+            
+            for file in [temp_file, temp_file + ".lock", backup_file, temp_file + ".log",
+                         temp_file + ".idx"]:
+                if os.path.exists(file):
+                    os.remove(file)
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file, temp_file + ".log", temp_file + ".idx"]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_search_index():
+    """Test the inverted index behind search_todos"""
+    print("\n🧪 Testing search index...")
+    
+    temp_file = "test_search_todos.txt"
+    backup_file = "test_search_todos_backup.txt"
+    
+    def brute_force(todos, query):
+        words = query.lower().split()
+        return [t['id'] for t in todos if all(w in t['task'].lower() for w in words)]
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file)
+        for task in ["Buy milk", "Call Mom about milk", "Review code", "Code review for Bob",
+                     "Pay bills", "BUY bread", "Read a book", "x"]:
+            fm.add_todo(task, "Medium")
+        
+        queries = ["milk", "MILK", "buy", "review code", "code review", "b", "ok",
+                   "bo", "mom milk", "milk mom", "nothing here", "x", "", "ill", "pay bills"]
+        todos = fm.read_todos()
+        for query in queries:
+            results = [t['id'] for t in fm.search_todos(query)]
+            assert results == brute_force(todos, query), f"Wrong results for '{query}'"
+        print("✅ Index matches a full scan, including AND queries")
+        
+        # The index follows adds, edits and deletes
+        index = fm._search_index
+        fm.add_todo("Buy stamps", "Low")
+        fm.update_todo_task_by_id(todos[0]['id'], "Sell milk")
+        fm.delete_todo_by_id(todos[1]['id'])
+        fm.update_todo_status_by_id(todos[4]['id'], "Completed")
+        fm.clear_completed()
+        todos = fm.read_todos()
+        assert fm._search_index is index, "Index should not be rebuilt"
+        for query in queries + ["stamps", "sell", "call", "bills"]:
+            results = [t['id'] for t in fm.search_todos(query)]
+            assert results == brute_force(todos, query), f"Stale results for '{query}'"
+        print("✅ Index is updated incrementally")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_sorted_views():
+    """Test the sort indexes behind sorted_todos"""
+    print("\n🧪 Testing sorted views...")
+    
+    temp_file = "test_sorted_todos.txt"
+    backup_file = "test_sorted_todos_backup.txt"
+    database_file = "test_sorted_todos.db"
+    
+    def brute_force(todos, sort, status=None, priority=None, reverse=False):
+        todos = [t for t in todos if (status is None or t['status'] == status) and
+                 (priority is None or t['priority'] == priority)]
+        if sort == 'priority':
+            todos.sort(key=lambda t: (t.priority, t.created))
+        else:
+            todos.sort(key=lambda t: (t.created, t.priority))
+        # Descending is the exact reverse, todos with equal keys included
+        return [t['id'] for t in (todos[::-1] if reverse else todos)]
+    
+    try:
+        from sqlite_manager import SQLiteTodoManager
+        
+        fm = TodoFileManager(temp_file, backup_file)
+        records = []
+        for i in range(40):
+            records.append({
+                'timestamp': f"2024-01-{1 + (i * 7) % 28:02d} 12:00:00",
+                'priority': ["High", "Medium", "Low"][i % 3],
+                'status': "Completed" if i % 4 == 0 else "Pending",
+                'task': f"Task {i}"
+            })
+        assert fm.write_todos(records), "Should write todos"
+        
+        views = [(sort, status, priority, reverse)
+                 for sort in ('priority', 'created')
+                 for status in (None, "Pending", "Completed")
+                 for priority in (None, "High", "Low")
+                 for reverse in (False, True)]
+        
+        def check(fm, message):
+            todos = fm.read_todos()
+            for sort, status, priority, reverse in views:
+                expected = brute_force(todos, sort, status, priority, reverse)
+                results = [t['id'] for t in fm.sorted_todos(sort, status, priority, reverse=reverse)]
+                assert results == expected, f"{message}: wrong order for {sort}/{status}/{priority}"
+                top = [t['id'] for t in fm.sorted_todos(sort, status, priority, limit=5, reverse=reverse)]
+                assert top == expected[:5], f"{message}: wrong top 5 for {sort}/{status}/{priority}"
+        
+        check(fm, "Fresh index")
+        assert [t['id'] for t in fm.sorted_todos('file')] == [t['id'] for t in fm.read_todos()], \
+            "File order should be the list order"
+        print("✅ Sorted views and top-k match a full sort")
+        
+        # The indexes follow adds, status changes and deletes
+        indexes = dict(fm._sort_indexes)
+        todos = fm.read_todos()
+        fm.add_todo("Newest", "High")
+        fm.update_todo_status_by_id(todos[1]['id'], "Completed")
+        fm.update_todo_status_by_id(todos[0]['id'], "Pending")
+        fm.delete_todo_by_id(todos[2]['id'])
+        fm.clear_completed()
+        assert fm._sort_indexes == indexes, "Indexes should not be rebuilt"
+        check(fm, "Updated index")
+        print("✅ Indexes are updated incrementally")
+        
+        # Top-k of a file that isn't cached streams through a heap
+        cold = TodoFileManager(temp_file, backup_file)
+        oldest = cold.sorted_todos('created', "Pending", "High", limit=3)
+        assert cold._cache is None, "Top-k should not load the list"
+        assert [t['id'] for t in oldest] == brute_force(fm.read_todos(), 'created', "Pending", "High")[:3], \
+            "Cold top-k should match the index"
+        print("✅ Top-k works without loading the list")
+        
+        db = SQLiteTodoManager(database_file, backup_file, migrate_from=temp_file)
+        try:
+            check(db, "SQLite")
+        finally:
+            db.close()
+        print("✅ SQLite backend sorts the same way")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file, database_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_paged_queries():
+    """Test query(): one page of a filtered, sorted view plus its size"""
+    print("\n🧪 Testing paged queries...")
+    
+    temp_file = "test_query_todos.txt"
+    backup_file = "test_query_todos_backup.txt"
+    database_file = "test_query_todos.db"
+    
+    def brute_force(todos, search, status, sort, reverse):
+        words = search.lower().split()
+        todos = [t for t in todos if all(w in t.task.lower() for w in words) and
+                 (status is None or t['status'] == status)]
+        if sort == 'priority':
+            todos.sort(key=lambda t: (t.priority, t.created))
+        return [t['id'] for t in (todos[::-1] if reverse else todos)]
+    
+    try:
+        from sqlite_manager import SQLiteTodoManager
+        
+        fm = TodoFileManager(temp_file, backup_file)
+        assert fm.write_todos({
+            'timestamp': f"2024-02-{1 + i % 28:02d} 08:00:00",
+            'priority': ["Low", "High", "Medium"][i % 3],
+            'status': "Completed" if i % 5 == 0 else "Pending",
+            'task': f"{['Buy', 'Call', 'Fix'][i % 4 % 3]} item {i}"
+        } for i in range(53)), "Should write todos"
+        
+        views = [(search, status, sort, reverse)
+                 for search in ("", "buy", "fix item 1")
+                 for status in (None, "Pending", "Completed")
+                 for sort, reverse in (('file', False), ('priority', False), ('priority', True))]
+        
+        def check(fm, message):
+            todos = fm.read_todos()
+            for search, status, sort, reverse in views:
+                expected = brute_force(todos, search, status, sort, reverse)
+                for offset, limit in ((0, 10), (10, 10), (50, 10), (0, None)):
+                    page, total = fm.query(search, status, sort=sort, offset=offset,
+                                           limit=limit, reverse=reverse)
+                    end = None if limit is None else offset + limit
+                    assert total == len(expected), f"{message}: wrong total for {search}/{status}/{sort}"
+                    assert [t['id'] for t in page] == expected[offset:end], \
+                        f"{message}: wrong page {offset} for {search}/{status}/{sort}/{reverse}"
+        
+        check(fm, "Cached list")
+        fm.add_todo("Buy more", "High")
+        fm.update_todo_status_by_id(fm.read_todos()[3]['id'], "Completed")
+        fm.delete_todo_by_id(fm.read_todos()[7]['id'])
+        check(fm, "After changes")
+        print("✅ Pages and totals match a full scan")
+        
+        # A fresh manager pages in file order through the line index file
+        expected = [t['id'] for t in fm.read_todos() if t['status'] == "Pending"]
+        cold = TodoFileManager(temp_file, backup_file)
+        page, total = cold.query(status="Pending", offset=20, limit=5)
+        assert cold._cache is None, "File order pages should not load the list"
+        assert total == len(expected), "Cold total should count the pending todos"
+        assert [t['id'] for t in page] == expected[20:25], "Cold page should match"
+        cold._close_mapped()
+        print("✅ File order pages don't load the list")
+        
+        db = SQLiteTodoManager(database_file, backup_file, migrate_from=temp_file)
+        try:
+            check(db, "SQLite")
+        finally:
+            db.close()
+        print("✅ SQLite backend pages the same way")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file, database_file, temp_file + ".idx"]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_streaming_export():
+    """Test the one-pass export in every format, with progress reports"""
+    print("\n🧪 Testing streaming export...")
+    
+    temp_file = "test_export_stream_todos.txt"
+    backup_file = "test_export_stream_backup.txt"
+    export_base = "test_export_stream"
+    export_files = [f"{export_base}.{format_type}" for format_type in ("txt", "csv", "ndjson", "json")]
+    
+    try:
+        import csv
+        import json
+        
+        fm = TodoFileManager(temp_file, backup_file)
+        assert fm.write_todos({
+            'timestamp': "2024-03-01 09:30:00",
+            'priority': ["High", "Medium", "Low"][i % 3],
+            'status': "Completed" if i % 2 else "Pending",
+            'task': f"Task, \"quoted\" {i} ✓"
+        } for i in range(2500)), "Should write todos"
+        todos = fm.read_todos()
+        expected = [t.to_dict() for t in todos]
+        
+        for export_file in export_files:
+            format_type = export_file.rsplit('.', 1)[1]
+            reports = []
+            assert fm.export_todos(export_file, format_type, lambda done, total: reports.append((done, total))), \
+                f"{format_type} export should succeed"
+            assert reports[-1] == (2500, 2500), f"{format_type} export should report completion"
+            assert [done for done, _ in reports[:-1]] == [1000, 2000], "Progress should be reported in steps"
+        
+        with open(f"{export_base}.json", encoding='utf-8') as f:
+            assert json.load(f) == expected, "JSON export should hold every todo"
+        with open(f"{export_base}.ndjson", encoding='utf-8') as f:
+            assert [json.loads(line) for line in f] == expected, "NDJSON export should hold every todo"
+        with open(f"{export_base}.csv", newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        assert rows[1:] == [[t['timestamp'], t['priority'], t['status'], t['task']] for t in expected], \
+            "CSV export should hold every todo"
+        
+        with open(f"{export_base}.txt", encoding='utf-8') as f:
+            content = f.read()
+        pending, completed = content.split("COMPLETED TASKS:")
+        assert pending.count("\n1. ") == 1 and pending.count("Task, ") == 1250, "Pending section should come first"
+        assert completed.count("Task, ") == 1250, "Completed section should follow"
+        assert f"1250. [{todos[-1].priority.label}] {todos[-1].task}" in completed, \
+            "Completed todos should be numbered in list order"
+        print("✅ TXT, CSV, NDJSON and JSON exports are complete")
+        
+        # An empty list is still valid JSON, and unknown formats write nothing
+        empty = TodoFileManager(temp_file + ".empty", backup_file)
+        assert empty.export_todos(f"{export_base}.json", "json"), "Empty export should succeed"
+        with open(f"{export_base}.json", encoding='utf-8') as f:
+            assert json.load(f) == [], "Empty JSON export should be an empty array"
+        assert not fm.export_todos(f"{export_base}.xml", "xml"), "Unknown format should fail"
+        assert not os.path.exists(f"{export_base}.xml"), "Failed export should leave no file"
+        print("✅ Empty and unknown exports are handled")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file] + export_files:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_bulk_import():
+    """Test import_todos(): batch validation, deduplication and one write"""
+    print("\n🧪 Testing bulk import...")
+    
+    temp_file = "test_import_todos.txt"
+    backup_file = "test_import_todos_backup.txt"
+    database_file = "test_import_todos.db"
+    source_files = ["test_import_source.txt", "test_import_source.ndjson",
+                    "test_import_source.csv", "test_import_source.json"]
+    
+    try:
+        from sqlite_manager import SQLiteTodoManager
+        
+        with open(source_files[0], 'w', encoding='utf-8') as f:
+            f.write("2024-10-24 09:15:30|High|Pending|Old format line\n"
+                    "a1b2c3d4e5f6|2024-10-24 09:20:45|Low|Completed|Line with ID\n"
+                    "Just a task\n"
+                    "\n"
+                    "2024-13-45 99:99:99|High|Pending|Bad timestamp\n"
+                    "2024-10-24 09:15:30|Urgent|Pending|Bad priority\n"
+                    "2024-10-24 09:15:30|High|Pending|Old format line\n")
+        with open(source_files[1], 'w', encoding='utf-8') as f:
+            f.write('{"timestamp": "2024-01-02 03:04:05", "priority": "high", "task": "From NDJSON"}\n'
+                    'not json\n'
+                    '{"task": ""}\n'
+                    '{"id": "bad|id", "task": "Bad ID"}\n')
+        
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.add_todo("Existing", "Medium")
+        
+        # Every import is a single write of the data file
+        writes = []
+        original_append = fm._append_records
+        def counting_append(new):
+            writes.append(len(new))
+            return original_append(new)
+        fm._append_records = counting_append
+        
+        report = fm.import_todos(source_files[0], "txt")
+        assert report == {'added': 3, 'duplicates': 1, 'invalid': 2}, f"Unexpected txt report: {report}"
+        assert writes == [3], "Import should append once"
+        todos = fm.read_todos()
+        assert [t['task'] for t in todos] == ["Existing", "Old format line", "Line with ID", "Just a task"], \
+            "Imported todos should follow the existing ones"
+        assert todos[2]['id'] == "a1b2c3d4e5f6" and todos[2]['status'] == "Completed", "Fields should be kept"
+        assert todos[3]['priority'] == "Medium" and todos[3]['status'] == "Pending", "Plain lines get defaults"
+        assert all(t['id'] for t in todos), "Imported todos should get IDs"
+        
+        report = fm.import_todos(source_files[1], "ndjson")
+        assert report == {'added': 1, 'duplicates': 0, 'invalid': 3}, f"Unexpected NDJSON report: {report}"
+        assert fm.get_todo(fm.read_todos()[-1]['id'])['priority'] == "High", "Labels are case-insensitive"
+        
+        assert fm.import_todos(source_files[0], "txt")['duplicates'] == 4, "Re-import should only find duplicates"
+        assert fm.import_todos("missing_file.txt", "txt") is None, "Missing file should fail"
+        assert fm.import_todos(source_files[0], "xml") is None, "Unknown format should fail"
+        assert len(fm.read_todos()) == 5, "Failed imports should add nothing"
+        assert fm.verify_statistics(), "Statistics should include the imported todos"
+        print("✅ Rows are validated, defaulted and deduplicated")
+        
+        # Exports import back into an empty list unchanged
+        expected = [t.to_dict() for t in fm.read_todos()]
+        for source in source_files[2:]:
+            assert fm.export_todos(source, source.rsplit('.', 1)[1]), "Export should succeed"
+        
+        fresh = TodoFileManager(temp_file + ".fresh", backup_file)
+        assert fresh.import_todos(source_files[3], "json")['added'] == 5, "JSON export should import"
+        assert [t.to_dict() for t in fresh.read_todos()] == expected, "JSON round trip should keep every field"
+        assert fresh.import_todos(source_files[2], "csv")['duplicates'] == 5, "CSV rows are duplicates of JSON ones"
+        assert TodoFileManager(temp_file + ".fresh", backup_file).read_todos() == fresh.read_todos(), \
+            "Imported todos should be on disk"
+        os.remove(temp_file + ".fresh")
+        print("✅ Exports import back unchanged")
+        
+        db = SQLiteTodoManager(database_file, backup_file)
+        try:
+            assert db.import_todos(source_files[3], "json")['added'] == 5, "SQLite import should add todos"
+            assert db.import_todos(source_files[2], "csv")['duplicates'] == 5, "SQLite import should deduplicate"
+            assert [t.to_dict() for t in db.read_todos()] == expected, "SQLite import should keep every field"
+        finally:
+            db.close()
+        print("✅ SQLite backend imports the same way")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file, database_file,
+                     temp_file + ".fresh", temp_file + ".fresh.lock"] + source_files:
+            if os.path.exists(file):
+                os.remove(file)
+
+def _add_and_complete(data_file, backup_file, name, count):
+    """Worker for test_concurrent_instances: adds todos and completes each one"""
+    fm = TodoFileManager(data_file, backup_file)
+    for i in range(count):
+        task = f"{name} task {i}"
+        fm.add_todo(task, "Medium")
+        # A status change rewrites the whole file in text mode
+        todo_id = next(todo.id for todo in fm.read_todos() if todo.task == task)
+        fm.update_todo_status_by_id(todo_id, "Completed")
+
+def _add_and_compact(data_file, backup_file, name, count):
+    """Worker for test_concurrent_instances: appends to the log and compacts it
+    
+    Exits with status 1 if a compaction failed rather than gave way.
+    """
+    import io
+    import contextlib
+    
+    fm = TodoFileManager(data_file, backup_file, storage_mode="log", compact_threshold=1000)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for i in range(count):
+            fm.add_todo(f"{name} task {i}", "Low")
+            fm.compact()
+    if "Compaction failed" in output.getvalue():
+        print(output.getvalue(), end='')
+        sys.exit(1)
+
+def test_search_worker():
+    """Test the background search: newest request wins, stale ones are dropped"""
+    print("\n🧪 Testing search worker...")
+    
+    temp_file = "test_search_worker_todos.txt"
+    backup_file = "test_search_worker_todos_backup.txt"
+    
+    def wait_for_result(worker):
+        for _ in range(500):
+            result = worker.take_result()
+            if result is not None or not worker.pending:
+                return result
+            time.sleep(0.01)
+        raise AssertionError("Search should finish")
+    
+    try:
+        import threading
+        import time
+        from search_worker import SearchWorker
+        
+        # Requests typed while a search runs: only the newest one is searched
+        release = threading.Event()
+        searched = []
+        def slow_search(term):
+            searched.append(term)
+            release.wait(5)
+            return term.upper()
+        
+        worker = SearchWorker(slow_search)
+        worker.submit("b")
+        while not searched:
+            time.sleep(0.01)
+        for term in ("bu", "buy", "buy m"):
+            worker.submit(term)
+        assert worker.take_result() is None, "No result before the search finishes"
+        release.set()
+        assert wait_for_result(worker) == ("buy m", "BUY M"), "Newest request should win"
+        assert searched == ["b", "buy m"], f"Waiting requests should be dropped: {searched}"
+        assert not worker.pending, "Nothing should be pending after the result is taken"
+        print("✅ Only the newest request is searched and delivered")
+        
+        # A cancelled search delivers nothing
+        release.clear()
+        worker.submit("call")
+        worker.cancel()
+        release.set()
+        assert wait_for_result(worker) is None, "Cancelled search should deliver nothing"
+        print("✅ Cancelled searches are dropped")
+        
+        # Errors come back to the caller
+        def failing_search(term):
+            raise ValueError(f"Unknown sort order: {term}")
+        worker = SearchWorker(failing_search)
+        worker.submit("xml")
+        try:
+            wait_for_result(worker)
+            assert False, "Search error should be raised"
+        except ValueError:
+            pass
+        print("✅ Search errors are raised by take_result()")
+        
+        # Searching query() from the thread
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.add_todo("Buy milk", "High")
+        fm.add_todo("Call mom", "Low")
+        worker = SearchWorker(lambda args: fm.query(**args))
+        worker.submit({'search': "milk", 'offset': 0, 'limit': 10})
+        args, (todos, total) = wait_for_result(worker)
+        assert args['search'] == "milk", "Result should come with its request"
+        assert total == 1 and todos[0]['task'] == "Buy milk", "Thread should search the list"
+        print("✅ query() runs in the worker thread")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_io_worker():
+    """Test the background write queue used by the GUIs"""
+    print("\n🧪 Testing I/O worker...")
+    
+    temp_file = "test_io_worker_todos.txt"
+    backup_file = "test_io_worker_todos_backup.txt"
+    
+    def drain(worker):
+        finished = []
+        for _ in range(500):
+            finished.extend(worker.take_finished())
+            if not worker.pending:
+                return finished
+            time.sleep(0.01)
+        raise AssertionError("Queued calls should finish")
+    
+    try:
+        import threading
+        import time
+        from io_worker import IOWorker
+        
+        # Calls run in order, one at a time, and stay pending until reported
+        release = threading.Event()
+        calls = []
+        def slow_call(name):
+            release.wait(5)
+            calls.append(name)
+            return True
+        
+        worker = IOWorker()
+        done = []
+        for name in ("first", "second", "third"):
+            worker.submit(name, slow_call, name, on_done=lambda ok, name=name: done.append((name, ok)))
+        assert worker.pending == 3, "Queued calls should be pending"
+        assert worker.take_finished() == [], "Nothing should finish before the call returns"
+        release.set()
+        finished = drain(worker)
+        assert calls == ["first", "second", "third"], f"Calls should run in order: {calls}"
+        assert finished == [("first", True), ("second", True), ("third", True)], \
+            "Every call should be reported once"
+        assert done == finished, "on_done should run for every call"
+        print("✅ Calls run in order and are reported once")
+        
+        # False, None and exceptions are failures
+        def broken():
+            raise OSError("disk full")
+        worker.submit("false", lambda: False)
+        worker.submit("none", lambda: None)
+        worker.submit("raises", broken)
+        worker.submit("zero", lambda: 0)
+        assert drain(worker) == [("false", False), ("none", False), ("raises", False),
+                                 ("zero", True)], "Failures should be reported"
+        print("✅ Failed calls are reported")
+        
+        # Reads run behind the queued writes without counting as pending
+        release.clear()
+        results = []
+        worker.submit("slow", slow_call, "slow")
+        worker.fetch(lambda: list(calls), on_result=results.append)
+        worker.fetch(broken, on_result=results.append)
+        assert worker.pending == 1 and worker.busy, "Only the write should be pending"
+        release.set()
+        assert drain(worker) == [("slow", True)], "Reads should not be reported as writes"
+        for _ in range(500):
+            worker.take_finished()
+            if not worker.busy:
+                break
+            time.sleep(0.01)
+        assert results == [["first", "second", "third", "slow"], None], \
+            f"Reads should see the writes queued before them: {results}"
+        print("✅ Reads are queued behind the writes")
+        
+        # A callback that raises doesn't stop the calls reported after it
+        def failing_callback(value):
+            raise RuntimeError("callback bug")
+        results.clear()
+        worker.submit("first", lambda: True, on_done=failing_callback)
+        worker.fetch(lambda: "read", on_result=failing_callback)
+        worker.submit("second", lambda: True, on_done=results.append)
+        assert [name for name, _ in drain(worker)] == ["first", "second"]
+        assert results == [True] and not worker.busy
+        print("✅ Failing callbacks don't stop the reports")
+        
+        # Changes queued on a file manager all reach the file
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.add_todo("Buy milk", "High")
+        fm.add_todo("Call mom", "Low")
+        first, second = [todo['id'] for todo in fm.read_todos()]
+        worker.submit("Complete", fm.update_todo_status_by_id, first, "Completed")
+        worker.submit("Edit", fm.update_todo_task_by_id, second, "Call dad")
+        worker.submit("Add", fm.add_todo, "Water plants", "Medium")
+        worker.submit("Delete", fm.delete_todo_by_id, "missing")
+        results = drain(worker)
+        assert [ok for _, ok in results] == [True, True, True, False], \
+            "Deleting a missing todo should fail, the rest succeed"
+        todos = TodoFileManager(temp_file, backup_file).read_todos()
+        assert [(t['task'], t['status']) for t in todos] == [
+            ("Buy milk", "Completed"), ("Call dad", "Pending"), ("Water plants", "Pending")
+        ], "Queued changes should be saved"
+        print("✅ Queued file manager changes are saved")
+        
+        # A new todo is shown where the saved one ends up, under an ID of its own
+        from datetime import timedelta
+        from io_worker import is_provisional, provisional_todo
+        from sort_index import SORT_CHOICES, insert_position
+        earlier = datetime.now().replace(microsecond=0) - timedelta(days=1)
+        fm.write_todos([{'timestamp': (earlier + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                         'priority': priority, 'status': 'Pending', 'task': f"Task {i}"}
+                        for i, priority in enumerate(["Low", "High", "Medium", "High"])])
+        new = provisional_todo("New task", "High")
+        assert is_provisional(new.id) and new.status.label == "Pending"
+        assert provisional_todo("New task", "High").id != new.id
+        shown = {choice: fm.sorted_todos(sort, reverse=reverse)
+                 for choice, (sort, reverse) in SORT_CHOICES.items()}
+        fm.add_todo("New task", "High")
+        for choice, (sort, reverse) in SORT_CHOICES.items():
+            saved = [todo.task for todo in fm.sorted_todos(sort, reverse=reverse)]
+            assert insert_position(shown[choice], new, sort, reverse) == saved.index("New task"), \
+                f"New todo misplaced in {choice}"
+            assert not any(is_provisional(todo.id) for todo in fm.read_todos())
+        print("✅ New todos are shown in their place before they are saved")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_concurrent_instances():
+    """Test several managers (and processes) sharing one data file"""
+    print("\n🧪 Testing concurrent instances...")
+    
+    temp_file = "test_shared_todos.txt"
+    backup_file = "test_shared_todos_backup.txt"
+    
+    try:
+        import multiprocessing
+        
+        # Two windows on the same file don't lose each other's changes
+        fm1 = TodoFileManager(temp_file, backup_file)
+        fm2 = TodoFileManager(temp_file, backup_file)
+        fm1.add_todo("From window one", "Low")
+        fm2.add_todo("From window two", "High")
+        first_id = fm1.read_todos()[0].id
+        assert fm2.update_todo_status_by_id(first_id, "Completed") == True
+        assert fm1.add_todo("Third", "Medium") == True
+        tasks = [(todo.task, todo.status.label) for todo in fm2.read_todos()]
+        assert tasks == [("From window one", "Completed"), ("From window two", "Pending"),
+                         ("Third", "Pending")], tasks
+        print("✅ Changes of both instances are kept")
+        
+        # poll_changes() reports only changes made by the other instance
+        fm2.poll_changes()
+        assert fm2.poll_changes() == False
+        fm2.add_todo("Own change", "Low")
+        assert fm2.poll_changes() == False, "Own changes should not be reported"
+        
+        # Appended records are read without parsing the file again, and
+        # the sort index is updated rather than rebuilt
+        assert fm2.sorted_todos('priority')[0].task == "From window two"
+        sort_index = fm2._sort_indexes['priority']
+        parse_count = [0]
+        original_parse = fm2._parse_file
+        def counting_parse():
+            parse_count[0] += 1
+            return original_parse()
+        fm2._parse_file = counting_parse
+        fm1.add_todo("Urgent from one", "High")
+        assert fm2.poll_changes() == True
+        assert fm2.poll_changes() == False
+        assert parse_count[0] == 0, "Appended lines should be read on their own"
+        assert fm2._sort_indexes['priority'] is sort_index
+        assert [todo.task for todo in fm2.sorted_todos('priority', limit=2)] == \
+            ["From window two", "Urgent from one"]
+        assert fm2.get_statistics()['high_priority'] == 2
+        print("✅ Appended records are picked up incrementally")
+        
+        # A rewrite by the other instance is diffed against the cache
+        fm1.delete_todo_by_id(first_id)
+        assert fm2.poll_changes() == True
+        assert parse_count[0] == 1
+        assert fm2._sort_indexes['priority'] is sort_index
+        assert first_id not in [todo.id for todo in fm2.sorted_todos('priority')]
+        assert fm2.get_statistics() == fm1.get_statistics()
+        assert fm2.verify_statistics() == True
+        print("✅ Rewritten files update the cache and indexes in place")
+        
+        # A window that only read without caching still sees the next change
+        cold = TodoFileManager(temp_file, backup_file)
+        total = cold.query(limit=10)[1]
+        assert cold._cache is None
+        fm1.add_todo("After a cold read", "Low")
+        assert cold.poll_changes() == True, "The first poll should report the change"
+        assert cold.poll_changes() == False
+        assert cold.query(limit=10)[1] == total + 1
+        cold = TodoFileManager(temp_file, backup_file)
+        cold.get_statistics()
+        fm1.add_todo("Before an own change", "Low")
+        cold.add_todo("Own change after a cold read", "Low")
+        assert cold.poll_changes() == True, "Loading the cache should not hide the change"
+        assert cold.poll_changes() == False
+        print("✅ Changes after cold reads are reported")
+        
+        # Log mode: other instances replay only the new log entries
+        os.remove(temp_file)
+        log1 = TodoFileManager(temp_file, backup_file, storage_mode="log")
+        log2 = TodoFileManager(temp_file, backup_file, storage_mode="log")
+        log1.add_todo("Logged", "Medium")
+        log1.add_todo("Logged too", "Low")
+        assert len(log2.read_todos()) == 2
+        log2._parse_file = counting_parse
+        parse_count[0] = 0
+        log1.update_todo_status_by_id(log1.read_todos()[0].id, "Completed")
+        log1.update_todo_task_by_id(log1.read_todos()[1].id, "Renamed")
+        assert log2.poll_changes() == True
+        assert parse_count[0] == 0
+        assert [(todo.task, todo.status.label) for todo in log2.read_todos()] == \
+            [("Logged", "Completed"), ("Renamed", "Pending")]
+        log1.clear_completed()
+        assert [todo.task for todo in log2.read_todos()] == ["Renamed"]
+        assert parse_count[0] == 0
+        print("✅ Log entries of other instances are replayed incrementally")
+        
+        # Processes rewriting the file at the same time don't lose todos
+        for file in [temp_file, temp_file + ".log"]:
+            if os.path.exists(file):
+                os.remove(file)
+        workers = [multiprocessing.Process(target=_add_and_complete,
+                                           args=(temp_file, backup_file, f"p{n}", 10))
+                   for n in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        todos = TodoFileManager(temp_file, backup_file).read_todos()
+        assert len(todos) == 40, f"Expected 40 todos, got {len(todos)}"
+        assert all(todo.status.label == "Completed" for todo in todos), "Lost a status change"
+        print("✅ The lock file serializes writes of several processes")
+        
+        # Processes compacting the same log at once use their own temp files
+        for file in [temp_file, temp_file + ".log"]:
+            if os.path.exists(file):
+                os.remove(file)
+        workers = [multiprocessing.Process(target=_add_and_compact,
+                                           args=(temp_file, backup_file, f"c{n}", 10))
+                   for n in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert all(worker.exitcode == 0 for worker in workers), "A compaction failed"
+        todos = TodoFileManager(temp_file, backup_file, storage_mode="log").read_todos()
+        assert len(todos) == 40, f"Expected 40 todos, got {len(todos)}"
+        assert not [name for name in os.listdir('.') if name.startswith(temp_file + ".") and
+                    name.endswith(".tmp")], "Temp files were left behind"
+        print("✅ Concurrent compactions don't collide")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", temp_file + ".log", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_archive():
+    """Test moving old completed todos into the compressed archive"""
+    print("\n🧪 Testing archive...")
+    
+    temp_file = "test_archive_todos.txt"
+    backup_file = "test_archive_todos_backup.txt"
+    database_file = "test_archive_todos.db"
+    export_file = "test_archive_export.ndjson"
+    archive_files = [temp_file + ".archive", temp_file + ".archive.idx",
+                     database_file + ".archive", database_file + ".archive.idx"]
+    
+    try:
+        import archive_store
+        from datetime import timedelta
+        from sqlite_manager import SQLiteTodoManager
+        from todo_record import Priority, Status, Todo
+        
+        now = datetime.now().replace(microsecond=0)
+        def make_todos():
+            todos = []
+            for i in range(12):
+                created = now - timedelta(days=60 if i < 8 else 1, minutes=i)
+                status = Status.COMPLETED if i % 4 != 3 else Status.PENDING
+                todos.append(Todo(f"id{i:02d}", created, Priority(i % 3), status, f"Task {i}"))
+            return todos
+        
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.write_todos(make_todos())
+        
+        # Old completed todos move, pending and recent ones stay
+        assert fm.archive_completed(30) == 6
+        assert [todo.id for todo in fm.read_todos()] == ["id03", "id07", "id08", "id09", "id10", "id11"]
+        assert fm.archive_completed(30) == 0
+        assert os.path.getsize(temp_file + ".archive") < 300, "Archive should be compressed"
+        print("✅ Old completed todos are archived")
+        
+        # Statistics and search reach the archive on request
+        stats = fm.get_statistics()
+        assert stats['total'] == 6 and stats['completed'] == 3
+        stats = fm.get_statistics(include_archive=True)
+        assert stats['total'] == 12 and stats['completed'] == 9 and stats['archived'] == 6
+        assert [todo.id for todo in fm.search_archive("task 1")] == ["id01"]
+        assert fm.search_todos("task 1") == [fm.get_todo("id10"), fm.get_todo("id11")]
+        print("✅ Statistics and search include the archive on request")
+        
+        # Exports can include the archive
+        assert fm.export_todos(export_file, "ndjson", include_archive=True) == True
+        with open(export_file, 'r', encoding='utf-8') as f:
+            assert len(f.read().splitlines()) == 12
+        assert fm.export_todos(export_file, "ndjson") == True
+        with open(export_file, 'r', encoding='utf-8') as f:
+            assert len(f.read().splitlines()) == 6
+        print("✅ Exports include the archive on request")
+        
+        # A second run appends a block; a lost index or a torn block is recovered
+        fm.update_todo_status_by_id("id03", "Completed")
+        assert fm.archive_completed(30) == 1
+        assert len(fm._archive().blocks()) == 2
+        os.remove(temp_file + ".archive.idx")
+        with open(temp_file + ".archive", 'ab') as f:
+            f.write(b"#block|zlib|500|3|x|y|z\nshort")
+        fm._archive_store = None
+        assert fm.get_statistics(include_archive=True)['archived'] == 7
+        fm.update_todo_status_by_id("id07", "Completed")
+        assert fm.archive_completed(30) == 1
+        fm._archive_store = None
+        assert [todo.id for todo in fm._archive().iter_todos()] == \
+            ["id00", "id01", "id02", "id04", "id05", "id06", "id03", "id07"]
+        print("✅ Lost index and torn blocks are recovered")
+        
+        # Lines of the older format without an ID are archived once, not kept
+        for file in [temp_file] + archive_files:
+            if os.path.exists(file):
+                os.remove(file)
+        old_time = (now - timedelta(days=60)).strftime("%Y-%m-%d %H:%M:%S")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(f"{old_time}|High|Completed|Old done task\n")
+            f.write(f"{old_time}|Low|Pending|Old open task\n")
+        fm = TodoFileManager(temp_file, backup_file)
+        assert fm.archive_completed(30) == 1
+        assert [todo.task for todo in fm.read_todos()] == ["Old open task"]
+        assert [todo.task for todo in fm._archive().iter_todos()] == ["Old done task"]
+        assert fm.archive_completed(30) == 0
+        print("✅ Old-format lines are archived once")
+        
+        # lzma archives, the log storage mode and the SQLite backend work alike
+        for file in [temp_file] + archive_files:
+            if os.path.exists(file):
+                os.remove(file)
+        managers = [TodoFileManager(temp_file, backup_file, storage_mode="log",
+                                    archive_compression="lzma"),
+                    SQLiteTodoManager(database_file, backup_file)]
+        for manager in managers:
+            manager.write_todos(make_todos())
+            assert manager.archive_completed(30) == 6
+            assert len(manager.read_todos()) == 6
+            assert manager.get_statistics(include_archive=True)['archived'] == 6
+            assert len(manager.search_archive("task")) == 6
+        assert managers[0]._archive().blocks()[0]['codec'] == "lzma"
+        managers[1].close()
+        print("✅ lzma, log mode and SQLite archives work")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", temp_file + ".log", backup_file,
+                     database_file, export_file] + archive_files:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_batch_writes():
+    """Test that batches are persisted with a single write"""
+    print("\n🧪 Testing batch writes...")
+    
+    temp_file = "test_batch_todos.txt"
+    backup_file = "test_batch_todos_backup.txt"
+    database_file = "test_batch_todos.db"
+    fm = None
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file)
+        for i in range(50):
+            fm.add_todo(f"Task {i}", "Medium")
+        ids = [todo['id'] for todo in fm.read_todos()]
+        
+        # Count full rewrites
+        write_count = [0]
+        original_write = fm.write_todos
+        def counting_write(todos):
+            write_count[0] += 1
+            return original_write(todos)
+        fm.write_todos = counting_write
+        
+        operations = [('delete', todo_id) for todo_id in ids[:30]]
+        operations += [('status', todo_id, "Completed") for todo_id in ids[30:40]]
+        operations += [('add', "Batch task", "High"), ('task', ids[45], "Renamed")]
+        assert fm.apply_batch(operations) == True
+        assert write_count[0] == 1, f"Expected 1 write, got {write_count[0]}"
+        
+        todos = TodoFileManager(temp_file).read_todos()
+        assert len(todos) == 21
+        assert todos[-1]['task'] == "Batch task"
+        assert sum(1 for t in todos if t['status'] == "Completed") == 10
+        assert fm.verify_statistics()
+        print("✅ Text mode batch does one rewrite")
+        
+        # A failing batch leaves the data untouched
+        try:
+            with fm.batch():
+                fm.delete_todo_by_id(ids[45])
+                raise ValueError("stop")
+        except ValueError:
+            pass
+        assert fm.get_todo(ids[45])['task'] == "Renamed"
+        assert write_count[0] == 1
+        print("✅ Failed batch is rolled back")
+        
+        # Log mode appends the whole batch at once
+        log_fm = TodoFileManager(temp_file, backup_file, storage_mode="log")
+        assert log_fm.apply_batch([('delete', todo['id']) for todo in todos]) == True
+        with open(temp_file + ".log", 'r', encoding='utf-8') as f:
+            assert len(f.readlines()) == 21
+        assert TodoFileManager(temp_file, storage_mode="log").read_todos() == []
+        print("✅ Log mode batch is one append")
+        
+        # SQLite batches are one transaction
+        from sqlite_manager import SQLiteTodoManager
+        fm = SQLiteTodoManager(database_file, backup_file)
+        assert fm.apply_batch([('add', f"Row {i}", "Low") for i in range(20)]) == True
+        try:
+            with fm.batch():
+                fm.clear_completed()
+                fm.delete_todo(0)
+                raise ValueError("stop")
+        except ValueError:
+            pass
+        assert len(fm.read_todos()) == 20
+        print("✅ SQLite batch commits and rolls back as one transaction")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        if hasattr(fm, 'close'):
+            fm.close()
+        for file in [temp_file, temp_file + ".lock", backup_file, temp_file + ".log", database_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_atomic_writes():
+    """Test that rewrites are atomic and carry a checksum"""
+    print("\n🧪 Testing atomic writes...")
+    
+    import io
+    import contextlib
+    import file_manager
+    temp_file = "test_atomic_todos.txt"
+    backup_file = "test_atomic_todos_backup.txt"
+    original_replace = os.replace
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.add_todo("Keep me", "High")
+        fm.add_todo("Keep me too", "Low")
+        assert fm.update_todo_status(0, "Completed") == True
+        
+        with open(temp_file, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines[-1].startswith(file_manager.CHECKSUM_PREFIX)
+        assert validate_todo_file(temp_file) == True
+        assert not os.path.exists(backup_file), "Writes should not copy a backup"
+        print("✅ Rewrites end with a checksum trailer and skip the backup copy")
+        
+        # Simulate a crash right before the rename
+        with open(temp_file, 'rb') as f:
+            before = f.read()
+        def crash(*args):
+            raise OSError("simulated crash")
+        os.replace = crash
+        try:
+            assert fm.update_todo_task(1, "Half written") == False
+        finally:
+            os.replace = original_replace
+        with open(temp_file, 'rb') as f:
+            assert f.read() == before
+        assert not [name for name in os.listdir('.') if name.startswith(temp_file + ".") and
+                    name.endswith(".tmp")], "The temp file was left behind"
+        assert TodoFileManager(temp_file).read_todos()[1]['task'] == "Keep me too"
+        print("✅ A failed write leaves the old file intact")
+        
+        # Damage is reported when the checksum no longer matches
+        with open(temp_file, 'r+b') as f:
+            f.seek(30)
+            f.write(b"X")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            TodoFileManager(temp_file).read_todos()
+        assert "checksum mismatch" in output.getvalue()
+        print("✅ Checksum mismatch is detected")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        os.replace = original_replace
+        for file in [temp_file, temp_file + ".lock", backup_file, temp_file + ".tmp"]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_backup_snapshots():
+    """Test incremental backup snapshots and point-in-time restore"""
+    print("\n🧪 Testing backup snapshots...")
+    
+    temp_file = "test_snap_todos.txt"
+    backup_file = "test_snap_todos_backup.txt"
+    
+    try:
+        # An old single-copy backup is read as one snapshot
+        with open(backup_file, 'w', encoding='utf-8') as f:
+            f.write("2024-10-24 10:30:15|High|Pending|Old backup task\n")
+        fm = TodoFileManager(temp_file, backup_file, backup_retention=3)
+        assert [b['count'] for b in fm.list_backups()] == [1]
+        
+        for i in range(50):
+            fm.add_todo(f"Task {i}", "Medium")
+        assert fm.create_backup() == True
+        size = os.path.getsize(backup_file)
+        
+        # A second snapshot only stores the changed todo
+        assert fm.update_todo_status(3, "Completed") == True
+        assert fm.create_backup() == True
+        grown = os.path.getsize(backup_file) - size
+        assert grown < 200, f"Snapshot of one change took {grown} bytes"
+        print("✅ Snapshots only store changes")
+        
+        # Restore an older point in time
+        assert fm.delete_todo(0) == True
+        assert fm.create_backup() == True
+        backups = fm.list_backups()
+        assert [b['count'] for b in backups] == [1, 50, 50, 49]
+        assert fm.restore_backup(backups[1]['index']) == True
+        todos = fm.read_todos()
+        assert len(todos) == 50 and todos[3]['status'] == "Pending"
+        assert fm.restore_backup() == True
+        todos = fm.read_todos()
+        assert len(todos) == 49 and todos[2]['status'] == "Completed"
+        assert fm.restore_backup(0) == True
+        assert fm.read_todos()[0]['task'] == "Old backup task"
+        print("✅ Restore picks a point in time")
+        
+        # Reaching 2 * retention snapshots drops all but the newest 3
+        for i in range(3):
+            fm.add_todo(f"Extra {i}", "Low")
+            assert fm.create_backup() == True
+        backups = TodoFileManager(temp_file, backup_file).list_backups()
+        assert [b['count'] for b in backups] == [49, 2, 3, 4]
+        assert TodoFileManager(temp_file, backup_file).restore_backup(0) == True
+        assert len(TodoFileManager(temp_file, backup_file).read_todos()) == 49
+        print("✅ Retention keeps the newest snapshots")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_todo_records():
+    """Test the compact Todo record type"""
+    print("\n🧪 Testing todo records...")
+    
+    import tracemalloc
+    import file_manager
+    from todo_record import Priority, Status, Todo
+    temp_file = "test_record_todos.txt"
+    backup_file = "test_record_todos_backup.txt"
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.add_todo("Enum task", Priority.HIGH)
+        fm.add_todo("Label task", "Low")
+        assert fm.add_todo("Bad priority", "Urgent") == False
+        
+        todo = fm.read_todos()[0]
+        assert isinstance(todo, Todo) and not hasattr(todo, '__dict__')
+        assert todo.priority == Priority.HIGH and todo.status == Status.PENDING
+        assert todo.priority < Priority.LOW
+        assert todo.created.strftime("%Y-%m-%d %H:%M:%S") == todo.timestamp
+        print("✅ Records carry enums and a parsed timestamp")
+        
+        # Item access still speaks the data file labels
+        assert todo['priority'] == "High" and todo['status'] == "Pending"
+        assert dict(todo)['task'] == "Enum task"
+        assert fm.update_todo_status_by_id(todo.id, Status.COMPLETED) == True
+        assert fm.get_todo(todo.id)['status'] == "Completed"
+        assert fm.write_todos([todo.to_dict()]) == True
+        assert fm.read_todos() == [todo]
+        print("✅ Dictionary style access still works")
+        
+        line = "2024-10-24 10:30:15|Medium|Pending|Measure me"
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        dicts = [dict(zip(('timestamp', 'priority', 'status', 'task'), line.split('|', 3)))
+                 for _ in range(2000)]
+        dict_bytes = tracemalloc.get_traced_memory()[0] - before
+        del dicts
+        before = tracemalloc.get_traced_memory()[0]
+        records = [file_manager._parse_todo_line(line) for _ in range(2000)]
+        record_bytes = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del records
+        assert record_bytes * 2 < dict_bytes, f"{record_bytes} vs {dict_bytes} bytes"
+        print(f"✅ Records use {dict_bytes / record_bytes:.1f}x less memory than dictionaries")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_streaming_reads():
+    """Test iter_todos() and the reads built on it"""
+    print("\n🧪 Testing streaming reads...")
+    
+    import tracemalloc
+    from todo_record import Priority, Status
+    temp_file = "test_stream_todos.txt"
+    backup_file = "test_stream_todos_backup.txt"
+    export_file = "test_stream_export.csv"
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file, storage_mode="log")
+        with fm.batch():
+            for i in range(20):
+                fm.add_todo(f"Stream task {i}", ["High", "Medium", "Low"][i % 3])
+        fm.compact()
+        
+        # Changes that so far only exist in the log
+        todos = fm.read_todos()
+        fm.update_todo_status_by_id(todos[0]['id'], "Completed")
+        fm.update_todo_status_by_id(todos[1]['id'], "Completed")
+        fm.clear_completed()
+        fm.update_todo_status_by_id(todos[3]['id'], "Completed")
+        fm.update_todo_task_by_id(todos[4]['id'], "Renamed in log")
+        fm.add_todo("Added in log", "High")
+        expected = fm.read_todos()
+        expected_stats = fm.get_statistics()
+        
+        cold = TodoFileManager(temp_file, backup_file, storage_mode="log")
+        assert list(cold.iter_todos()) == expected
+        assert cold._cache is None, "Streaming should not fill the cache"
+        print("✅ iter_todos() streams the file with the log applied")
+        
+        completed = list(cold.iter_todos(status=Status.COMPLETED))
+        assert [t.id for t in completed] == [todos[3]['id']]
+        high = list(cold.iter_todos(status="Pending", priority=Priority.HIGH))
+        assert [t.task for t in high] == [t.task for t in expected
+                                          if t.priority == Priority.HIGH and t.status == Status.PENDING]
+        first = next(cold.iter_todos(lambda todo: "log" in todo.task))
+        assert first.task == "Renamed in log"
+        print("✅ Status, priority and predicate filters work")
+        
+        assert cold.get_statistics() == expected_stats
+        assert [t.id for t in cold.search_todos("task 1")] == [t.id for t in fm.search_todos("task 1")]
+        assert cold.export_todos(export_file, "csv") == True
+        with open(export_file, 'r', encoding='utf-8') as f:
+            assert len(f.read().splitlines()) == len(expected) + 1
+        assert cold._cache is None
+        print("✅ Statistics, search and export stream without loading")
+        
+        # Old lines without IDs are migrated, so the IDs returned stay valid
+        def write_legacy():
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write("a1b2c3d4e5f6|2024-01-01 09:00:00|High|Pending|Modern task\n"
+                        "b1c2d3e4f5a6|2024-01-02 09:00:00|Low|Completed|Modern done\n"
+                        "2024-01-03 09:00:00|Medium|Pending|Legacy task one\n"
+                        "2024-01-04 09:00:00|Low|Pending|Legacy task two\n")
+            if os.path.exists(temp_file + ".log"):
+                os.remove(temp_file + ".log")
+        write_legacy()
+        streamed = list(TodoFileManager(temp_file, backup_file).iter_todos(status="Pending"))
+        assert [t.task for t in streamed] == ["Modern task", "Legacy task one", "Legacy task two"], \
+            "Streaming past old lines should yield every todo once"
+        write_legacy()
+        cold = TodoFileManager(temp_file, backup_file)
+        found = cold.search_todos("legacy two")
+        assert len(found) == 1 and cold.update_todo_status_by_id(found[0].id, "Completed"), \
+            "IDs from search_todos() should be accepted by the *_by_id methods"
+        write_legacy()
+        cold = TodoFileManager(temp_file, backup_file)
+        oldest = cold.sorted_todos('created', status="Pending", limit=2, reverse=True)
+        assert [t.task for t in oldest] == ["Legacy task two", "Legacy task one"]
+        assert all(cold.delete_todo_by_id(t.id) for t in oldest), \
+            "IDs from sorted_todos() should be accepted by the *_by_id methods"
+        print("✅ Streaming reads of old-format lines return persistent IDs")
+        
+        # Streaming keeps memory flat, loading does not
+        fm = TodoFileManager(temp_file, backup_file)
+        fm.write_todos([])
+        with fm.batch():
+            for i in range(3000):
+                fm.add_todo(f"Bulk task {i}", "Low")
+        tracemalloc.start()
+        sum(1 for _ in TodoFileManager(temp_file, backup_file).iter_todos())
+        streamed = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        len(TodoFileManager(temp_file, backup_file).read_todos())
+        loaded = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert streamed * 5 < loaded, f"{streamed} vs {loaded} bytes"
+        print(f"✅ Streaming peak {streamed // 1024} KB vs {loaded // 1024} KB loaded")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file, temp_file + ".log", export_file,
+                     temp_file + ".idx", temp_file + ".search"]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_mapped_reads():
+    """Test paging through a memory-mapped data file"""
+    print("\n🧪 Testing memory-mapped reads...")
+    
+    temp_file = "test_mapped_todos.txt"
+    backup_file = "test_mapped_todos_backup.txt"
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file)
+        with fm.batch():
+            for i in range(5000):
+                fm.add_todo(f"Mapped task {i}", "Medium")
+        expected = fm.read_todos()
+        
+        cold = TodoFileManager(temp_file, backup_file)
+        assert cold.read_page(0, 10) == expected[:10]
+        assert cold.read_page(4995, 10) == expected[4995:]
+        assert cold._cache is None, "Paging should not parse the whole file"
+        assert len(cold._mapped) == 5000
+        assert cold._mapped.offset(3) == fm.get_offset(expected[3].id)
+        print("✅ Pages are decoded from the memory map")
+        
+        # The map follows changes to the file
+        fm.update_todo_task_by_id(expected[1].id, "Changed")
+        assert cold.read_page(1, 1)[0].task == "Changed"
+        fm.add_todo("Appended", "High")
+        assert cold.read_page(5000, 5)[0].task == "Appended"
+        
+        # Old lines without IDs fall back to a full load
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write("2024-10-24 10:30:15|High|Pending|Old format\n")
+        page = TodoFileManager(temp_file, backup_file).read_page(0, 5)
+        assert len(page) == 1 and page[0].id is not None
+        print("✅ Paging follows file changes and migrations")
+        
+        # Malformed lines take no place in the pages
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            for i in range(6):
+                f.write(f"id{i:010d}|2024-10-24 10:30:15|High|Pending|t{i}\n")
+                if i == 1:
+                    f.write("not a todo line\n")
+        expected = [todo.task for todo in TodoFileManager(temp_file, backup_file).read_todos()]
+        cold = TodoFileManager(temp_file, backup_file)
+        pages = [[todo.task for todo in cold.read_page(start, 3)] for start in (0, 3)]
+        assert cold._cache is None
+        assert pages == [expected[:3], expected[3:]] == [["t0", "t1", "t2"], ["t3", "t4", "t5"]], pages
+        print("✅ Pages skip malformed lines")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        for file in [temp_file, temp_file + ".lock", backup_file, temp_file + ".idx"]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_index_files():
+    """Test the sidecar index files used when nothing is cached"""
+    print("\n🧪 Testing sidecar index files...")
+    
+    import index_files
+    temp_file = "test_sidecar_todos.txt"
+    backup_file = "test_sidecar_todos_backup.txt"
+    scans = []
+    original_scan = index_files._IndexFile._scan
+    
+    def counting_scan(self, position):
+        scans.append((self.SUFFIX, position))
+        return original_scan(self, position)
+    
+    try:
+        fm = TodoFileManager(temp_file, backup_file)
+        with fm.batch():
+            for i in range(3000):
+                fm.add_todo(f"Sidecar task {i}", ["High", "Medium", "Low"][i % 3])
+                if i % 4 == 0:
+                    fm.update_todo_status(i, "Completed")
+        
+        cold = TodoFileManager(temp_file, backup_file)
+        assert cold.get_statistics() == fm.get_statistics()
+        assert cold.search_todos("task 12") == fm.search_todos("task 12")
+        assert os.path.exists(temp_file + ".idx") and os.path.exists(temp_file + ".search")
+        
+        index_files._IndexFile._scan = counting_scan
+        cold = TodoFileManager(temp_file, backup_file)
+        assert cold.get_statistics() == fm.get_statistics()
+        assert cold.search_todos("sidecar 29") == fm.search_todos("sidecar 29")
+        assert cold.read_page(10, 5) == fm.read_todos()[10:15]
+        assert scans == [], f"Index files were rebuilt: {scans}"
+        assert cold._cache is None
+        print("✅ Index files are loaded instead of rebuilt")
+        
+        # Appended lines are indexed on their own
+        fm.add_todo("Appended sidecar task", "High")
+        cold = TodoFileManager(temp_file, backup_file)
+        assert cold.get_statistics() == fm.get_statistics()
+        assert [t.task for t in cold.search_todos("appended")] == ["Appended sidecar task"]
+        assert scans and all(position > 0 for _, position in scans)
+        
+        # A rewrite keeps the line index current
+        scans.clear()
+        assert fm.update_todo_status(1, "Completed") == True
+        cold = TodoFileManager(temp_file, backup_file)
+        assert cold.get_statistics() == fm.get_statistics()
+        assert (".idx", 0) not in scans
+        print("✅ Index files follow appends and rewrites")
+        
+        # A same-size edit by hand makes the index files stale
+        assert TodoFileManager(temp_file, backup_file).search_todos("tack") == []
+        with open(temp_file, 'rb') as f:
+            data = f.read()
+        with open(temp_file, 'wb') as f:
+            f.write(data.replace(b"|Sidecar task 7\n", b"|Sidecar tack 7\n"))
+        stat = os.stat(temp_file)
+        os.utime(temp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        cold = TodoFileManager(temp_file, backup_file)
+        assert [t.task for t in cold.search_todos("tack")] == ["Sidecar tack 7"], \
+            "A same-size edit should be found"
+        print("✅ Same-size edits rebuild the index files")
+        
+        # A damaged index file is rebuilt
+        with open(temp_file + ".idx", 'r+b') as f:
+            f.truncate(100)
+        assert TodoFileManager(temp_file, backup_file).get_statistics() == fm.get_statistics()
+        print("✅ Damaged index files are rebuilt")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        index_files._IndexFile._scan = original_scan
+        for file in [temp_file, temp_file + ".lock", backup_file, temp_file + ".idx",
+                     temp_file + ".search"]:
+            if os.path.exists(file):
+                os.remove(file)
+
 def test_file_validation():
     """Test the file validation functionality"""
     print("\n🧪 Testing file validation...")
@@ -171,6 +1910,63 @@ def test_file_validation():
         print(f"❌ File validation test failed: {e}")
         return False
 
+def test_parallel_validation():
+    """Test the full error report of the (parallel) file validator"""
+    print("\n🧪 Testing parallel validation...")
+    
+    test_file = "test_parallel_validation.txt"
+    
+    try:
+        import todo_validation
+        from todo_validation import find_invalid_lines
+        
+        lines = []
+        expected = []
+        for i in range(1, 3001):
+            if i % 500 == 0:
+                lines.append(f"2024-02-30 10:00:00|High|Pending|Task {i}")
+                expected.append((i, 'timestamp', "2024-02-30 10:00:00"))
+            elif i % 700 == 0:
+                lines.append(f"abc{i}|2024-02-01 10:00:00|Urgent|Done|Task {i}")
+                expected.append((i, 'priority', "Urgent"))
+                expected.append((i, 'status', "Done"))
+            elif i % 900 == 0:
+                lines.append("not a todo")
+                expected.append((i, 'format', "not a todo"))
+            elif i % 1000 == 1:
+                lines.append("")
+            else:
+                lines.append(f"2024-02-{1 + i % 28:02d} 10:{i % 60:02d}:00|Low|Completed|Task {i}")
+        with open(test_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n#crc32 00000000\n")
+        
+        assert find_invalid_lines(test_file, processes=1) == expected, "Every bad line should be reported"
+        assert validate_todo_file(test_file) == False, "File with bad lines should be invalid"
+        print("✅ Every bad line is reported with its number")
+        
+        # Force the process pool on a small file
+        original_min_size = todo_validation.PARALLEL_MIN_SIZE
+        todo_validation.PARALLEL_MIN_SIZE = 0
+        try:
+            for processes in (2, 3, 7):
+                assert find_invalid_lines(test_file, processes) == expected, \
+                    f"{processes} processes should find the same lines"
+        finally:
+            todo_validation.PARALLEL_MIN_SIZE = original_min_size
+        print("✅ Byte ranges validated in parallel give the same report")
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
 def test_config_import():
     """Test configuration import"""
     print("\n🧪 Testing configuration import...")
@@ -230,7 +2026,29 @@ def main():
     tests = [
         ("Configuration Import", test_config_import),
         ("File Manager", test_file_manager),
+        ("Read Cache", test_read_cache),
+        ("Log Storage", test_log_storage),
+        ("Record IDs", test_record_ids),
+        ("SQLite Backend", test_sqlite_backend),
+        ("Statistics Counters", test_statistics_counters),
+        ("Search Index", test_search_index),
+        ("Sorted Views", test_sorted_views),
+        ("Paged Queries", test_paged_queries),
+        ("Search Worker", test_search_worker),
+        ("I/O Worker", test_io_worker),
+        ("Concurrent Instances", test_concurrent_instances),
+        ("Archive", test_archive),
+        ("Batch Writes", test_batch_writes),
+        ("Atomic Writes", test_atomic_writes),
+        ("Backup Snapshots", test_backup_snapshots),
+        ("Todo Records", test_todo_records),
+        ("Streaming Reads", test_streaming_reads),
+        ("Streaming Export", test_streaming_export),
+        ("Bulk Import", test_bulk_import),
+        ("Mapped Reads", test_mapped_reads),
+        ("Index Files", test_index_files),
         ("File Validation", test_file_validation),
+        ("Parallel Validation", test_parallel_validation),
         ("GUI Module Import", test_gui_import),
     ]
     
@@ -1,7 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
-import os
+from file_manager import create_file_manager
+from io_worker import IOWorker, SaveStatusLabel, is_provisional, provisional_todo
+from sort_index import SORT_CHOICES, insert_position
+from todo_record import Status
+from config import APP_CONFIG
 
 class TodoApp:
     def __init__(self, root):
@@ -10,14 +14,22 @@ class TodoApp:
         self.root.geometry("600x500")
         self.root.configure(bg='#f0f0f0')
         
-        # Data file path
-        self.data_file = "todos.txt"
+        # Data file access (shared format with the other versions)
+        self.file_manager = create_file_manager(APP_CONFIG)
+        # Changes are shown at once and saved in the background
+        self.io_worker = IOWorker()
+        
+        # Todos shown in the listbox, one per row
+        self.rows = []
         
         # Create the GUI
         self.create_widgets()
         
         # Load existing todos
         self.load_todos()
+        
+        # Pick up changes made by other windows on the same file
+        self.root.after(APP_CONFIG['watch_interval'], self.watch_file)
     
     def create_widgets(self):
         # Title
@@ -55,6 +67,16 @@ class TodoApp:
                                      state="readonly", width=10)
         priority_combo.pack(side='left', padx=(5, 0))
         
+        self.sort_var = tk.StringVar(value="File order")
+        sort_combo = ttk.Combobox(priority_frame, textvariable=self.sort_var,
+                                  values=list(SORT_CHOICES),
+                                  state="readonly", width=12)
+        sort_combo.pack(side='right')
+        sort_combo.bind('<<ComboboxSelected>>', lambda event: self.refresh_display())
+        
+        tk.Label(priority_frame, text="Sort by:", 
+                font=("Arial", 10), bg='#f0f0f0').pack(side='right', padx=(0, 5))
+        
         # Listbox frame
         list_frame = tk.Frame(self.root, bg='#f0f0f0')
         list_frame.pack(pady=10, padx=20, fill='both', expand=True)
@@ -107,10 +129,15 @@ class TodoApp:
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
-        status_bar = tk.Label(self.root, textvariable=self.status_var,
-                             relief='sunken', anchor='w',
+        status_frame = tk.Frame(self.root, relief='sunken', borderwidth=1, bg='#e0e0e0')
+        status_frame.pack(side='bottom', fill='x')
+        status_bar = tk.Label(status_frame, textvariable=self.status_var,
+                             anchor='w',
                              bg='#e0e0e0', font=("Arial", 9))
-        status_bar.pack(side='bottom', fill='x')
+        status_bar.pack(side='left', fill='x', expand=True)
+        self.save_status = SaveStatusLabel(status_frame, self.io_worker,
+                                           bg='#e0e0e0', font=("Arial", 9))
+        self.save_status.pack(side='right', padx=5)
     
     def add_task(self):
         task_text = self.task_entry.get().strip()
@@ -119,72 +146,78 @@ class TodoApp:
             return
         
         priority = self.priority_var.get()
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Create task string: TIMESTAMP|PRIORITY|STATUS|TASK
-        task_line = f"{timestamp}|{priority}|Pending|{task_text}"
-        
-        # Add to listbox with color coding
-        display_text = f"[{priority}] {task_text} ({timestamp})"
-        self.task_listbox.insert(tk.END, display_text)
         
-        # Color code by priority
-        index = self.task_listbox.size() - 1
-        if priority == "High":
-            self.task_listbox.itemconfig(index, {'fg': 'red'})
-        elif priority == "Medium":
-            self.task_listbox.itemconfig(index, {'fg': 'orange'})
-        else:
-            self.task_listbox.itemconfig(index, {'fg': 'green'})
-        
-        # Save to file
-        self.save_task(task_line)
+        # List the task in its place in the sort order right away; it
+        # gets its real ID once saved
+        todo = provisional_todo(task_text, priority)
+        sort, reverse = SORT_CHOICES[self.sort_var.get()]
+        index = insert_position(self.rows, todo, sort, reverse)
+        self.rows.insert(index, todo)
+        self.task_listbox.insert(index, self.row_text(todo))
+        self.task_listbox.itemconfig(index, {'fg': self.row_color(todo)})
+        self.task_listbox.see(index)
+        self.queue_write("Add task", self.file_manager.add_todo, task_text, priority)
         
         # Clear entry
         self.task_entry.delete(0, tk.END)
         self.status_var.set(f"Task added: {task_text}")
     
-    def save_task(self, task_line):
-        try:
-            with open(self.data_file, 'a', encoding='utf-8') as file:
-                file.write(task_line + '\n')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save task: {str(e)}")
-    
     def load_todos(self):
-        if not os.path.exists(self.data_file):
-            return
-        
-        try:
-            with open(self.data_file, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-            
-            for line in lines:
-                line = line.strip()
-                if line:
-                    parts = line.split('|', 3)
-                    if len(parts) == 4:
-                        timestamp, priority, status, task_text = parts
-                        
-                        if status == "Completed":
-                            display_text = f"✓ [{priority}] {task_text} ({timestamp})"
-                            self.task_listbox.insert(tk.END, display_text)
-                            index = self.task_listbox.size() - 1
-                            self.task_listbox.itemconfig(index, {'fg': 'gray'})
-                        else:
-                            display_text = f"[{priority}] {task_text} ({timestamp})"
-                            self.task_listbox.insert(tk.END, display_text)
-                            index = self.task_listbox.size() - 1
-                            
-                            if priority == "High":
-                                self.task_listbox.itemconfig(index, {'fg': 'red'})
-                            elif priority == "Medium":
-                                self.task_listbox.itemconfig(index, {'fg': 'orange'})
-                            else:
-                                self.task_listbox.itemconfig(index, {'fg': 'green'})
-                                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load tasks: {str(e)}")
+        sort, reverse = SORT_CHOICES[self.sort_var.get()]
+        todos = self.file_manager.sorted_todos(sort, reverse=reverse)
+        self.rows = list(todos)
+        
+        for todo in todos:
+            self.task_listbox.insert(tk.END, self.row_text(todo))
+            index = self.task_listbox.size() - 1
+            self.task_listbox.itemconfig(index, {'fg': self.row_color(todo)})
+    
+    def row_text(self, todo):
+        if todo.status == Status.COMPLETED:
+            return f"✓ [{todo.priority.label}] {todo.task} ({todo.timestamp})"
+        return f"[{todo.priority.label}] {todo.task} ({todo.timestamp})"
+    
+    def row_color(self, todo):
+        if todo.status == Status.COMPLETED:
+            return 'gray'
+        if todo.priority.label == "High":
+            return 'red'
+        elif todo.priority.label == "Medium":
+            return 'orange'
+        return 'green'
+    
+    def watch_file(self):
+        # While our own writes are queued the file is about to change
+        # anyway; after_write() catches up once they are done
+        if not self.io_worker.pending and self.file_manager.poll_changes():
+            sort, reverse = SORT_CHOICES[self.sort_var.get()]
+            self.update_rows(self.file_manager.sorted_todos(sort, reverse=reverse))
+            self.status_var.set("List updated by another window")
+        self.root.after(APP_CONFIG['watch_interval'], self.watch_file)
+    
+    def update_rows(self, todos):
+        """Show todos in the listbox, redrawing only the rows that differ"""
+        for index, todo in enumerate(todos):
+            if index < len(self.rows):
+                if self.rows[index] == todo:
+                    continue
+                self.task_listbox.delete(index)
+                self.rows[index] = todo
+            else:
+                self.rows.append(todo)
+            self.task_listbox.insert(index, self.row_text(todo))
+            self.task_listbox.itemconfig(index, {'fg': self.row_color(todo)})
+        
+        if len(todos) < len(self.rows):
+            self.task_listbox.delete(len(todos), tk.END)
+            del self.rows[len(todos):]
+    
+    def still_saving(self, index):
+        """Whether the row is a new task not saved yet, which can't be changed yet"""
+        if is_provisional(self.rows[index].id):
+            self.status_var.set("The task is still being saved, try again in a moment")
+            return True
+        return False
     
     def complete_task(self):
         selection = self.task_listbox.curselection()
@@ -193,11 +226,15 @@ class TodoApp:
             return
         
         index = selection[0]
-        self.update_task_status(index, "Completed")
+        if self.still_saving(index):
+            return
+        self.update_task_status(index, Status.COMPLETED)
         
         # Update display
         current_text = self.task_listbox.get(index)
         if not current_text.startswith("✓"):
+            self.rows[index] = self.rows[index].copy()
+            self.rows[index].status = Status.COMPLETED
             new_text = "✓ " + current_text
             self.task_listbox.delete(index)
             self.task_listbox.insert(index, new_text)
@@ -216,6 +253,8 @@ class TodoApp:
         # Extract task text from display format
         if current_text.startswith("✓"):
             return  # Don't edit completed tasks
+        if self.still_saving(index):
+            return
         
         # Parse the current task text
         task_data = self.get_task_data_by_index(index)
@@ -224,11 +263,14 @@ class TodoApp:
         
         new_task = simpledialog.askstring("Edit Task", 
                                          "Edit task:", 
-                                         initialvalue=task_data['task'])
+                                         initialvalue=task_data.task)
         if new_task and new_task.strip():
-            task_data['task'] = new_task.strip()
+            task_data.task = new_task.strip()
             self.update_task_in_file(index, task_data)
-            self.refresh_display()
+            self.rows[index] = task_data
+            self.task_listbox.delete(index)
+            self.task_listbox.insert(index, self.row_text(task_data))
+            self.task_listbox.itemconfig(index, {'fg': self.row_color(task_data)})
             self.status_var.set("Task updated!")
     
     def delete_task(self):
@@ -237,75 +279,62 @@ class TodoApp:
             messagebox.showwarning("Warning", "Please select a task to delete!")
             return
         
+        if self.still_saving(selection[0]):
+            return
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this task?"):
             index = selection[0]
             self.remove_task_from_file(index)
             self.task_listbox.delete(index)
+            del self.rows[index]
             self.status_var.set("Task deleted!")
     
     def clear_completed(self):
         if messagebox.askyesno("Confirm Clear", "Remove all completed tasks?"):
+            for index in reversed(range(len(self.rows))):
+                if self.rows[index].status == Status.COMPLETED:
+                    self.task_listbox.delete(index)
+                    del self.rows[index]
             self.remove_completed_from_file()
-            self.refresh_display()
             self.status_var.set("Completed tasks cleared!")
     
     def get_task_data_by_index(self, index):
-        tasks = self.read_all_tasks()
-        if 0 <= index < len(tasks):
-            parts = tasks[index].split('|', 3)
-            if len(parts) == 4:
-                return {
-                    'timestamp': parts[0],
-                    'priority': parts[1],
-                    'status': parts[2],
-                    'task': parts[3]
-                }
+        # The row shows the todo as saved or queued to be saved; reading
+        # the file instead would wait for a write that is still running
+        if 0 <= index < len(self.rows):
+            return self.rows[index].copy()
         return None
     
-    def read_all_tasks(self):
-        if not os.path.exists(self.data_file):
-            return []
-        
-        try:
-            with open(self.data_file, 'r', encoding='utf-8') as file:
-                return [line.strip() for line in file.readlines() if line.strip()]
-        except:
-            return []
-    
     def update_task_status(self, index, new_status):
-        tasks = self.read_all_tasks()
-        if 0 <= index < len(tasks):
-            parts = tasks[index].split('|', 3)
-            if len(parts) == 4:
-                parts[2] = new_status
-                tasks[index] = '|'.join(parts)
-                self.write_all_tasks(tasks)
+        self.queue_write("Complete task", self.file_manager.update_todo_status_by_id,
+                         self.rows[index].id, new_status)
     
     def update_task_in_file(self, index, task_data):
-        tasks = self.read_all_tasks()
-        if 0 <= index < len(tasks):
-            new_line = f"{task_data['timestamp']}|{task_data['priority']}|{task_data['status']}|{task_data['task']}"
-            tasks[index] = new_line
-            self.write_all_tasks(tasks)
+        self.queue_write("Edit task", self.file_manager.update_todo_task_by_id,
+                         task_data.id, task_data.task)
     
     def remove_task_from_file(self, index):
-        tasks = self.read_all_tasks()
-        if 0 <= index < len(tasks):
-            tasks.pop(index)
-            self.write_all_tasks(tasks)
+        self.queue_write("Delete task", self.file_manager.delete_todo_by_id, self.rows[index].id)
     
     def remove_completed_from_file(self):
-        tasks = self.read_all_tasks()
-        tasks = [task for task in tasks if not task.split('|')[2] == "Completed"]
-        self.write_all_tasks(tasks)
+        self.queue_write("Clear completed", self.file_manager.clear_completed)
+    
+    def queue_write(self, description, function, *args):
+        """Save a change in the background, see IOWorker"""
+        self.io_worker.submit(description, function, *args, on_done=self.after_write)
+        self.save_status.track()
     
-    def write_all_tasks(self, tasks):
-        try:
-            with open(self.data_file, 'w', encoding='utf-8') as file:
-                for task in tasks:
-                    file.write(task + '\n')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save tasks: {str(e)}")
+    def after_write(self, ok):
+        """Show the list as saved once the queued writes have finished
+        
+        Only rows that differ from the file are redrawn: new tasks, which
+        get their real ID and move to their place, and the tasks of a
+        change that failed to save.
+        """
+        if not ok:
+            messagebox.showerror("Error", "Failed to save tasks!")
+        if not self.io_worker.pending:
+            sort, reverse = SORT_CHOICES[self.sort_var.get()]
+            self.update_rows(self.file_manager.sorted_todos(sort, reverse=reverse))
     
     def refresh_display(self):
         self.task_listbox.delete(0, tk.END)
@@ -3,14 +3,26 @@ Todo App V2 - Sticky Notes Design
 Inspired by Microsoft Sticky Notes
 """
 
+import os
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, font
 from datetime import datetime
-from file_manager import TodoFileManager
+from tkinter import ttk, messagebox, simpledialog, font
+from file_manager import create_file_manager
+from export_dialog import ExportProgressDialog
+from io_worker import IOWorker, SaveStatusLabel, is_provisional, provisional_todo
+from search_worker import SearchWorker
+from todo_import import IMPORT_FORMATS
+from sort_index import SORT_CHOICES, insert_position
+from todo_record import PRIORITY_LABELS, Priority, Status, Todo
+from config import APP_CONFIG
 import random
 
 class StickyNote(tk.Frame):
-    """Individual sticky note widget"""
+    """Individual sticky note widget
+    
+    Notes are recycled: show() binds a note to another todo by
+    reconfiguring its widgets instead of building new ones.
+    """
     
     COLORS = {
         'yellow': '#FFFF88',
@@ -22,33 +34,20 @@ class StickyNote(tk.Frame):
     }
     
     def __init__(self, parent, todo_data, index, on_delete, on_update, on_complete):
-        super().__init__(parent)
+        super().__init__(parent, relief='raised', borderwidth=2)
         
-        self.todo_data = todo_data
-        self.index = index
         self.on_delete = on_delete
         self.on_update = on_update
         self.on_complete = on_complete
-        
-        # Determine color based on priority or status
-        if todo_data['status'] == 'Completed':
-            bg_color = '#D0D0D0'  # Gray for completed
-        else:
-            priority_colors = {
-                'High': 'pink',
-                'Medium': 'yellow',
-                'Low': 'green'
-            }
-            color_name = priority_colors.get(todo_data['priority'], 'blue')
-            bg_color = self.COLORS[color_name]
-        
-        self.bg_color = bg_color
-        self.configure(bg=bg_color, relief='raised', borderwidth=2)
+        # Canvas item of the note, set by the canvas that places it
+        self.canvas_item = None
+        self.todo_data = None
         
         # Shadow effect
         self.configure(highlightbackground='#888888', highlightthickness=1)
         
         self.create_widgets()
+        self.show(todo_data, index)
         
         # Hover effects
         self.bind('<Enter>', self.on_enter)
@@ -56,43 +55,38 @@ class StickyNote(tk.Frame):
     
     def create_widgets(self):
         # Header frame with priority and timestamp
-        header_frame = tk.Frame(self, bg=self.bg_color)
-        header_frame.pack(fill='x', padx=5, pady=(5, 2))
+        self.header_frame = tk.Frame(self)
+        self.header_frame.pack(fill='x', padx=5, pady=(5, 2))
         
         # Priority badge
-        priority_badge = tk.Label(
-            header_frame,
-            text=self.todo_data['priority'],
-            bg=self.get_priority_badge_color(),
+        self.priority_badge = tk.Label(
+            self.header_frame,
             fg='white',
             font=('Arial', 8, 'bold'),
             padx=6,
             pady=2,
             relief='flat'
         )
-        priority_badge.pack(side='left')
+        self.priority_badge.pack(side='left')
         
         # Timestamp
-        time_label = tk.Label(
-            header_frame,
-            text=self.format_timestamp(),
-            bg=self.bg_color,
+        self.time_label = tk.Label(
+            self.header_frame,
             fg='#555555',
             font=('Arial', 7)
         )
-        time_label.pack(side='right')
+        self.time_label.pack(side='right')
         
         # Task text
-        task_frame = tk.Frame(self, bg=self.bg_color)
-        task_frame.pack(fill='both', expand=True, padx=8, pady=5)
+        self.task_frame = tk.Frame(self)
+        self.task_frame.pack(fill='both', expand=True, padx=8, pady=5)
         
         # Scrollable text area
-        task_text = tk.Text(
-            task_frame,
+        self.task_text = tk.Text(
+            self.task_frame,
             wrap='word',
             height=4,
             width=25,
-            bg=self.bg_color,
             fg='#000000',
             font=('Segoe UI', 10),
             relief='flat',
@@ -101,57 +95,37 @@ class StickyNote(tk.Frame):
             padx=5,
             pady=5
         )
-        task_text.pack(fill='both', expand=True)
-        task_text.insert('1.0', self.todo_data['task'])
+        self.task_text.pack(fill='both', expand=True)
         
-        # Add strikethrough if completed
-        if self.todo_data['status'] == 'Completed':
-            task_text.tag_add('completed', '1.0', 'end')
-            task_text.tag_config('completed', overstrike=True, foreground='#666666')
-        
-        task_text.config(state='disabled')
+        # Strikethrough for completed tasks
+        self.task_text.tag_config('completed', overstrike=True, foreground='#666666')
         
         # Double click to edit
-        task_text.bind('<Double-Button-1>', lambda e: self.edit_task())
+        self.task_text.bind('<Double-Button-1>', lambda e: self.edit_task())
         
         # Action buttons frame
-        action_frame = tk.Frame(self, bg=self.bg_color)
-        action_frame.pack(fill='x', padx=5, pady=(0, 5))
+        self.action_frame = tk.Frame(self)
+        self.action_frame.pack(fill='x', padx=5, pady=(0, 5))
         
         button_font = ('Segoe UI', 8)
         
         # Complete/Uncomplete button
-        if self.todo_data['status'] == 'Completed':
-            complete_btn = tk.Button(
-                action_frame,
-                text='↶ Undo',
-                command=lambda: self.on_complete(self.index, 'Pending'),
-                bg='#4CAF50',
-                fg='white',
-                font=button_font,
-                relief='flat',
-                cursor='hand2',
-                padx=5,
-                pady=2
-            )
-        else:
-            complete_btn = tk.Button(
-                action_frame,
-                text='✓ Done',
-                command=lambda: self.on_complete(self.index, 'Completed'),
-                bg='#4CAF50',
-                fg='white',
-                font=button_font,
-                relief='flat',
-                cursor='hand2',
-                padx=5,
-                pady=2
-            )
-        complete_btn.pack(side='left', padx=2)
+        self.complete_btn = tk.Button(
+            self.action_frame,
+            command=self.toggle_complete,
+            bg='#4CAF50',
+            fg='white',
+            font=button_font,
+            relief='flat',
+            cursor='hand2',
+            padx=5,
+            pady=2
+        )
+        self.complete_btn.pack(side='left', padx=2)
         
         # Edit button
         edit_btn = tk.Button(
-            action_frame,
+            self.action_frame,
             text='✎ Edit',
             command=self.edit_task,
             bg='#2196F3',
@@ -166,9 +140,9 @@ class StickyNote(tk.Frame):
         
         # Delete button
         delete_btn = tk.Button(
-            action_frame,
+            self.action_frame,
             text='🗑 Delete',
-            command=lambda: self.on_delete(self.index),
+            command=lambda: self.on_delete(self.todo_data.id),
             bg='#f44336',
             fg='white',
             font=button_font,
@@ -179,34 +153,85 @@ class StickyNote(tk.Frame):
         )
         delete_btn.pack(side='right', padx=2)
     
+    def show(self, todo_data, index):
+        """Show a todo on the note
+        
+        Only the widgets whose content differs from the todo shown
+        before are reconfigured, so patching a note for an edit or a
+        completion costs one or two widget updates.
+        """
+        old = self.todo_data
+        self.todo_data = todo_data
+        self.index = index
+        completed = todo_data.status == Status.COMPLETED
+        
+        if old is None or (old.status, old.priority) != (todo_data.status, todo_data.priority):
+            # Determine color based on priority or status
+            if completed:
+                bg_color = '#D0D0D0'  # Gray for completed
+            else:
+                priority_colors = {
+                    Priority.HIGH: 'pink',
+                    Priority.MEDIUM: 'yellow',
+                    Priority.LOW: 'green'
+                }
+                color_name = priority_colors.get(todo_data.priority, 'blue')
+                bg_color = self.COLORS[color_name]
+            
+            self.bg_color = bg_color
+            for widget in (self, self.header_frame, self.time_label, self.task_frame,
+                           self.task_text, self.action_frame):
+                widget.configure(bg=bg_color)
+            
+            self.priority_badge.configure(text=todo_data.priority.label,
+                                          bg=self.get_priority_badge_color())
+            self.complete_btn.configure(text='↶ Undo' if completed else '✓ Done')
+        
+        if old is None or old.created != todo_data.created:
+            self.time_label.configure(text=self.format_timestamp())
+        
+        if old is None or old.task != todo_data.task:
+            self.task_text.config(state='normal')
+            self.task_text.delete('1.0', 'end')
+            self.task_text.insert('1.0', todo_data.task)
+            self.task_text.config(state='disabled')
+        
+        # Add strikethrough if completed
+        if completed:
+            self.task_text.tag_add('completed', '1.0', 'end')
+        else:
+            self.task_text.tag_remove('completed', '1.0', 'end')
+    
+    def toggle_complete(self):
+        if self.todo_data.status == Status.COMPLETED:
+            self.on_complete(self.todo_data.id, Status.PENDING)
+        else:
+            self.on_complete(self.todo_data.id, Status.COMPLETED)
+    
     def get_priority_badge_color(self):
         colors = {
-            'High': '#E53935',
-            'Medium': '#FB8C00',
-            'Low': '#43A047'
+            Priority.HIGH: '#E53935',
+            Priority.MEDIUM: '#FB8C00',
+            Priority.LOW: '#43A047'
         }
-        return colors.get(self.todo_data['priority'], '#757575')
+        return colors.get(self.todo_data.priority, '#757575')
     
     def format_timestamp(self):
-        try:
-            dt = datetime.strptime(self.todo_data['timestamp'], "%Y-%m-%d %H:%M:%S")
-            return dt.strftime("%b %d, %H:%M")
-        except:
-            return self.todo_data['timestamp'][:16]
+        return self.todo_data.created.strftime("%b %d, %H:%M")
     
     def edit_task(self):
-        if self.todo_data['status'] == 'Completed':
+        if self.todo_data.status == Status.COMPLETED:
             messagebox.showwarning("Warning", "Cannot edit completed tasks!")
             return
         
         new_task = simpledialog.askstring(
             "Edit Task",
             "Edit your task:",
-            initialvalue=self.todo_data['task']
+            initialvalue=self.todo_data.task
         )
         
         if new_task and new_task.strip():
-            self.on_update(self.index, new_task.strip())
+            self.on_update(self.todo_data.id, new_task.strip())
     
     def on_enter(self, event):
         self.configure(relief='groove', borderwidth=3)
@@ -218,6 +243,14 @@ class StickyNote(tk.Frame):
 class TodoAppV2:
     """Main application with sticky notes interface"""
     
+    # Columns of the sticky note grid
+    MAX_COLS = 3
+    # Space around each note
+    NOTE_PAD = 10
+    # Rows of notes kept above and below the window, so short scrolls
+    # find their notes ready
+    OVERSCAN_ROWS = 1
+    
     def __init__(self, root):
         self.root = root
         self.root.title("📝 Todo App - Sticky Notes")
@@ -225,12 +258,29 @@ class TodoAppV2:
         self.root.configure(bg='#F5F5F5')
         
         # Initialize file manager
-        self.file_manager = TodoFileManager()
+        self.file_manager = create_file_manager(APP_CONFIG)
         
         # Current filter
         self.current_filter = 'All'
         self.search_term = ''
         
+        # Changes are shown at once and saved in the background
+        self.io_worker = IOWorker()
+        
+        # The search box searches in the background once typing pauses
+        self.search_after = None
+        self.search_polling = False
+        self.search_worker = SearchWorker(lambda args: self.file_manager.query(**args))
+        
+        # Only the notes in and near the window exist as widgets. Notes
+        # scrolled out go to the pool and are reused for the next ones.
+        self.total_notes = None
+        self.visible_notes = {}  # todo id -> StickyNote
+        self.note_pool = []
+        self.shown_range = None
+        # query() arguments of the page being read behind queued writes
+        self.queued_page = None
+        
         # Create UI
         self.create_menubar()
         self.create_header()
@@ -240,6 +290,9 @@ class TodoAppV2:
         
         # Load todos
         self.refresh_notes()
+        
+        # Pick up changes made by other windows on the same file
+        self.root.after(APP_CONFIG['watch_interval'], self.watch_file)
     
     def create_menubar(self):
         menubar = tk.Menu(self.root)
@@ -255,6 +308,11 @@ class TodoAppV2:
         file_menu.add_separator()
         file_menu.add_command(label="Export as TXT", command=lambda: self.export_todos('txt'))
         file_menu.add_command(label="Export as CSV", command=lambda: self.export_todos('csv'))
+        file_menu.add_command(label="Export as JSON", command=lambda: self.export_todos('json'))
+        file_menu.add_command(label="Export as NDJSON", command=lambda: self.export_todos('ndjson'))
+        self.export_archive_var = tk.BooleanVar(value=False)
+        file_menu.add_checkbutton(label="Include Archive in Exports", variable=self.export_archive_var)
+        file_menu.add_command(label="Import...", command=self.import_todos)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         
@@ -262,6 +320,8 @@ class TodoAppV2:
         edit_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="✎ Edit", menu=edit_menu)
         edit_menu.add_command(label="Clear Completed", command=self.clear_completed)
+        edit_menu.add_command(label="Archive Completed", command=self.archive_completed)
+        edit_menu.add_command(label="Search Archive", command=self.search_archive)
         edit_menu.add_command(label="Clear All", command=self.clear_all)
         
         # View menu
@@ -341,6 +401,20 @@ class TodoAppV2:
             )
             btn.pack(side='left', padx=3)
         
+        # Sort order
+        tk.Label(toolbar, text="Sort:", bg='#FFFFFF', font=('Segoe UI', 10)).pack(side='left', padx=(20, 5))
+        
+        self.sort_var = tk.StringVar(value='File order')
+        sort_combo = ttk.Combobox(
+            toolbar,
+            textvariable=self.sort_var,
+            values=list(SORT_CHOICES),
+            state='readonly',
+            width=12
+        )
+        sort_combo.pack(side='left')
+        sort_combo.bind('<<ComboboxSelected>>', lambda event: self.refresh_notes())
+        
         # Search box
         search_frame = tk.Frame(toolbar, bg='#FFFFFF')
         search_frame.pack(side='right', padx=5)
@@ -375,26 +449,35 @@ class TodoAppV2:
         container = tk.Frame(self.root, bg='#F5F5F5')
         container.pack(fill='both', expand=True, padx=10, pady=5)
         
-        # Canvas for scrolling
+        # Canvas for scrolling. Notes are placed on it directly, at
+        # positions computed from their place in the list, so the scroll
+        # region covers every note without creating them.
         self.canvas = tk.Canvas(container, bg='#F5F5F5', highlightthickness=0)
-        scrollbar = tk.Scrollbar(container, orient='vertical', command=self.canvas.yview)
-        
-        # Frame to hold notes
-        self.notes_frame = tk.Frame(self.canvas, bg='#F5F5F5')
-        
-        # Configure scrolling
-        self.notes_frame.bind(
-            '<Configure>',
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox('all'))
+        self.scrollbar = tk.Scrollbar(container, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_notes_scroll)
+        self.canvas.bind('<Configure>', lambda e: self.render_notes())
+        
+        # Empty state
+        empty_label = tk.Label(
+            self.canvas,
+            text="📝 No notes yet!\nClick '➕ New Note' to get started.",
+            font=('Segoe UI', 14),
+            bg='#F5F5F5',
+            fg='#999999'
         )
-        
-        self.canvas.create_window((0, 0), window=self.notes_frame, anchor='nw')
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.empty_item = self.canvas.create_window(0, 50, window=empty_label, anchor='n',
+                                                    state='hidden')
         
         # Pack scrollbar and canvas
-        scrollbar.pack(side='right', fill='y')
+        self.scrollbar.pack(side='right', fill='y')
         self.canvas.pack(side='left', fill='both', expand=True)
         
+        # Every note has the same height; measure it on the first note of the pool
+        note = self.take_note(Todo(None, datetime.now(), Priority.MEDIUM, Status.PENDING, ''), 0)
+        note.update_idletasks()
+        self.row_height = note.winfo_reqheight() + 2 * self.NOTE_PAD
+        self.note_pool.append(note)
+        
         # Mouse wheel scrolling
         self.canvas.bind_all('<MouseWheel>', self._on_mousewheel)
     
@@ -429,6 +512,16 @@ class TodoAppV2:
         )
         stats_label.pack(side='right', padx=10)
         
+        # Whether the changes are saved yet
+        self.save_status = SaveStatusLabel(
+            statusbar,
+            self.io_worker,
+            bg='#E0E0E0',
+            fg='#555555',
+            font=('Segoe UI', 9)
+        )
+        self.save_status.pack(side='right', padx=10)
+        
         self.update_stats_display()
     
     def show_add_dialog(self):
@@ -476,7 +569,7 @@ class TodoAppV2:
         tk.Label(priority_frame, text="Priority:", bg='#FFFF88', font=('Segoe UI', 10)).pack(side='left', padx=5)
         
         priority_var = tk.StringVar(value='Medium')
-        for priority in ['High', 'Medium', 'Low']:
+        for priority in PRIORITY_LABELS:
             rb = tk.Radiobutton(
                 priority_frame,
                 text=priority,
@@ -498,12 +591,11 @@ class TodoAppV2:
                 return
             
             priority = priority_var.get()
-            if self.file_manager.add_todo(task, priority):
-                self.status_var.set(f"✓ Added: {task[:30]}...")
-                self.refresh_notes()
-                dialog.destroy()
-            else:
-                messagebox.showerror("Error", "Failed to add task!")
+            # The note appears right away; it gets its real ID once saved
+            self.show_new_note(provisional_todo(task, priority))
+            self.queue_write("Add note", self.file_manager.add_todo, task, priority)
+            self.status_var.set(f"✓ Added: {task[:30]}...")
+            dialog.destroy()
         
         tk.Button(
             button_frame,
@@ -534,115 +626,273 @@ class TodoAppV2:
         # Bind Enter to add
         task_text.bind('<Control-Return>', lambda e: add_task())
     
-    def refresh_notes(self):
-        # Clear existing notes
-        for widget in self.notes_frame.winfo_children():
-            widget.destroy()
+    def refresh_notes(self, keep_position=False):
+        """Show the notes again after the list, filter, search or order changed"""
+        if not keep_position:
+            self.canvas.yview_moveto(0)  # Scroll to top
+        self.render_notes(force=True)
+        self.update_stats_display()
+    
+    def on_notes_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render_notes()
+    
+    def visible_range(self, top=None):
+        """Positions of the first and after the last note to show
+        
+        top is the scroll position in pixels, the current one by default.
+        """
+        if top is None:
+            top = self.canvas.canvasy(0)
+        top_row = int(top) // self.row_height
+        rows_in_view = self.canvas.winfo_height() // self.row_height + 1
+        first = max(top_row - self.OVERSCAN_ROWS, 0) * self.MAX_COLS
+        last = (top_row + rows_in_view + self.OVERSCAN_ROWS) * self.MAX_COLS
+        return first, last
+    
+    def render_notes(self, force=False, page=None):
+        """Show the notes in the window plus OVERSCAN_ROWS rows around it
+        
+        Only that range of todos is fetched and reconciled with the notes
+        on screen by todo id: a note whose todo is still in range keeps
+        its widgets, is patched only if the todo changed and is only
+        moved if its position changed. Notes that leave the range go back
+        to the pool, which supplies the notes that enter it. Completing
+        or editing one todo thus updates one note, and deleting one moves
+        the notes after it without rebuilding any.
+        
+        page is an (arguments, result) pair of a query() already run, used
+        if it is the query for the range. While writes are queued the
+        range is read behind them and rendered once it arrives.
+        """
+        width = self.canvas.winfo_width()
+        first, last = self.visible_range()
+        if not force and (first, last, width) == self.shown_range:
+            return
         
-        # Load todos
-        todos = self.file_manager.read_todos()
+        args = self.query_args(first, last - first)
+        if page is not None and page[0] == args:
+            todos, total = page[1]
+        elif self.io_worker.pending:
+            # Reading now would wait for the queued writes, so read behind
+            # them and render the notes once the page is there
+            if self.queued_page != args:
+                self.queued_page = args
+                self.io_worker.fetch(lambda: self.file_manager.query(**args),
+                                     on_result=lambda result: self.page_fetched(args, result))
+                self.save_status.track()
+            return
+        else:
+            todos, total = self.fetch_notes(first, last - first)
+        relayout = self.shown_range is None or width != self.shown_range[2]
+        self.shown_range = (first, last, width)
+        self.set_total_notes(total)
+        
+        shown_notes = self.visible_notes
+        self.visible_notes = {}
+        for position, todo in enumerate(todos, first):
+            note = shown_notes.pop(todo.id, None)
+            placed = note is not None and note.index == position and not relayout
+            if note is None:
+                note = self.take_note(todo, position)
+            if note.todo_data != todo:
+                note.show(todo, position)
+            if not placed:
+                note.index = position
+                self.place_note(note, width)
+            self.visible_notes[todo.id] = note
+        
+        for note in shown_notes.values():
+            self.canvas.itemconfigure(note.canvas_item, state='hidden')
+            self.note_pool.append(note)
+        
+        # Show empty state
+        if relayout:
+            self.canvas.coords(self.empty_item, width // 2, 50)
+        self.canvas.itemconfigure(self.empty_item, state='hidden' if total else 'normal')
+    
+    def page_fetched(self, args, result):
+        if self.queued_page == args:
+            self.queued_page = None
+        if result is not None:
+            self.render_notes(force=True, page=(args, result))
+    
+    def set_total_notes(self, total):
+        """Size the scroll region for total notes"""
+        if total != self.total_notes:
+            self.total_notes = total
+            rows = (total + self.MAX_COLS - 1) // self.MAX_COLS
+            self.canvas.configure(scrollregion=(0, 0, 0, rows * self.row_height))
+    
+    def show_new_note(self, todo):
+        """Show a new todo in its place among the notes in the window
+        
+        The notes after it move one cell on. If its place is outside the
+        window only the scroll region grows; after_write() reconciles the
+        notes with the file once the todo is saved.
+        """
+        args = self.query_args(0)
+        task = todo.task.lower()
+        if (self.shown_range is None or args['status'] not in (None, todo.status) or
+                not all(word in task for word in args['search'].lower().split())):
+            return
+        self.set_total_notes((self.total_notes or 0) + 1)
+        self.canvas.itemconfigure(self.empty_item, state='hidden')
+        
+        first, _, width = self.shown_range
+        notes = sorted(self.visible_notes.values(), key=lambda note: note.index)
+        place = insert_position([note.todo_data for note in notes], todo,
+                                args['sort'], args['reverse'])
+        before_window = place == 0 and first > 0
+        after_window = place == len(notes) and first + len(notes) < self.total_notes - 1
+        if before_window or after_window:
+            return
+        for note in notes[place:]:
+            note.index += 1
+            self.place_note(note, width)
+        note = self.take_note(todo, first + place)
+        note.show(todo, first + place)
+        self.place_note(note, width)
+        self.visible_notes[todo.id] = note
+    
+    def place_note(self, note, width):
+        """Move a note to the grid cell of its position in the list"""
+        column_width = max(width // self.MAX_COLS, 1)
+        row, column = divmod(note.index, self.MAX_COLS)
+        self.canvas.coords(note.canvas_item, column * column_width + self.NOTE_PAD,
+                           row * self.row_height + self.NOTE_PAD)
+        self.canvas.itemconfigure(note.canvas_item, state='normal',
+                                  width=column_width - 2 * self.NOTE_PAD,
+                                  height=self.row_height - 2 * self.NOTE_PAD)
+    
+    def take_note(self, todo, position):
+        """Return a note from the pool, or a new note for todo if the pool is empty
+        
+        Pooled notes still show their last todo and position; the caller
+        rebinds and places them.
+        """
+        if self.note_pool:
+            return self.note_pool.pop()
+        note = StickyNote(
+            self.canvas,
+            todo,
+            position,
+            self.delete_note,
+            self.update_note,
+            self.complete_note
+        )
+        note.canvas_item = self.canvas.create_window(0, 0, window=note, anchor='nw', state='hidden')
+        return note
+    
+    def query_args(self, offset, limit=None, search_term=None):
+        """Arguments of query() for one page of the filtered, searched and sorted todos"""
+        sort, reverse = SORT_CHOICES[self.sort_var.get()]
+        status = Status.parse(self.current_filter) if self.current_filter != 'All' else None
+        return {'search': self.search_term if search_term is None else search_term,
+                'status': status, 'sort': sort, 'reverse': reverse,
+                'offset': offset, 'limit': limit or APP_CONFIG['page_size']}
+    
+    def fetch_notes(self, offset, limit=None):
+        """Fetch one page of the filtered, searched and sorted todos"""
+        return self.file_manager.query(**self.query_args(offset, limit))
+    
+    def watch_file(self):
+        # While our own writes are queued the file is about to change
+        # anyway; after_write() catches up once they are done
+        if not self.io_worker.pending and self.file_manager.poll_changes():
+            # The file manager already has the changes in its cache and
+            # indexes; only notes whose todo changed are redrawn
+            self.refresh_notes(keep_position=True)
+            self.status_var.set("Notes updated by another window")
+        self.root.after(APP_CONFIG['watch_interval'], self.watch_file)
+    
+    def queue_write(self, description, function, *args, on_done=None):
+        """Save a change in the background, see IOWorker"""
+        self.io_worker.submit(description, function, *args,
+                              on_done=on_done or self.after_write)
+        self.save_status.track()
+    
+    def queue_bulk_write(self, description, function, *args, on_success, failure):
+        """Queue a change to many notes behind the writes already queued
         
-        # Apply filter
-        if self.current_filter != 'All':
-            todos = [t for t in todos if t['status'] == self.current_filter]
+        Once it is saved on_success gets what function returned and the
+        notes are refreshed; if it fails, failure is shown instead.
+        """
+        results = []
         
-        # Apply search
-        if self.search_term:
-            todos = [t for t in todos if self.search_term.lower() in t['task'].lower()]
+        def run():
+            results.append(function(*args))
+            return results[0]
         
-        if not todos:
-            # Show empty state
-            empty_label = tk.Label(
-                self.notes_frame,
-                text="📝 No notes yet!\nClick '➕ New Note' to get started.",
-                font=('Segoe UI', 14),
-                bg='#F5F5F5',
-                fg='#999999'
-            )
-            empty_label.pack(pady=50)
-        else:
-            # Create grid of sticky notes
-            row = 0
-            col = 0
-            max_cols = 3
-            
-            for idx, todo in enumerate(todos):
-                note = StickyNote(
-                    self.notes_frame,
-                    todo,
-                    idx,
-                    self.delete_note,
-                    self.update_note,
-                    self.complete_note
-                )
-                note.grid(row=row, column=col, padx=10, pady=10, sticky='nsew')
-                
-                col += 1
-                if col >= max_cols:
-                    col = 0
-                    row += 1
-            
-            # Configure grid weights
-            for i in range(max_cols):
-                self.notes_frame.grid_columnconfigure(i, weight=1, uniform='cols')
+        def on_done(ok):
+            if ok:
+                on_success(results[0])
+            else:
+                messagebox.showerror("Error", failure)
+            self.after_write(ok)
         
-        self.update_stats_display()
-        self.canvas.yview_moveto(0)  # Scroll to top
+        self.queue_write(description, run, on_done=on_done)
     
-    def delete_note(self, index):
+    def after_write(self, ok):
+        """Catch up with the file once the queued writes have finished
+        
+        The notes were patched before the writes ran; reconciling them
+        with the file swaps new notes for their saved todos, moves notes
+        whose place in the filtered, sorted list changed, fills the gaps
+        of deleted ones and, if a write failed, puts back what the file
+        still holds.
+        """
+        if not ok:
+            self.status_var.set("⚠ Failed to save the last change")
+        if not self.io_worker.pending:
+            self.refresh_notes(keep_position=True)
+    
+    def patch_note(self, todo_id, **changes):
+        """Show a change on a note before it is saved"""
+        note = self.visible_notes.get(todo_id)
+        if note is not None:
+            todo = note.todo_data.copy()
+            for name, value in changes.items():
+                setattr(todo, name, value)
+            note.show(todo, note.index)
+    
+    def hide_note(self, todo_id):
+        """Take a note off the canvas before its deletion is saved"""
+        note = self.visible_notes.pop(todo_id, None)
+        if note is not None:
+            self.canvas.itemconfigure(note.canvas_item, state='hidden')
+            self.note_pool.append(note)
+    
+    def still_saving(self, todo_id):
+        """Whether the note is a new one not saved yet, which can't be changed yet"""
+        if is_provisional(todo_id):
+            self.status_var.set("⏳ The note is still being saved, try again in a moment")
+            return True
+        return False
+    
+    def delete_note(self, todo_id):
+        if self.still_saving(todo_id):
+            return
         if messagebox.askyesno("Confirm", "Delete this note?"):
-            # Get actual index from filtered list
-            todos = self.file_manager.read_todos()
-            if self.current_filter != 'All':
-                filtered = [t for t in todos if t['status'] == self.current_filter]
-            else:
-                filtered = todos
-            
-            if self.search_term:
-                filtered = [t for t in filtered if self.search_term.lower() in t['task'].lower()]
-            
-            # Find the actual index in the full list
-            actual_todo = filtered[index]
-            actual_index = todos.index(actual_todo)
-            
-            if self.file_manager.delete_todo(actual_index):
-                self.status_var.set("🗑 Note deleted")
-                self.refresh_notes()
-    
-    def update_note(self, index, new_task):
-        todos = self.file_manager.read_todos()
-        if self.current_filter != 'All':
-            filtered = [t for t in todos if t['status'] == self.current_filter]
-        else:
-            filtered = todos
-        
-        if self.search_term:
-            filtered = [t for t in filtered if self.search_term.lower() in t['task'].lower()]
-        
-        actual_todo = filtered[index]
-        actual_index = todos.index(actual_todo)
-        
-        if self.file_manager.update_todo_task(actual_index, new_task):
-            self.status_var.set("✎ Note updated")
-            self.refresh_notes()
+            self.hide_note(todo_id)
+            self.queue_write("Delete note", self.file_manager.delete_todo_by_id, todo_id)
+            self.status_var.set("🗑 Note deleted")
     
-    def complete_note(self, index, new_status):
-        todos = self.file_manager.read_todos()
-        if self.current_filter != 'All':
-            filtered = [t for t in todos if t['status'] == self.current_filter]
-        else:
-            filtered = todos
-        
-        if self.search_term:
-            filtered = [t for t in filtered if self.search_term.lower() in t['task'].lower()]
-        
-        actual_todo = filtered[index]
-        actual_index = todos.index(actual_todo)
-        
-        if self.file_manager.update_todo_status(actual_index, new_status):
-            status_msg = "✓ Completed" if new_status == 'Completed' else "↶ Reopened"
-            self.status_var.set(status_msg)
-            self.refresh_notes()
+    def update_note(self, todo_id, new_task):
+        if self.still_saving(todo_id):
+            return
+        self.patch_note(todo_id, task=new_task)
+        self.queue_write("Edit note", self.file_manager.update_todo_task_by_id, todo_id, new_task)
+        self.status_var.set("✎ Note updated")
+    
+    def complete_note(self, todo_id, new_status):
+        if self.still_saving(todo_id):
+            return
+        self.patch_note(todo_id, status=new_status)
+        self.queue_write("Complete note", self.file_manager.update_todo_status_by_id,
+                         todo_id, new_status)
+        status_msg = "✓ Completed" if new_status == Status.COMPLETED else "↶ Reopened"
+        self.status_var.set(status_msg)
     
     def apply_filter(self, filter_type):
         self.current_filter = filter_type
@@ -651,39 +901,138 @@ class TodoAppV2:
         self.status_var.set(f"Filter: {filter_type}")
     
     def on_search(self, event=None):
-        self.search_term = self.search_entry.get().strip()
-        self.refresh_notes()
+        # Search once typing pauses instead of on every key
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(APP_CONFIG['search_delay'], self.start_search)
+    
+    def start_search(self):
+        self.search_after = None
+        # Search for the notes at the top, where the results are shown
+        first, last = self.visible_range(top=0)
+        self.search_worker.submit(self.query_args(first, last - first,
+                                                  self.search_entry.get().strip()))
+        if not self.search_polling:
+            self.search_polling = True
+            self.root.after(SearchWorker.POLL_INTERVAL, self.poll_search)
+    
+    def poll_search(self):
+        try:
+            result = self.search_worker.take_result()
+        except Exception as e:
+            self.search_polling = False
+            self.status_var.set(f"⚠ Search failed: {e}")
+            return
+        if result is None and self.search_worker.pending:
+            self.root.after(SearchWorker.POLL_INTERVAL, self.poll_search)
+            return
+        self.search_polling = False
+        if result is None:
+            return  # cancelled
+        
+        self.search_term = result[0]['search']
+        self.canvas.yview_moveto(0)  # Scroll to top
+        # The notes are only fetched again if the filter or order changed
+        # while the search ran
+        self.render_notes(force=True, page=result)
+        self.update_stats_display()
     
     def clear_search(self):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+            self.search_after = None
+        self.search_worker.cancel()
         self.search_entry.delete(0, tk.END)
         self.search_term = ''
         self.refresh_notes()
     
     def clear_completed(self):
         if messagebox.askyesno("Confirm", "Remove all completed notes?"):
-            if self.file_manager.clear_completed():
-                self.status_var.set("🗑 Completed notes cleared")
-                self.refresh_notes()
+            for todo_id, note in list(self.visible_notes.items()):
+                if note.todo_data.status == Status.COMPLETED:
+                    self.hide_note(todo_id)
+            self.queue_write("Clear completed", self.file_manager.clear_completed)
+            self.status_var.set("🗑 Completed notes cleared")
+    
+    def archive_completed(self):
+        days = APP_CONFIG['archive_after_days']
+        if messagebox.askyesno("Confirm", f"Move completed notes older than {days} days to the archive?"):
+            self.queue_bulk_write("Archive completed", self.file_manager.archive_completed, days,
+                                  on_success=lambda count: self.status_var.set(f"🗄 Archived {count} notes"),
+                                  failure="Archiving failed!")
+            self.status_var.set("🗄 Archiving notes...")
+    
+    def search_archive(self):
+        search_term = simpledialog.askstring("Search Archive", "Search archived notes for:")
+        if not search_term:
+            return
+        todos = self.file_manager.search_archive(search_term)
+        if not todos:
+            messagebox.showinfo("Search Archive", "No archived notes found.")
+            return
+        
+        results_window = tk.Toplevel(self.root)
+        results_window.title(f"🗄 Archived notes ({len(todos)})")
+        results_window.geometry("500x300")
+        results_window.transient(self.root)
+        scrollbar = tk.Scrollbar(results_window)
+        scrollbar.pack(side='right', fill='y')
+        results_listbox = tk.Listbox(results_window, yscrollcommand=scrollbar.set,
+                                     font=('Segoe UI', 10), relief='flat')
+        results_listbox.pack(fill='both', expand=True)
+        scrollbar.config(command=results_listbox.yview)
+        results_listbox.insert(tk.END, *(f"✓ {todo.task}  ({todo.timestamp})" for todo in todos))
     
     def clear_all(self):
         if messagebox.askyesno("Warning", "Delete ALL notes? This cannot be undone!"):
-            todos = self.file_manager.read_todos()
-            for i in range(len(todos) - 1, -1, -1):
-                self.file_manager.delete_todo(i)
-            self.status_var.set("🗑 All notes cleared")
-            self.refresh_notes()
+            def delete_all():
+                todos = self.file_manager.read_todos()
+                return self.file_manager.apply_batch([('delete', todo.id) for todo in todos])
+            
+            for todo_id in list(self.visible_notes):
+                self.hide_note(todo_id)
+            self.queue_bulk_write("Clear all", delete_all,
+                                  on_success=lambda ok: self.status_var.set("🗑 All notes cleared"),
+                                  failure="Failed to clear notes!")
     
     def create_backup(self):
-        if self.file_manager.create_backup():
-            messagebox.showinfo("Success", "Backup created!")
-            self.status_var.set("💾 Backup created")
+        def on_done(ok):
+            if ok:
+                self.status_var.set("💾 Backup created")
+            else:
+                messagebox.showerror("Error", "Failed to create backup!")
+            self.after_write(True)  # the backup changed no notes
+        
+        self.queue_write("Backup", self.file_manager.create_backup, on_done=on_done)
+        self.status_var.set("💾 Creating backup...")
+    
+    def choose_backup(self):
+        """Ask which backup snapshot to restore, returns its index or None"""
+        backups = self.file_manager.list_backups()
+        if not backups:
+            messagebox.showinfo("Restore", "No backups available.")
+            return None
+        if len(backups) == 1:
+            return backups[0]['index']
+        
+        choices = "\n".join(f"{number}. {backup['created']} ({backup['count']} notes)"
+                            for number, backup in enumerate(backups, 1))
+        number = simpledialog.askinteger("Restore Backup", f"Restore which backup?\n\n{choices}",
+                                         initialvalue=len(backups), minvalue=1, maxvalue=len(backups))
+        return backups[number - 1]['index'] if number else None
     
     def restore_backup(self):
+        index = self.choose_backup()
+        if index is None:
+            return
         if messagebox.askyesno("Confirm", "Restore from backup? Current data will be replaced."):
-            if self.file_manager.restore_backup():
-                self.refresh_notes()
+            def on_success(ok):
                 messagebox.showinfo("Success", "Backup restored!")
                 self.status_var.set("↶ Backup restored")
+            
+            self.queue_bulk_write("Restore backup", self.file_manager.restore_backup, index,
+                                  on_success=on_success, failure="Failed to restore backup!")
+            self.status_var.set("↶ Restoring backup...")
     
     def export_todos(self, format_type):
         from tkinter import filedialog
@@ -692,22 +1041,54 @@ class TodoAppV2:
             filetypes=[(f"{format_type.upper()} files", f"*.{format_type}")]
         )
         if file_path:
-            if self.file_manager.export_todos(file_path, format_type):
-                messagebox.showinfo("Success", f"Exported to {file_path}")
-                self.status_var.set(f"📤 Exported")
+            def on_done(success):
+                if success:
+                    messagebox.showinfo("Success", f"Exported to {file_path}")
+                    self.status_var.set(f"📤 Exported")
+                else:
+                    messagebox.showerror("Error", "Export failed!")
+            
+            self.status_var.set("📤 Exporting...")
+            ExportProgressDialog(self.root, self.file_manager, file_path, format_type, on_done,
+                                 self.export_archive_var.get(), self.io_worker)
+    
+    def import_todos(self):
+        from tkinter import filedialog
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Todo files", " ".join(f"*.{name}" for name in IMPORT_FORMATS)),
+                       ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        # Anything that isn't CSV or JSON is read as text
+        extension = os.path.splitext(file_path)[1].lstrip('.').lower()
+        format_type = extension if extension in IMPORT_FORMATS else 'txt'
+        
+        def on_success(report):
+            messagebox.showinfo("Success", f"Imported {report['added']} notes\n"
+                                           f"Skipped {report['duplicates']} duplicates and "
+                                           f"{report['invalid']} invalid rows")
+            self.status_var.set(f"📥 Imported {report['added']} notes")
+        
+        self.queue_bulk_write("Import", self.file_manager.import_todos, file_path, format_type,
+                              on_success=on_success, failure="Import failed!")
+        self.status_var.set(f"📥 Importing {os.path.basename(file_path)}...")
     
     def update_stats_display(self):
+        if self.io_worker.pending:
+            return  # after_write() updates them without waiting for the writes
         stats = self.file_manager.get_statistics()
         stats_text = f"📊 Total: {stats['total']} | ⏳ Pending: {stats['pending']} | ✓ Done: {stats['completed']}"
         self.stats_var.set(stats_text)
     
     def show_statistics(self):
-        stats = self.file_manager.get_statistics()
+        stats = self.file_manager.get_statistics(include_archive=True)
         completion_rate = (stats['completed'] / stats['total'] * 100) if stats['total'] > 0 else 0
         
         stats_window = tk.Toplevel(self.root)
         stats_window.title("Statistics")
-        stats_window.geometry("350x300")
+        stats_window.geometry("350x330")
         stats_window.configure(bg='#FFFFFF')
         stats_window.transient(self.root)
         
@@ -725,6 +1106,7 @@ class TodoAppV2:
             ("Total Notes:", stats['total']),
             ("Pending:", stats['pending']),
             ("Completed:", stats['completed']),
+            ("Archived:", stats['archived']),
             ("", ""),
             ("High Priority:", stats['high_priority']),
             ("Medium Priority:", stats['medium_priority']),
@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Callable, Iterable, Optional, TextIO
+
+from todo_record import Status, Todo
+
+# Size of the write buffer, so the export file is written in large chunks
+EXPORT_CHUNK_SIZE = 1 << 20
+
+# Todos written between two progress reports
+PROGRESS_INTERVAL = 1000
+
+# Completed todos of a txt export are kept in memory up to this size,
+# then spooled to a temp file until the pending section is written
+SPOOL_SIZE = 8 << 20
+
+def _txt_line(number: int, todo: Todo) -> str:
+    return f"{number}. [{todo.priority.label}] {todo.task} (Created: {todo.timestamp})\n"
+
+class _ExportWriter:
+    """Writes todos to an open export file in one pass
+    
+    add() is called once per todo, finish() once at the end. Progress
+    is reported as (todos written, total) every PROGRESS_INTERVAL todos
+    and when the export is done; total is None if unknown.
+    """
+    
+    def __init__(self, file: TextIO, total: Optional[int],
+                 progress: Optional[Callable[[int, Optional[int]], None]]):
+        self.file = file
+        self.total = total
+        self.progress = progress
+        self.written = 0
+    
+    def add(self, todo: Todo):
+        self.write(todo)
+        self.written += 1
+        if self.progress is not None and self.written % PROGRESS_INTERVAL == 0:
+            self.progress(self.written, self.total)
+    
+    def write(self, todo: Todo):
+        raise NotImplementedError
+    
+    def finish(self):
+        if self.progress is not None:
+            self.progress(self.written, self.total)
+
+class _TxtWriter(_ExportWriter):
+    """Readable list with the pending tasks first
+    
+    Pending lines are written straight away; completed ones are spooled
+    and copied behind them at the end, so the todos are read only once.
+    """
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.pending = 0
+        self.completed = tempfile.SpooledTemporaryFile(SPOOL_SIZE, mode='w+', encoding='utf-8')
+        self.completed_count = 0
+        self.file.write("=== TODO LIST EXPORT ===\n")
+        self.file.write(f"Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    
+    def write(self, todo: Todo):
+        # Section headers only above non-empty sections
+        if todo.status == Status.COMPLETED:
+            self.completed_count += 1
+            self.completed.write(_txt_line(self.completed_count, todo))
+        else:
+            self.pending += 1
+            if self.pending == 1:
+                self.file.write("PENDING TASKS:\n")
+                self.file.write("-" * 50 + "\n")
+            self.file.write(_txt_line(self.pending, todo))
+    
+    def finish(self):
+        with self.completed:
+            if self.completed_count:
+                self.file.write("\nCOMPLETED TASKS:\n")
+                self.file.write("-" * 50 + "\n")
+                self.completed.seek(0)
+                while True:
+                    chunk = self.completed.read(EXPORT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self.file.write(chunk)
+        super().finish()
+
+class _CsvWriter(_ExportWriter):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['Timestamp', 'Priority', 'Status', 'Task'])
+    
+    def write(self, todo: Todo):
+        self.writer.writerow([todo.timestamp, todo.priority.label, todo.status.label, todo.task])
+
+class _NdjsonWriter(_ExportWriter):
+    """One JSON object with the data file fields per line"""
+    
+    def write(self, todo: Todo):
+        self.file.write(json.dumps(todo.to_dict(), ensure_ascii=False) + '\n')
+
+class _JsonWriter(_ExportWriter):
+    """A JSON array of objects, written element by element"""
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.file.write('[')
+    
+    def write(self, todo: Todo):
+        self.file.write(',\n  ' if self.written else '\n  ')
+        self.file.write(json.dumps(todo.to_dict(), ensure_ascii=False))
+    
+    def finish(self):
+        self.file.write('\n]\n' if self.written else ']\n')
+        super().finish()
+
+_WRITERS = {
+    'txt': _TxtWriter,
+    'csv': _CsvWriter,
+    'ndjson': _NdjsonWriter,
+    'json': _JsonWriter
+}
+
+# Formats export_todos() can write
+EXPORT_FORMATS = tuple(_WRITERS)
+
+def write_export(todos: Iterable[Todo], export_file: str, format_type: str,
+                 total: Optional[int] = None,
+                 progress: Optional[Callable[[int, Optional[int]], None]] = None) -> int:
+    """Stream todos into export_file, returns how many were written
+    
+    The file is written through a large buffer and renamed into place
+    when complete, so a failed export doesn't leave half a file behind.
+    Raises ValueError for an unknown format.
+    """
+    writer_class = _WRITERS.get(format_type.lower())
+    if writer_class is None:
+        raise ValueError(f"Unknown export format: {format_type}")
+    
+    temp_path = export_file + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8', newline='',
+                  buffering=EXPORT_CHUNK_SIZE) as file:
+            writer = writer_class(file, total, progress)
+            for todo in todos:
+                writer.add(todo)
+            writer.finish()
+        os.replace(temp_path, export_file)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return writer.written
@@ -0,0 +1,127 @@
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+
+from file_manager import _split_todo_line
+from todo_record import Priority, Status, Todo, parse_timestamp
+
+# Rows parsed and validated together
+IMPORT_BATCH_SIZE = 5000
+
+def _txt_rows(file) -> Iterator[Dict[str, str]]:
+    """Data file lines, or one plain task text per line"""
+    for line in file:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = _split_todo_line(line)
+        if fields is None:
+            yield {'task': line}
+        else:
+            yield dict(zip(Todo.FIELDS, fields))
+
+def _csv_rows(file) -> Iterator[Dict[str, str]]:
+    """Rows of a CSV file with a header row, like the CSV export"""
+    reader = csv.reader(file)
+    header = [name.strip().lower() for name in next(reader, [])]
+    if 'task' not in header:
+        raise ValueError("CSV file has no Task column")
+    for row in reader:
+        if row:
+            yield dict(zip(header, row))
+
+def _ndjson_rows(file) -> Iterator[Dict[str, str]]:
+    """One JSON object per line, like the NDJSON export"""
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield {}  # counted as invalid
+
+def _json_rows(file) -> Iterator[Dict[str, str]]:
+    """A JSON array of objects, like the JSON export (read in one go)"""
+    rows = json.load(file)
+    if not isinstance(rows, list):
+        raise ValueError("JSON file is not an array of todos")
+    return iter(rows)
+
+_READERS = {
+    'txt': _txt_rows,
+    'csv': _csv_rows,
+    'ndjson': _ndjson_rows,
+    'json': _json_rows
+}
+
+# Formats import_todos() can read
+IMPORT_FORMATS = tuple(_READERS)
+
+def _text(row, key: str) -> str:
+    value = row.get(key) if isinstance(row, dict) else None
+    return str(value).strip() if value is not None else ''
+
+def _validate_batch(rows: List[Dict[str, str]], now: datetime) -> Tuple[List[Todo], int]:
+    """Turn a batch of rows into todos, returns them and the number of invalid rows
+    
+    Imports tend to repeat timestamps and always repeat the few priority
+    and status labels, so each distinct value is parsed once per batch.
+    Missing timestamps, priorities and statuses default to now, Medium
+    and Pending; labels are case-insensitive.
+    """
+    timestamps = {}
+    for value in {_text(row, 'timestamp') for row in rows}:
+        try:
+            timestamps[value] = parse_timestamp(value) if value else now
+        except ValueError:
+            timestamps[value] = None
+    priorities = {}
+    for value in {_text(row, 'priority') for row in rows}:
+        try:
+            priorities[value] = Priority.parse(value.capitalize() if value else 'Medium')
+        except ValueError:
+            priorities[value] = None
+    statuses = {}
+    for value in {_text(row, 'status') for row in rows}:
+        try:
+            statuses[value] = Status.parse(value.capitalize() if value else 'Pending')
+        except ValueError:
+            statuses[value] = None
+    
+    todos = []
+    invalid = 0
+    for row in rows:
+        created = timestamps[_text(row, 'timestamp')]
+        priority = priorities[_text(row, 'priority')]
+        status = statuses[_text(row, 'status')]
+        todo_id = _text(row, 'id')
+        task = _text(row, 'task')
+        # The data file has one todo per line, and IDs end at the first '|'
+        bad_id = '|' in todo_id or any(char.isspace() for char in todo_id)
+        if (created is None or priority is None or status is None or bad_id or
+                not task or '\n' in task or '\r' in task):
+            invalid += 1
+            continue
+        todos.append(Todo(todo_id or None, created, priority, status, task))
+    return todos, invalid
+
+def read_import(import_file: str, format_type: str,
+                batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[Tuple[List[Todo], int]]:
+    """Yield (valid todos, number of invalid rows) for each batch of an import file
+    
+    Raises ValueError for an unknown format or a file that can't be
+    read in that format.
+    """
+    reader = _READERS.get(format_type.lower())
+    if reader is None:
+        raise ValueError(f"Unknown import format: {format_type}")
+    
+    now = datetime.now().replace(microsecond=0)
+    with open(import_file, 'r', encoding='utf-8', newline='') as file:
+        rows = reader(file)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield _validate_batch(batch, now)
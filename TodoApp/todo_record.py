@@ -0,0 +1,143 @@
+from datetime import datetime
+from enum import IntEnum
+from typing import Dict, Optional, Union
+
+# Labels used in the data file, indexed by the enum values below
+PRIORITY_LABELS = ('High', 'Medium', 'Low')
+STATUS_LABELS = ('Pending', 'Completed')
+
+class Priority(IntEnum):
+    """Todo priority, ordered from most to least urgent"""
+    HIGH = 0
+    MEDIUM = 1
+    LOW = 2
+    
+    @property
+    def label(self) -> str:
+        return PRIORITY_LABELS[self]
+    
+    @classmethod
+    def parse(cls, value: Union['Priority', str]) -> 'Priority':
+        """Return the priority for a label like 'High' (or a Priority)"""
+        try:
+            return value if isinstance(value, cls) else _PRIORITIES[value]
+        except KeyError:
+            raise ValueError(f"Unknown priority: {value}") from None
+
+class Status(IntEnum):
+    """Todo status"""
+    PENDING = 0
+    COMPLETED = 1
+    
+    @property
+    def label(self) -> str:
+        return STATUS_LABELS[self]
+    
+    @classmethod
+    def parse(cls, value: Union['Status', str]) -> 'Status':
+        """Return the status for a label like 'Pending' (or a Status)"""
+        try:
+            return value if isinstance(value, cls) else _STATUSES[value]
+        except KeyError:
+            raise ValueError(f"Unknown status: {value}") from None
+
+_PRIORITIES = {label: Priority(value) for value, label in enumerate(PRIORITY_LABELS)}
+_STATUSES = {label: Status(value) for value, label in enumerate(STATUS_LABELS)}
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a YYYY-MM-DD HH:MM:SS timestamp, raises ValueError otherwise"""
+    if len(value) != 19 or value[4:11:3] != '-- ' or value[13:17:3] != '::':
+        raise ValueError(f"Invalid timestamp: {value}")
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+class Todo:
+    """One todo record
+    
+    Priority and status are enums, so filters and counters compare small
+    ints, and the creation time is parsed once when the record is read.
+    
+    Records also support the item access of the dictionaries used before
+    (todo['status'] == 'Completed'); those keys read and write the data
+    file labels.
+    """
+    
+    __slots__ = ('id', 'created', 'priority', 'status', 'task')
+    
+    # Keys of the dictionary form, in data file order
+    FIELDS = ('id', 'timestamp', 'priority', 'status', 'task')
+    
+    def __init__(self, id: Optional[str], created: datetime, priority: Priority,
+                 status: Status, task: str):
+        self.id = id
+        self.created = created
+        self.priority = priority
+        self.status = status
+        self.task = task
+    
+    @classmethod
+    def from_dict(cls, data: Union['Todo', Dict[str, str]]) -> 'Todo':
+        """Build a record from a dictionary of data file fields (or copy a record)"""
+        if isinstance(data, cls):
+            return data.copy()
+        return cls(
+            data.get('id'),
+            parse_timestamp(data['timestamp']),
+            Priority.parse(data['priority']),
+            Status.parse(data['status']),
+            data['task']
+        )
+    
+    @property
+    def timestamp(self) -> str:
+        return self.created.isoformat(' ', 'seconds')
+    
+    @property
+    def completed(self) -> bool:
+        return self.status == Status.COMPLETED
+    
+    def copy(self) -> 'Todo':
+        return Todo(self.id, self.created, self.priority, self.status, self.task)
+    
+    def to_dict(self) -> Dict[str, str]:
+        """Return the record as a dictionary of data file fields"""
+        return {key: self[key] for key in self.FIELDS}
+    
+    def keys(self):
+        return self.FIELDS
+    
+    def get(self, key: str, default=None):
+        return self[key] if key in self.FIELDS else default
+    
+    def __getitem__(self, key: str):
+        if key == 'timestamp':
+            return self.timestamp
+        if key == 'priority':
+            return self.priority.label
+        if key == 'status':
+            return self.status.label
+        if key in ('id', 'task'):
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value: str):
+        if key == 'timestamp':
+            self.created = parse_timestamp(value)
+        elif key == 'priority':
+            self.priority = Priority.parse(value)
+        elif key == 'status':
+            self.status = Status.parse(value)
+        elif key in ('id', 'task'):
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Todo):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"Todo(id={self.id!r}, timestamp={self.timestamp!r}, priority={self.priority.label!r}, "
+                f"status={self.status.label!r}, task={self.task!r})")
@@ -0,0 +1,122 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from file_manager import CHECKSUM_PREFIX, _split_todo_line
+from todo_record import PRIORITY_LABELS, STATUS_LABELS
+
+# YYYY-MM-DD HH:MM:SS with each field in range. Whether the day exists in
+# that month is checked separately, once per distinct date.
+TIMESTAMP_PATTERN = re.compile(
+    r'([0-9]{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01])) '
+    r'(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]'
+)
+
+# Files smaller than this are validated in the calling process; for them
+# starting worker processes costs more than it saves
+PARALLEL_MIN_SIZE = 8 << 20
+
+# A problem found on a line: (line number, what is wrong, offending text).
+# What is wrong is 'format', 'timestamp', 'priority', 'status' or 'encoding'.
+LineError = Tuple[int, str, str]
+
+_PRIORITIES = frozenset(PRIORITY_LABELS)
+_STATUSES = frozenset(STATUS_LABELS)
+_CHECKSUM_PREFIX = CHECKSUM_PREFIX.encode('ascii')
+
+def _valid_date(value: str, cache: Dict[str, bool]) -> bool:
+    valid = cache.get(value)
+    if valid is None:
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+            valid = True
+        except ValueError:
+            valid = False
+        cache[value] = valid
+    return valid
+
+def _validate_range(path: str, start: int, end: int) -> Tuple[int, List[LineError]]:
+    """Validate the lines in bytes start to end of a file
+    
+    start and end are line starts (or the end of the file). Returns the
+    number of lines in the range and the problems found, numbered from 1
+    at start.
+    """
+    errors = []
+    dates: Dict[str, bool] = {}
+    match_timestamp = TIMESTAMP_PATTERN.fullmatch
+    line_num = 0
+    with open(path, 'rb') as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            raw_line = file.readline()
+            if not raw_line:
+                break
+            position += len(raw_line)
+            line_num += 1
+            
+            raw_line = raw_line.strip()
+            if not raw_line or raw_line.startswith(_CHECKSUM_PREFIX):
+                continue
+            try:
+                line = raw_line.decode('utf-8')
+            except UnicodeDecodeError:
+                errors.append((line_num, 'encoding', raw_line.decode('utf-8', 'replace')))
+                continue
+            
+            fields = _split_todo_line(line)
+            if fields is None:
+                errors.append((line_num, 'format', line))
+                continue
+            match = match_timestamp(fields[1])
+            if match is None or not _valid_date(match.group(1), dates):
+                errors.append((line_num, 'timestamp', fields[1]))
+            if fields[2] not in _PRIORITIES:
+                errors.append((line_num, 'priority', fields[2]))
+            if fields[3] not in _STATUSES:
+                errors.append((line_num, 'status', fields[3]))
+    return line_num, errors
+
+def _split_ranges(path: str, size: int, count: int) -> List[Tuple[int, int]]:
+    """Cut a file into about count byte ranges that start at line starts"""
+    bounds = [0]
+    with open(path, 'rb') as file:
+        for number in range(1, count):
+            file.seek(max(size * number // count, bounds[-1]))
+            file.readline()  # move on to the start of the next line
+            position = file.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def find_invalid_lines(file_path: str, processes: Optional[int] = None) -> List[LineError]:
+    """Return every problem in a todo data file, in line order
+    
+    Large files are cut into byte ranges that are validated in a pool of
+    processes (one per CPU unless processes is given); line numbers are
+    made absolute afterwards from the line count of each range. Raises
+    OSError if the file can't be read.
+    """
+    size = os.path.getsize(file_path)
+    processes = processes or os.cpu_count() or 1
+    if size < PARALLEL_MIN_SIZE or processes == 1:
+        return _validate_range(file_path, 0, size)[1]
+    
+    ranges = _split_ranges(file_path, size, processes)
+    with ProcessPoolExecutor(len(ranges)) as pool:
+        results = list(pool.map(_validate_range, [file_path] * len(ranges),
+                                *zip(*ranges)))
+    
+    errors = []
+    lines_before = 0
+    for line_count, range_errors in results:
+        errors.extend((lines_before + line_num, problem, text)
+                      for line_num, problem, text in range_errors)
+        lines_before += line_count
+    return errors